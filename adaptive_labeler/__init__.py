@@ -1,3 +1,34 @@
-from adaptive_labeler.color_scheme import LabelerColorScheme
-from adaptive_labeler.labeler_config import LabelerConfig
-from adaptive_labeler.labeler_app import LabelAppFactory
+from __future__ import annotations
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# Starts the startup clock; stdlib only, so importing the package stays cheap.
+from adaptive_labeler.runtime import startup as _startup  # noqa: F401
+
+if TYPE_CHECKING:
+    from adaptive_labeler.color_scheme import LabelerColorScheme
+    from adaptive_labeler.labeler_app import LabelAppFactory
+    from adaptive_labeler.labeler_config import LabelerConfig
+
+# Public names and their modules, imported on first access: the app module
+# pulls in Flet, pynput and the labeling stack.
+_LAZY_ATTRIBUTES = {
+    "LabelerColorScheme": "adaptive_labeler.color_scheme",
+    "LabelerConfig": "adaptive_labeler.labeler_config",
+    "LabelAppFactory": "adaptive_labeler.labeler_app",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,10 +1,20 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
 import flet as ft
 from adaptive_labeler.controls.image_with_label import (
     ImageWithLabel,
 )
+from adaptive_labeler.runtime.update_batcher import UpdateBatcher
+
+if TYPE_CHECKING:
+    from adaptive_labeler.runtime.image_server import ImageServer
 
 
 class ImagePairViewer(ft.Container):
+    PADDING = 20
+    # Room taken by the "Original"/"Noisy" title and file name around each image
+    LABEL_HEIGHT = 60
+
     def __init__(
         self,
         original_image_name: str,
@@ -12,8 +22,11 @@ class ImagePairViewer(ft.Container):
         original_image_base64: str,
         noisy_image_base64: str,
         color_scheme: ft.ColorScheme | None = None,
+        update_batcher: UpdateBatcher | None = None,
+        image_server: ImageServer | None = None,
     ):
         super().__init__()
+        self.update_batcher = update_batcher or UpdateBatcher()
 
         # Use injected theme or fallback
         self.color_scheme = color_scheme or ft.ColorScheme(
@@ -28,12 +41,14 @@ class ImagePairViewer(ft.Container):
             original_image_name,
             original_image_base64,
             color_scheme,
+            image_server,
         )
         self.noisy = ImageWithLabel(
             "Noisy",
             noisy_image_name,
             noisy_image_base64,
             color_scheme,
+            image_server,
         )
 
         # Layout
@@ -53,7 +68,7 @@ class ImagePairViewer(ft.Container):
         # Styling from theme
         self.bgcolor = self.color_scheme.surface
         self.border_radius = 16
-        self.padding = ft.padding.all(20)
+        self.padding = ft.padding.all(self.PADDING)
         self.shadow = ft.BoxShadow(
             spread_radius=1,
             blur_radius=8,
@@ -62,6 +77,12 @@ class ImagePairViewer(ft.Container):
         )
         self.expand = True
 
+    def image_box(self, width: float, height: float) -> tuple[float, float]:
+        """Size of one image slot when the viewer is given `width` x `height`."""
+        inner_width = width - 2 * self.PADDING
+        inner_height = height - 2 * self.PADDING - self.LABEL_HEIGHT
+        return inner_width / 2, inner_height
+
     def update_images(
         self,
         original_image_name: str,
@@ -72,4 +93,4 @@ class ImagePairViewer(ft.Container):
         self.original.update_images(original_image_name, original_image_base64)
         self.noisy.update_images(noisy_image_name, noisy_image_base64)
 
-        self.update()
+        self.update_batcher.touch(self)
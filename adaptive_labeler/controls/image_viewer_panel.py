@@ -1,9 +1,16 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
 import flet as ft
 
 from adaptive_labeler.controls.image_pair_view import ImagePairViewer
+from adaptive_labeler.runtime.update_batcher import UpdateBatcher
+
+if TYPE_CHECKING:
+    from adaptive_labeler.runtime.image_server import ImageServer
 
 
 class ImageViewerPanel(ft.Container):
+    PADDING = 20
 
     def __init__(
         self,
@@ -12,6 +19,8 @@ class ImageViewerPanel(ft.Container):
         original_image_base64: str,
         noisy_image_base64: str,
         color_scheme: ft.ColorScheme | None = None,
+        update_batcher: UpdateBatcher | None = None,
+        image_server: ImageServer | None = None,
     ):
         super().__init__()
         self.viewer = ImagePairViewer(
@@ -20,13 +29,20 @@ class ImageViewerPanel(ft.Container):
             original_image_base64,
             noisy_image_base64,
             color_scheme,
+            update_batcher,
+            image_server,
         )
         self.content = self.viewer
         self.bgcolor = color_scheme.primary
-        self.padding = 20
+        self.padding = self.PADDING
         self.border_radius = 12
         self.expand = 12
 
+    def image_box(self, width: float, height: float) -> tuple[float, float]:
+        return self.viewer.image_box(
+            width - 2 * self.PADDING, height - 2 * self.PADDING
+        )
+
     def update_images(
         self,
         original_image_name: str,
@@ -1,5 +1,10 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
 import flet as ft
 
+if TYPE_CHECKING:
+    from adaptive_labeler.runtime.image_server import ImageServer
+
 
 class ImageWithLabel(ft.Column):
     def __init__(
@@ -8,9 +13,13 @@ class ImageWithLabel(ft.Column):
         image_name: str,
         image_base64: str,
         color_scheme: ft.ColorScheme | None = None,
+        image_server: ImageServer | None = None,
     ):
         super().__init__()
 
+        # With a server, images go out as URLs instead of inline base64.
+        self.image_server = image_server
+
         # Use provided theme or fallback
         self.color_scheme = color_scheme or ft.ColorScheme(
             primary="#7F00FF",
@@ -69,7 +78,11 @@ class ImageWithLabel(ft.Column):
 
     def __set_images(self, image_name: str, image_base64: str) -> None:
         self.name.value = image_name
-        self.image.src_base64 = image_base64
+        if self.image_server:
+            # Pinned while shown; rendering workers already published it.
+            self.image.src = self.image_server.publish_base64(image_base64, slot=self)
+        else:
+            self.image.src_base64 = image_base64
 
     def update_images(self, image_name: str, image_base64: str) -> None:
         """Update the displayed image from a new ImagePath."""
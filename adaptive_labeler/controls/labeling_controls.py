@@ -1,5 +1,5 @@
-from typing import Callable, Literal, Optional
-import random
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable, Literal, Optional
 import flet as ft
 from image_utils.noising_operation import NosingOperation
 from image_utils.noisy_image_maker import NoisyImageMaker
@@ -8,6 +8,13 @@ from labeling.label_manager import LabelManager
 from adaptive_labeler.controls.instructions import Instructions
 from adaptive_labeler.controls.labeling_progress import LabelingProgress
 from adaptive_labeler.controls.noise_control import NoiseControl
+from adaptive_labeler.imaging.noise_chain import split_master_severity
+from adaptive_labeler.runtime.tracing import span
+from adaptive_labeler.runtime.update_batcher import UpdateBatcher
+
+if TYPE_CHECKING:
+    from adaptive_labeler.labels.duplicate_index import DuplicateIndex
+    from adaptive_labeler.labels.image_index import ImageIndex
 
 
 class LabelingController(ft.Row):
@@ -26,15 +33,27 @@ class LabelingController(ft.Row):
         color_scheme: Optional[ft.ColorScheme] = None,
         severity_update_callback: Optional[Callable] = None,
         noisy_image_maker: Optional[NoisyImageMaker] = None,  # 🔥 IMPORTANT
+        update_batcher: Optional[UpdateBatcher] = None,
+        severity_seed: Optional[int] = None,
+        master_value: float = 0.0,
+        image_index: Optional[ImageIndex] = None,
+        duplicate_index: Optional[DuplicateIndex] = None,
     ):
         super().__init__()
 
         self.color_scheme = color_scheme or self.DEFAULT_COLOR_SCHEME
         self.label_manager = label_manager
         self.mode = mode
+        self.update_batcher = update_batcher or UpdateBatcher()
         self.noisy_image_maker = noisy_image_maker
         self.severity_update_callback = severity_update_callback
-        self.default_master_noise_value = 0.0
+        self.default_master_noise_value = master_value
+        # Seeds how the master value is split, so a slider state can be replayed.
+        self.severity_seed = severity_seed
+        # Progress comes from the image index when there is one, counted in
+        # unique images when near-duplicates are grouped.
+        self.image_index = image_index
+        self.duplicate_index = duplicate_index
         self.threshold_sliders: list[NoiseControl] = []
 
         # --- Per-noise sliders ---
@@ -48,14 +67,17 @@ class LabelingController(ft.Row):
                     value=value,
                     color_scheme=self.color_scheme,
                     on_end_change=severity_update_callback,
+                    update_batcher=self.update_batcher,
                 )
                 self.threshold_sliders.append(slider)
 
         # --- Progress ---
+        value, progress_text = self._progress()
         self.progress_area = LabelingProgress(
-            value=label_manager.percentage_complete(),
-            progress_text=f"{label_manager.labeled_count()}/{label_manager.total()} labeled",
+            value=value,
+            progress_text=progress_text,
             color_scheme=self.color_scheme,
+            update_batcher=self.update_batcher,
         )
 
         # --- Master slider ---
@@ -64,6 +86,7 @@ class LabelingController(ft.Row):
             value=self.default_master_noise_value,
             color_scheme=self.color_scheme,
             on_end_change=self._on_master_slider_change,
+            update_batcher=self.update_batcher,
         )
 
         # --- Layout ---
@@ -100,7 +123,9 @@ class LabelingController(ft.Row):
         """
         Distribute severity from the master slider across all threshold sliders.
 
-        If master_value is None, uses the current master slider value.
+        If master_value is None, uses the current master slider value. With a
+        `severity_seed`, the split only depends on the seed and the master
+        value, so the same master value always gives the same severities.
         """
         total = (
             master_value
@@ -108,35 +133,43 @@ class LabelingController(ft.Row):
             else self.master_slider.slider.value
         )
 
-        num_sliders = len(self.threshold_sliders)
-        if num_sliders == 0 or total <= 0:
-            for slider in self.threshold_sliders:
-                slider.set_value(0.0)
-                slider.update()
-            return
-
-        # --- Random weights ---
-        weights = [random.random() for _ in range(num_sliders)]
-        total_weight = sum(weights)
-        proportions = [w / total_weight for w in weights]
-
-        # --- Assign severities ---
-        for slider, proportion in zip(self.threshold_sliders, proportions):
-            slider_value = round(total * proportion, 3)
-            slider.set_value(slider_value)
-            slider.update()
+        severities = split_master_severity(
+            total,
+            [slider.label for slider in self.threshold_sliders],
+            self.severity_seed,
+        )
+        for slider in self.threshold_sliders:
+            slider.set_value(severities[slider.label])
 
     def did_mount(self):
         # Now that the controls are attached, we can safely update them
-        self.distribute_master_severity(master_value=self.default_master_noise_value)
+        with self.update_batcher.batch("mount"):
+            self.distribute_master_severity(
+                master_value=self.default_master_noise_value
+            )
 
     # ----------------------------------------------------------------------
     # Progress bar
 
     def update_progress(self):
-        self.progress_area.update_progress(
-            value=self.label_manager.percentage_complete(),
-            progress_text=f"{self.label_manager.labeled_count()}/{self.label_manager.total()} labeled",
+        with span("update_progress"):
+            value, progress_text = self._progress()
+            self.progress_area.update_progress(value=value, progress_text=progress_text)
+
+    def _progress(self) -> tuple[float, str]:
+        if self.duplicate_index is not None:
+            return (
+                self.duplicate_index.percentage_complete(),
+                self.duplicate_index.progress_text(),
+            )
+        if self.image_index is not None:
+            return (
+                self.image_index.percentage_complete(),
+                self.image_index.progress_text(),
+            )
+        return (
+            self.label_manager.percentage_complete(),
+            f"{self.label_manager.labeled_count()}/{self.label_manager.total()} labeled",
         )
 
     # ----------------------------------------------------------------------
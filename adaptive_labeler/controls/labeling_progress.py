@@ -1,5 +1,7 @@
 import flet as ft
 
+from adaptive_labeler.runtime.update_batcher import UpdateBatcher
+
 
 class LabelingProgress(ft.Container):
     DEFAULT_COLOR_SCHEME = ft.ColorScheme(
@@ -14,10 +16,12 @@ class LabelingProgress(ft.Container):
         progress_text: str = "",
         expand: int = 1,
         color_scheme: ft.ColorScheme | None = None,
+        update_batcher: UpdateBatcher | None = None,
     ):
         super().__init__()
 
         self.color_scheme = color_scheme or self.DEFAULT_COLOR_SCHEME
+        self.update_batcher = update_batcher or UpdateBatcher()
         self._progress_value = value
         self._progress_text = progress_text
 
@@ -58,7 +62,7 @@ class LabelingProgress(ft.Container):
     def value(self, new_value: float):
         self._progress_value = new_value
         self.progress.value = new_value
-        self.progress.update()
+        self.update_batcher.touch(self.progress)
 
     @property
     def text_value(self) -> str:
@@ -68,10 +72,10 @@ class LabelingProgress(ft.Container):
     def text_value(self, new_text: str):
         self._progress_text = new_text
         self.text.value = new_text
-        self.text.update()
+        self.update_batcher.touch(self.text)
 
     def update_progress(self, value: float, progress_text: str):
         """Convenience method to update both at once."""
-        self.value = value
-        self.text_value = progress_text
-        self.update()
+        with self.update_batcher.batch("progress"):
+            self.value = value
+            self.text_value = progress_text
@@ -0,0 +1,50 @@
+import flet as ft
+
+from adaptive_labeler.runtime.latency import LatencyStats
+from adaptive_labeler.runtime.ui_loop import Scheduled, UiLoop
+from adaptive_labeler.runtime.update_batcher import UpdateBatcher
+
+
+class LatencyOverlay(ft.Column):
+    """Rolling p50/p95 per traced stage, small enough for the nav rail."""
+
+    def __init__(
+        self,
+        latency: LatencyStats,
+        refresh_interval: float = 1.0,
+        color_scheme: ft.ColorScheme | None = None,
+        update_batcher: UpdateBatcher | None = None,
+        ui_loop: UiLoop | None = None,
+    ):
+        super().__init__()
+
+        self.latency = latency
+        self.refresh_interval = refresh_interval
+        self.color_scheme = color_scheme or ft.ColorScheme()
+        self.update_batcher = update_batcher or UpdateBatcher()
+        self.ui_loop = ui_loop or UiLoop.shared()
+        self._refreshing: Scheduled | None = None
+
+        self.text = ft.Text(
+            "",
+            size=9,
+            font_family="monospace",
+            color=self.color_scheme.on_surface,
+        )
+        self.controls = [self.text]
+        self.spacing = 0
+
+    def did_mount(self):
+        self._refreshing = self.ui_loop.every(self.refresh_interval, self.refresh)
+
+    def will_unmount(self):
+        if self._refreshing:
+            self._refreshing.cancel()
+
+    def refresh(self) -> None:
+        lines = []
+        for stage, summary in sorted(self.latency.summaries().items()):
+            lines.append(stage[:12])
+            lines.append(f" {summary.p50 * 1000:.0f}/{summary.p95 * 1000:.0f}ms")
+        self.text.value = "\n".join(lines)
+        self.update_batcher.touch(self.text)
@@ -0,0 +1,38 @@
+import flet as ft
+
+from adaptive_labeler.runtime.update_batcher import UpdateBatcher
+
+
+class LoadingView(ft.Column):
+    """First paint while the label manager and the first image load."""
+
+    def __init__(
+        self,
+        status: str = "Loading…",
+        color_scheme: ft.ColorScheme | None = None,
+        update_batcher: UpdateBatcher | None = None,
+    ):
+        super().__init__()
+
+        self.color_scheme = color_scheme or ft.ColorScheme()
+        self.update_batcher = update_batcher or UpdateBatcher()
+
+        self.spinner = ft.ProgressRing(color=self.color_scheme.primary)
+        self.status = ft.Text(status, size=16, color=self.color_scheme.on_surface)
+
+        self.controls = [self.spinner, self.status]
+        self.alignment = ft.MainAxisAlignment.CENTER
+        self.horizontal_alignment = ft.CrossAxisAlignment.CENTER
+        self.expand = True
+
+    def set_status(self, status: str) -> None:
+        self.status.value = status
+        with self.update_batcher.batch("loading"):
+            self.update_batcher.touch(self.status)
+
+    def show_message(self, message: str) -> None:
+        """Stop the spinner and leave `message` on screen, e.g. on failure."""
+        self.spinner.visible = False
+        self.status.value = message
+        with self.update_batcher.batch("loading"):
+            self.update_batcher.touch(self)
@@ -1,8 +1,10 @@
 from typing import Callable, Optional
 import flet as ft
-import threading
 import time
 
+from adaptive_labeler.runtime.ui_loop import Scheduled, UiLoop
+from adaptive_labeler.runtime.update_batcher import UpdateBatcher
+
 
 class NoiseControl(ft.Column):
     DEFAULT_COLOR_SCHEME = ft.ColorScheme(
@@ -22,9 +24,13 @@ class NoiseControl(ft.Column):
         on_end_change: Optional[Callable] = None,
         color_scheme: Optional[ft.ColorScheme] = None,
         debounce_seconds: float = 0.2,
+        update_batcher: Optional[UpdateBatcher] = None,
+        ui_loop: Optional[UiLoop] = None,
     ):
         super().__init__()
         self.label = label
+        self.update_batcher = update_batcher or UpdateBatcher()
+        self.ui_loop = ui_loop or UiLoop.shared()
         self.min_val = min_val
         self.max_val = max_val
         self.step = step
@@ -51,15 +57,14 @@ class NoiseControl(ft.Column):
 
         self._debounce_seconds = debounce_seconds
         self._last_invoked = 0.0
-        self._debounce_timer = None
+        self._debounce: Optional[Scheduled] = None
 
         self._external_callback = on_end_change
 
     def set_value(self, value: float):
         self.slider.value = value
         self.value_label.value = self._format_label(value)
-        self.slider.update()
-        self.value_label.update()
+        self.update_batcher.touch(self.slider, self.value_label)
 
     def _format_label(self, value: float) -> str:
         return f"{self.label}: {round(value * 100, 2)}%"
@@ -68,23 +73,22 @@ class NoiseControl(ft.Column):
         now = time.time()
         if now - self._last_invoked >= self._debounce_seconds:
             if self._external_callback:
-                self._external_callback(None, self.label, self.slider.value)
+                with self.update_batcher.batch(f"slider:{self.label}"):
+                    self._external_callback(None, self.label, self.slider.value)
                 self._last_invoked = now
 
     def _debounced_callback(self):
-        if self._debounce_timer:
-            self._debounce_timer.cancel()
+        if self._debounce:
+            self._debounce.cancel()
 
-        # Wait debounce period then call the actual update
-        self._debounce_timer = threading.Timer(
+        # Wait debounce period then call the actual update, on the UI loop
+        self._debounce = self.ui_loop.call_later(
             self._debounce_seconds, self._invoke_callback
         )
-        self._debounce_timer.start()
 
-    def _on_slider_change(self, e: ft.ControlEvent):
+    async def _on_slider_change(self, e: ft.ControlEvent):
         value = self.slider.value
         self.value_label.value = self._format_label(value)
-        self.value_label.update()
-        self.slider.update()
+        self.update_batcher.touch(self.value_label, self.slider)
 
         self._debounced_callback()
@@ -1,48 +1,55 @@
 from typing import Callable
 import flet as ft
-from image_utils.noisy_image_maker import NoisyImageMaker
 
 
 class ReviewControls(ft.Row):
+    """The reviewed pair's label with "Change Label" and "Back to Grid"."""
+
     def __init__(
         self,
-        labeled_image_pairs: list[NoisyImageMaker],
         color_scheme: ft.ColorScheme | None,
-        on_mode_toggle: Callable,
+        on_back: Callable,
+        on_change_label: Callable,
     ):
         super().__init__()
-        self.color_scheme = color_scheme
-        self.labeled_image_pairs = labeled_image_pairs
-        self._review_index = 0
+        self.color_scheme = color_scheme or ft.ColorScheme()
 
-        label = labeled_image_pairs[0].label if labeled_image_pairs else ""
         self.label_name_text = ft.Text(
-            label,
+            "",
             size=14,
             weight=ft.FontWeight.BOLD,
-            color=color_scheme.secondary,
+            color=self.color_scheme.secondary,
             text_align=ft.TextAlign.RIGHT,
         )
+        self.position_text = ft.Text("", size=14, color=self.color_scheme.on_surface)
 
-        self.mode_toggle = ft.ElevatedButton(
-            text="Switch to Labeling",
-            on_click=on_mode_toggle,
+        self.change_label_button = ft.ElevatedButton(
+            text="Change Label",
+            icon=ft.Icons.SWAP_HORIZ,
+            on_click=on_change_label,
+        )
+        self.back_button = ft.ElevatedButton(
+            text="Back to Grid",
+            icon=ft.Icons.GRID_VIEW,
+            on_click=on_back,
         )
 
         self.controls = [
             ft.Container(
                 ft.Column(
                     [
-                        ft.Text("Label:", size=20, color=color_scheme.secondary),
+                        ft.Text("Label:", size=20, color=self.color_scheme.secondary),
                         self.label_name_text,
+                        self.position_text,
                     ],
                     alignment=ft.MainAxisAlignment.CENTER,
                 ),
                 expand=True,
             ),
-            ft.Container(self.mode_toggle, padding=10),
+            ft.Container(self.change_label_button, padding=10),
+            ft.Container(self.back_button, padding=10),
         ]
 
-    def update_label(self, label: str):
+    def update_label(self, label: str, position: str = "") -> None:
         self.label_name_text.value = label
-        self.label_name_text.update()
+        self.position_text.value = position
@@ -0,0 +1,434 @@
+from __future__ import annotations
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Awaitable, Callable
+import base64
+import math
+
+import flet as ft
+from flet.core.gesture_detector import ScrollEvent
+
+from adaptive_labeler.labels.review_cursor import ReviewCursor, ReviewRecord
+from adaptive_labeler.runtime.ui_loop import Scheduled, UiLoop
+from adaptive_labeler.runtime.update_batcher import UpdateBatcher
+
+if TYPE_CHECKING:
+    from adaptive_labeler.imaging.thumbnail_cache import ThumbnailCache
+    from adaptive_labeler.runtime.image_server import ImageServer
+
+ALL_LABELS = "all"
+
+
+class ReviewTile(ft.Container):
+    """One recycled grid cell; shows whichever record it is bound to."""
+
+    CAPTION_HEIGHT = 20
+
+    def __init__(
+        self,
+        size: int,
+        color_scheme: ft.ColorScheme,
+        on_click: Callable[[ReviewTile], Awaitable[None]],
+    ):
+        super().__init__()
+        self.index: int | None = None
+        self.record_id: int | None = None
+        self.pending: Future[bytes] | None = None
+        self._on_click = on_click
+        self._selected_border = ft.border.all(3, color_scheme.primary)
+
+        self.image = ft.Image(
+            fit=ft.ImageFit.CONTAIN,
+            gapless_playback=True,
+            border_radius=8,
+            width=size,
+            height=size,
+            visible=False,
+        )
+        self.caption = ft.Text(
+            "", size=12, color=color_scheme.on_surface, no_wrap=True, max_lines=1
+        )
+        self.content = ft.Column(
+            [
+                ft.Container(
+                    self.image,
+                    width=size,
+                    height=size,
+                    bgcolor=color_scheme.surface_container,
+                    border_radius=8,
+                ),
+                self.caption,
+            ],
+            spacing=2,
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+        )
+        self.on_click = self._clicked
+
+    def bind(self, index: int, record: ReviewRecord, color: str | None) -> None:
+        self.release()
+        self.index = index
+        self.record_id = record.record_id
+        self.show_label(record, color)
+        self.image.visible = False
+        self.visible = True
+
+    def show_label(self, record: ReviewRecord, color: str | None) -> None:
+        self.caption.value = f"{record.image_path.name} · {record.label}"
+        self.caption.color = color
+
+    def set_selected(self, selected: bool) -> None:
+        self.border = self._selected_border if selected else None
+
+    def clear(self) -> None:
+        self.release()
+        self.visible = False
+
+    def release(self) -> None:
+        """Unbind, cancelling a thumbnail request that has not started."""
+        if self.pending is not None:
+            self.pending.cancel()
+        self.pending = None
+        self.index = self.record_id = None
+
+    async def _clicked(self, e: ft.ControlEvent) -> None:
+        if self.index is not None:
+            await self._on_click(self)
+
+
+class ReviewGrid(ft.Column):
+    """
+    Thumbnail grid over every labeled pair, filterable by label.
+
+    Only the tiles that fit on screen exist: the grid keeps a fixed pool of
+    `ReviewTile`s and scrolling rebinds them to the records of the rows now
+    in view, read through the `ReviewCursor`'s pages. Thumbnails come from
+    the `ThumbnailCache`, off the loop; a tile rebound before its thumbnail
+    started cancels the request. Clicking a tile calls `on_open(index)` with
+    the record's position in the cursor.
+
+    In select mode clicks toggle tiles instead, "Select all" takes every
+    record under the current filter, and the mark buttons hand the selected
+    record ids to `on_relabel(record_ids, label)` in one call.
+    """
+
+    SPACING = 8
+    BAR_HEIGHT = 56
+    # Thumbnails arriving within this window are sent as one update.
+    FLUSH_DELAY = 0.03
+
+    def __init__(
+        self,
+        cursor: ReviewCursor,
+        thumbnails: ThumbnailCache,
+        on_open: Callable[[int], Awaitable[None]],
+        label_colors: dict[str, str] | None = None,
+        color_scheme: ft.ColorScheme | None = None,
+        update_batcher: UpdateBatcher | None = None,
+        ui_loop: UiLoop | None = None,
+        image_server: ImageServer | None = None,
+        on_relabel: Callable[[list[int], str], Awaitable[None]] | None = None,
+    ):
+        super().__init__()
+
+        self.cursor = cursor
+        self.thumbnails = thumbnails
+        self.on_open = on_open
+        self.on_relabel = on_relabel
+        self.label_colors = label_colors or {}
+        self.color_scheme = color_scheme or ft.ColorScheme()
+        self.update_batcher = update_batcher or UpdateBatcher()
+        self.ui_loop = ui_loop or UiLoop.shared()
+        self.image_server = image_server
+
+        # --- Window ---
+        self.columns = 1
+        self.rows = 1
+        self.first_row = 0
+        self.total = 0
+        self.tiles: list[ReviewTile] = []
+        self.selecting = False
+        self.selected: set[int] = set()
+        self._box: tuple[float, float] | None = None
+        self._generation = 0
+        self._arrived: dict[int, ReviewTile] = {}
+        self._flush: Scheduled | None = None
+
+        # --- UI Controls ---
+        self.label_filter = ft.Dropdown(
+            value=ALL_LABELS,
+            options=[ft.dropdown.Option(ALL_LABELS, "All labels")]
+            + [ft.dropdown.Option(label) for label in self.label_colors],
+            on_change=self._on_filter,
+            dense=True,
+            width=200,
+        )
+        self.count_text = ft.Text("", size=14, color=self.color_scheme.on_surface)
+        self.position = ft.Slider(
+            min=0, max=1, value=0, on_change=self._on_position, expand=True
+        )
+        self.select_toggle = ft.OutlinedButton(
+            "Select", icon=ft.Icons.CHECK_BOX_OUTLINED, on_click=self._on_select_toggle
+        )
+        self.selected_text = ft.Text("", size=14, color=self.color_scheme.on_surface)
+        self.selection_bar = ft.Row(
+            [
+                self.selected_text,
+                ft.TextButton("Select all", on_click=self._on_select_all),
+                ft.TextButton("Clear", on_click=self._on_clear_selection),
+            ]
+            + [
+                ft.ElevatedButton(
+                    f"Mark {label}",
+                    color=color,
+                    on_click=self._on_mark,
+                    data=label,
+                )
+                for label, color in self.label_colors.items()
+            ],
+            height=self.BAR_HEIGHT,
+            visible=False,
+        )
+        self.grid = ft.GridView(
+            runs_count=self.columns,
+            spacing=self.SPACING,
+            run_spacing=self.SPACING,
+            expand=True,
+        )
+
+        self.controls = [
+            ft.Row(
+                [
+                    self.label_filter,
+                    self.count_text,
+                    self.position,
+                    self.select_toggle,
+                ],
+                height=self.BAR_HEIGHT,
+                vertical_alignment=ft.CrossAxisAlignment.CENTER,
+            ),
+            self.selection_bar,
+            ft.GestureDetector(
+                content=self.grid, on_scroll=self._on_scroll, expand=True
+            ),
+        ]
+        self.expand = True
+        self._resize_pool()
+
+    @property
+    def tile_size(self) -> int:
+        return self.thumbnails.size
+
+    @property
+    def row_extent(self) -> int:
+        return self.tile_size + ReviewTile.CAPTION_HEIGHT + self.SPACING
+
+    # --- Public API (UI loop) ---
+
+    def fit(self, width: float, height: float) -> None:
+        """Size the tile pool to the rows and columns that fit in `width`x`height`."""
+        self._box = (width, height)
+        bars = 1 + int(self.selection_bar.visible)
+        height -= bars * self.BAR_HEIGHT
+        columns = max(int((width + self.SPACING) // (self.tile_size + self.SPACING)), 1)
+        rows = max(math.ceil(height / self.row_extent), 1)
+        if (columns, rows) != (self.columns, self.rows):
+            # Keep the first visible record in view.
+            first_index = self.first_row * self.columns
+            self.columns, self.rows = columns, rows
+            self.first_row = first_index // columns
+            self._resize_pool()
+            self.refresh()
+
+    def refresh(self) -> None:
+        """Rebind the tiles to the records now in view, e.g. after new labels."""
+        self.ui_loop.run_coroutine(self._refresh())
+
+    def scroll_to(self, row: int) -> None:
+        last_row = max(math.ceil(self.total / self.columns) - self.rows, 0)
+        row = min(max(row, 0), last_row)
+        if row != self.first_row:
+            self.first_row = row
+            self.refresh()
+
+    def scroll_by(self, rows: int) -> None:
+        self.scroll_to(self.first_row + rows)
+
+    def reveal(self, index: int) -> None:
+        """Scroll just far enough that record `index` is on screen."""
+        row = index // self.columns
+        if row < self.first_row:
+            self.scroll_to(row)
+        elif row >= self.first_row + self.rows:
+            self.scroll_to(row - self.rows + 1)
+
+    def bound_indexes(self) -> list[int]:
+        return [tile.index for tile in self.tiles if tile.index is not None]
+
+    def set_selecting(self, selecting: bool) -> None:
+        self.selecting = selecting
+        self.selection_bar.visible = selecting
+        if not selecting:
+            self.selected.clear()
+        self._show_selection()
+        if self._box:
+            self.fit(*self._box)
+
+    # --- Binding ---
+
+    async def _refresh(self) -> None:
+        self._generation += 1
+        generation = self._generation
+        first = self.first_row * self.columns
+        window = await self.ui_loop.run_blocking(
+            self._read_window, first, len(self.tiles)
+        )
+        # A newer scroll already asked for a different window.
+        if generation != self._generation:
+            return
+
+        total, records = window
+        self.total = total
+        for offset, tile in enumerate(self.tiles):
+            if offset < len(records):
+                record = records[offset]
+                if tile.record_id != record.record_id:
+                    tile.bind(
+                        first + offset, record, self.label_colors.get(record.label)
+                    )
+                    self._request_thumbnail(tile, record)
+                else:
+                    # Same record, possibly relabeled; the thumbnail stays.
+                    tile.index = first + offset
+                    tile.show_label(record, self.label_colors.get(record.label))
+            else:
+                tile.clear()
+        self._show_selection()
+        self._update_position()
+        with self.update_batcher.batch("review_grid"):
+            self.update_batcher.touch(self)
+
+    def _read_window(self, first: int, count: int) -> tuple[int, list[ReviewRecord]]:
+        """Total and the records from `first` on (worker thread)."""
+        total = len(self.cursor)
+        last = min(first + count, total)
+        return total, [self.cursor.record(index) for index in range(first, last)]
+
+    def _request_thumbnail(self, tile: ReviewTile, record: ReviewRecord) -> None:
+        future = self.thumbnails.request(record.image_path, record.render_spec)
+        tile.pending = future
+        future.add_done_callback(
+            lambda done: self.ui_loop.call_soon(
+                self._thumbnail_ready, tile, record.record_id, done
+            )
+        )
+
+    def _thumbnail_ready(
+        self, tile: ReviewTile, record_id: int, future: Future[bytes]
+    ) -> None:
+        # The tile may show another record by now.
+        if tile.record_id != record_id or future.cancelled() or future.exception():
+            return
+        data = future.result()
+        if self.image_server:
+            tile.image.src = self.image_server.publish(data, slot=tile)
+        else:
+            tile.image.src_base64 = base64.b64encode(data).decode("ascii")
+        tile.image.visible = True
+        tile.pending = None
+
+        self._arrived[id(tile)] = tile
+        if self._flush is None:
+            self._flush = self.ui_loop.call_later(
+                self.FLUSH_DELAY, self._flush_thumbnails
+            )
+
+    def _flush_thumbnails(self) -> None:
+        self._flush = None
+        tiles = [tile.image for tile in self._arrived.values()]
+        self._arrived.clear()
+        with self.update_batcher.batch("review_thumbnails"):
+            self.update_batcher.touch(*tiles)
+
+    def _resize_pool(self) -> None:
+        count = self.columns * self.rows
+        for tile in self.tiles[count:]:
+            tile.release()
+        self.tiles = self.tiles[:count] + [
+            ReviewTile(self.tile_size, self.color_scheme, self._on_tile_click)
+            for _ in range(count - len(self.tiles))
+        ]
+        self.grid.runs_count = self.columns
+        self.grid.child_aspect_ratio = self.tile_size / (
+            self.tile_size + ReviewTile.CAPTION_HEIGHT
+        )
+        self.grid.controls = self.tiles
+
+    def _update_position(self) -> None:
+        total_rows = math.ceil(self.total / self.columns)
+        last_row = max(total_rows - self.rows, 0)
+        self.position.max = max(last_row, 1)
+        self.position.value = min(self.first_row, last_row)
+        self.position.disabled = last_row == 0
+        first = self.first_row * self.columns
+        shown = min(len(self.tiles), max(self.total - first, 0))
+        self.count_text.value = (
+            f"{first + 1}–{first + shown} of {self.total}" if shown else "No labels"
+        )
+
+    def _show_selection(self) -> None:
+        for tile in self.tiles:
+            tile.set_selected(tile.record_id in self.selected)
+        self.selected_text.value = f"{len(self.selected)} selected"
+
+    # --- Events ---
+
+    async def _on_tile_click(self, tile: ReviewTile) -> None:
+        if not self.selecting:
+            await self.on_open(tile.index)
+            return
+        self.selected ^= {tile.record_id}
+        tile.set_selected(tile.record_id in self.selected)
+        self.selected_text.value = f"{len(self.selected)} selected"
+        with self.update_batcher.batch("review_select"):
+            self.update_batcher.touch(tile, self.selected_text)
+
+    async def _on_select_toggle(self, e: ft.ControlEvent) -> None:
+        self.set_selecting(not self.selecting)
+        with self.update_batcher.batch("review_select"):
+            self.update_batcher.touch(self)
+
+    async def _on_select_all(self, e: ft.ControlEvent) -> None:
+        record_ids = await self.ui_loop.run_blocking(self.cursor.record_ids)
+        self.selected = set(record_ids.tolist())
+        self._show_selection()
+        with self.update_batcher.batch("review_select"):
+            self.update_batcher.touch(self)
+
+    async def _on_clear_selection(self, e: ft.ControlEvent) -> None:
+        self.selected.clear()
+        self._show_selection()
+        with self.update_batcher.batch("review_select"):
+            self.update_batcher.touch(self)
+
+    async def _on_mark(self, e: ft.ControlEvent) -> None:
+        if not self.selected or self.on_relabel is None:
+            return
+        record_ids = sorted(self.selected)
+        self.selected.clear()
+        await self.on_relabel(record_ids, e.control.data)
+        self._show_selection()
+        self.refresh()
+
+    async def _on_scroll(self, e: ScrollEvent) -> None:
+        delta = e.scroll_delta_y or 0
+        if delta:
+            rows = max(round(abs(delta) / self.row_extent), 1)
+            self.scroll_by(rows if delta > 0 else -rows)
+
+    async def _on_position(self, e: ft.ControlEvent) -> None:
+        self.scroll_to(int(float(e.control.value)))
+
+    async def _on_filter(self, e: ft.ControlEvent) -> None:
+        value = e.control.value
+        self.cursor.set_label(None if value == ALL_LABELS else value)
+        self.first_row = 0
+        self.refresh()
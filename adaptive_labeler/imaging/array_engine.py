@@ -0,0 +1,175 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Collection, Sequence
+
+import numpy as np
+from PIL import Image as PILImage
+from PIL import ImageFilter
+from rich import print
+
+from adaptive_labeler.runtime.tracing import span
+
+if TYPE_CHECKING:
+    from image_utils.noisy_image_maker import NoisyImageMaker
+
+
+# Works in place on float32 pixels in [0, 255]; the engine clips after each op.
+ArrayKernel = Callable[[np.ndarray, float, np.random.Generator], None]
+
+# Pointwise ops are run tile by tile so every op touches a tile while it is
+# still in cache; this is the size of one tile.
+TILE_BYTES = 1024 * 1024
+# Pointwise ops draw from one generator per block of this many rows, seeded
+# from the op's seed and the block's index, so no two blocks share a stream
+# and the noise does not depend on how rows are grouped into tiles.
+BLOCK_ROWS = 64
+
+
+@dataclass(frozen=True)
+class ArrayOp:
+    name: str
+    kernel: ArrayKernel
+    # Each output pixel depends only on the same input pixel.
+    pointwise: bool = True
+
+
+# --- Kernels ---
+
+
+def _brightness(pixels: np.ndarray, severity: float, rng: np.random.Generator):
+    np.multiply(pixels, 1.0 - severity, out=pixels)
+
+
+def _contrast(pixels: np.ndarray, severity: float, rng: np.random.Generator):
+    # Pull every value towards mid-grey.
+    np.subtract(pixels, 127.5, out=pixels)
+    np.multiply(pixels, 1.0 - severity, out=pixels)
+    np.add(pixels, 127.5, out=pixels)
+
+
+def _gaussian_noise(pixels: np.ndarray, severity: float, rng: np.random.Generator):
+    noise = rng.standard_normal(pixels.shape, dtype=np.float32)
+    np.multiply(noise, 255.0 * severity, out=noise)
+    np.add(pixels, noise, out=pixels)
+
+
+def _salt_and_pepper(pixels: np.ndarray, severity: float, rng: np.random.Generator):
+    draws = rng.random(pixels.shape[:2], dtype=np.float32)
+    pixels[draws < severity / 2] = 0.0
+    pixels[draws > 1.0 - severity / 2] = 255.0
+
+
+def _box_blur(pixels: np.ndarray, severity: float, rng: np.random.Generator):
+    radius = int(round(severity * 10))
+    if radius < 1:
+        return
+    # A NumPy box filter costs several full passes per axis; Pillow's C filter
+    # is faster even with the uint8 round trip.
+    blurred = PILImage.fromarray(pixels.astype(np.uint8)).filter(
+        ImageFilter.BoxBlur(radius)
+    )
+    pixels[...] = np.asarray(blurred)
+
+
+# Named apart from the ops image_utils ships: these are their own noise
+# models, not faster versions of those.
+KERNELS: dict[str, ArrayOp] = {
+    op.name: op
+    for op in (
+        ArrayOp("array_brightness", _brightness),
+        ArrayOp("array_contrast", _contrast),
+        ArrayOp("array_gaussian_noise", _gaussian_noise),
+        ArrayOp("array_salt_and_pepper", _salt_and_pepper),
+        ArrayOp("array_box_blur", _box_blur, pointwise=False),
+    )
+}
+
+
+# --- Engine ---
+
+
+def apply_array_ops(
+    image: PILImage.Image,
+    ops: Sequence[tuple[ArrayOp, float]],
+    tile_bytes: int = TILE_BYTES,
+    numpy_rng: np.random.RandomState | None = None,
+) -> PILImage.Image:
+    """
+    Apply `ops` in order on one float32 copy of `image`.
+
+    The image is converted once on the way in and once on the way out.
+    Every op draws its generator seed from `numpy_rng`, or NumPy's global
+    generator without one, whether it runs or not, so a fused run consumes
+    the stream exactly like the same ops applied one at a time, and seeded
+    renders stay reproducible either way. The two only differ by the uint8
+    rounding the one-at-a-time path does between ops.
+    """
+    source = numpy_rng if numpy_rng is not None else np.random
+    seeded_ops = [
+        (array_op, severity, source.randint(0, 2**32)) for array_op, severity in ops
+    ]
+    active = [op for op in seeded_ops if op[1] > 0]
+    if not active:
+        return image
+
+    with span("array_ops"):
+        pixels = np.array(image, dtype=np.float32)
+        for group in _pointwise_groups(active):
+            if group[0][0].pointwise:
+                _apply_tiled(pixels, group, tile_bytes)
+            else:
+                for array_op, severity, seed in group:
+                    array_op.kernel(pixels, severity, np.random.default_rng(seed))
+                    np.clip(pixels, 0.0, 255.0, out=pixels)
+        return PILImage.fromarray(pixels.astype(np.uint8))
+
+
+def _pointwise_groups(ops: list) -> list[list]:
+    groups: list[list] = []
+    for op in ops:
+        if groups and op[0].pointwise and groups[-1][0][0].pointwise:
+            groups[-1].append(op)
+        else:
+            groups.append([op])
+    return groups
+
+
+def _apply_tiled(pixels: np.ndarray, group: list, tile_bytes: int) -> None:
+    block_bytes = max(pixels[:BLOCK_ROWS].nbytes, 1)
+    rows = max(tile_bytes // block_bytes, 1) * BLOCK_ROWS
+    for start in range(0, pixels.shape[0], rows):
+        for array_op, severity, seed in group:
+            for block_start in range(start, start + rows, BLOCK_ROWS):
+                block = pixels[block_start : block_start + BLOCK_ROWS]
+                if not len(block):
+                    break
+                rng = np.random.default_rng((seed, block_start // BLOCK_ROWS))
+                array_op.kernel(block, severity, rng)
+                np.clip(block, 0.0, 255.0, out=block)
+
+
+class ArrayNoiseFn:
+    """`NosingOperation.fn` backed by an `ArrayOp`."""
+
+    def __init__(self, array_op: ArrayOp):
+        self.array_op = array_op
+
+    def __call__(self, image: PILImage.Image, severity: float) -> PILImage.Image:
+        return apply_array_ops(image, [(self.array_op, severity)])
+
+
+def bind_array_ops(maker: NoisyImageMaker, names: Collection[str]) -> None:
+    """Add the array-engine ops named in `names` to the end of the maker's chain."""
+    if not names:
+        return
+    from image_utils.noising_operation import NosingOperation
+
+    present = {noise_op.name for noise_op in maker.noise_operations}
+    for name in names:
+        if name not in KERNELS:
+            print(f"[yellow]Unknown array noise op:[/yellow] {name}")
+        elif name not in present:
+            present.add(name)
+            maker.noise_operations.append(
+                NosingOperation(name, ArrayNoiseFn(KERNELS[name]))
+            )
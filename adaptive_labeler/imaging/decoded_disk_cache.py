@@ -0,0 +1,272 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+import itertools
+import json
+import mmap
+import os
+import threading
+
+import numpy as np
+from PIL import Image as PILImage
+from rich import print
+
+from adaptive_labeler.imaging.image_cache import CacheStats
+from adaptive_labeler.runtime.tracing import span
+
+IMAGE_SUFFIXES = frozenset({".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"})
+
+
+@dataclass
+class _Entry:
+    path: str
+    mtime_ns: int
+    size: int
+    offset: int
+    width: int
+    height: int
+
+    @property
+    def nbytes(self) -> int:
+        return self.width * self.height * 3
+
+
+def image_files(directory: str | Path) -> Iterator[Path]:
+    for path in sorted(Path(directory).rglob("*")):
+        if path.suffix.lower() in IMAGE_SUFFIXES and path.is_file():
+            yield path
+
+
+class DecodedDiskCache:
+    """
+    Decoded originals, downscaled to fit `max_size`, on disk for reuse.
+
+    Raw RGB pixels are appended to one data file that is memory-mapped for
+    reading, and `index.jsonl` maps each source to its offset and size. An
+    entry is keyed on the source's path, mtime and size, so an edited file
+    is decoded again instead of served stale. Once the data file would grow
+    past `max_bytes`, it is rewritten with the most recently used half.
+    """
+
+    DATA_NAME = "decoded.bin"
+    INDEX_NAME = "index.jsonl"
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_bytes: int = 2 * 1024**3,
+        max_size: int = 2048,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_size = max_size
+        self.stats = CacheStats()
+
+        self._entries: dict[str, _Entry] = {}
+        self._last_used: dict[str, int] = {}
+        self._clock = itertools.count()
+        self._end = 0
+        self._map: mmap.mmap | None = None
+        self._lock = threading.RLock()
+        self._warmup: ThreadPoolExecutor | None = None
+
+        self._load()
+
+    @property
+    def data_path(self) -> Path:
+        return self.directory / self.DATA_NAME
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / self.INDEX_NAME
+
+    # --- Public API ---
+
+    def array(self, path: str | Path) -> np.ndarray | None:
+        """Read-only (height, width, 3) view straight onto the mapped pixels."""
+        path = str(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or not _matches(entry, path):
+                if entry is not None:
+                    self._drop(path)
+                self.stats.misses += 1
+                return None
+            if self._map is None or entry.offset + entry.nbytes > len(self._map):
+                self._remap()
+            self._last_used[path] = next(self._clock)
+            self.stats.hits += 1
+            return np.frombuffer(
+                self._map, np.uint8, entry.nbytes, entry.offset
+            ).reshape(entry.height, entry.width, 3)
+
+    def get(self, path: str | Path) -> PILImage.Image | None:
+        pixels = self.array(path)
+        if pixels is None:
+            return None
+        with span("decoded_disk_cache.read"):
+            return PILImage.fromarray(pixels, "RGB")
+
+    def put(self, path: str | Path, image: PILImage.Image) -> None:
+        path = str(path)
+        stat = os.stat(path)
+        pixels = np.asarray(image.convert("RGB"))
+        entry = _Entry(
+            path=path,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            offset=0,
+            width=pixels.shape[1],
+            height=pixels.shape[0],
+        )
+        if entry.nbytes > self.max_bytes // 2:
+            return
+
+        with self._lock:
+            if self._end + entry.nbytes > self.max_bytes:
+                self._compact(self.max_bytes // 2 - entry.nbytes)
+            entry.offset = self._end
+            with open(self.data_path, "ab") as data:
+                data.write(pixels.tobytes())
+            with open(self.index_path, "a") as index:
+                index.write(json.dumps(asdict(entry)) + "\n")
+            self._end += entry.nbytes
+            self._index(entry)
+
+    def get_or_decode(self, path: str | Path) -> PILImage.Image:
+        image = self.get(path)
+        if image is None:
+            image = self._decode(path)
+            self.put(path, image)
+        return image
+
+    def warm(self, paths: Iterable[str | Path], workers: int = 2) -> None:
+        """Decode every source not cached yet, in the background, until full."""
+        with self._lock:
+            if self._warmup is None:
+                self._warmup = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="decoded-warmup"
+                )
+            warmup = self._warmup
+        warmup.submit(self._warm, list(paths))
+
+    def bytes_used(self) -> int:
+        return self._end
+
+    def close(self) -> None:
+        with self._lock:
+            warmup, self._warmup = self._warmup, None
+        if warmup:
+            warmup.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._close_map()
+
+    # --- Internals ---
+
+    def _warm(self, paths: list[str | Path]) -> None:
+        for path in paths:
+            with self._lock:
+                if self._warmup is None or self._end > self.max_bytes * 0.9:
+                    return
+                entry = self._entries.get(str(path))
+            if entry is not None and _matches(entry, str(path)):
+                continue
+            try:
+                self.put(path, self._decode(path))
+            except Exception as error:
+                print(f"[red]Failed to warm decoded cache:[/red] {path}: {error}")
+
+    def _decode(self, path: str | Path) -> PILImage.Image:
+        with span("decode"), PILImage.open(path) as source:
+            image = source.convert("RGB")
+        image.thumbnail((self.max_size, self.max_size))
+        return image
+
+    def _index(self, entry: _Entry) -> None:
+        previous = self._entries.get(entry.path)
+        if previous is not None:
+            self.stats.bytes_used -= previous.nbytes
+        self._entries[entry.path] = entry
+        self._last_used[entry.path] = next(self._clock)
+        self.stats.bytes_used += entry.nbytes
+        self.stats.entries = len(self._entries)
+
+    def _drop(self, path: str) -> None:
+        entry = self._entries.pop(path)
+        self._last_used.pop(path, None)
+        self.stats.bytes_used -= entry.nbytes
+        self.stats.entries = len(self._entries)
+
+    def _load(self) -> None:
+        end = self.data_path.stat().st_size if self.data_path.exists() else 0
+        if self.index_path.exists():
+            for line in self.index_path.read_text().splitlines():
+                try:
+                    entry = _Entry(**json.loads(line))
+                except (json.JSONDecodeError, TypeError):
+                    continue  # torn last line
+                # Pixels that never fully reached the data file.
+                if entry.offset + entry.nbytes <= end:
+                    self._index(entry)
+        self._end = end
+
+    def _compact(self, keep_bytes: int) -> None:
+        """Rewrite the data file with the most recently used live entries."""
+        with span("decoded_disk_cache.compact"):
+            self._remap()
+            kept: list[_Entry] = []
+            total = 0
+            for path in sorted(self._entries, key=self._last_used.get, reverse=True):
+                entry = self._entries[path]
+                if total + entry.nbytes > keep_bytes or not _matches(entry, path):
+                    continue
+                kept.append(entry)
+                total += entry.nbytes
+
+            data_tmp = self.data_path.with_suffix(".tmp")
+            index_tmp = self.index_path.with_suffix(".tmp")
+            offset = 0
+            with open(data_tmp, "wb") as data, open(index_tmp, "w") as index:
+                for entry in kept:
+                    data.write(self._map[entry.offset : entry.offset + entry.nbytes])
+                    entry.offset = offset
+                    offset += entry.nbytes
+                    index.write(json.dumps(asdict(entry)) + "\n")
+            # Images already read keep the old file mapped until they are gone.
+            self._close_map()
+            os.replace(data_tmp, self.data_path)
+            os.replace(index_tmp, self.index_path)
+
+            evicted = len(self._entries) - len(kept)
+            self._entries.clear()
+            self._last_used.clear()
+            self.stats.bytes_used = 0
+            for entry in reversed(kept):
+                self._index(entry)
+            self.stats.evictions += evicted
+            self._end = offset
+
+    def _remap(self) -> None:
+        self._close_map()
+        if self.data_path.exists() and self.data_path.stat().st_size:
+            with open(self.data_path, "rb") as data:
+                self._map = mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _close_map(self) -> None:
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # arrays still point into it; it goes when they do
+            self._map = None
+
+
+def _matches(entry: _Entry, path: str) -> bool:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return stat.st_mtime_ns == entry.mtime_ns and stat.st_size == entry.size
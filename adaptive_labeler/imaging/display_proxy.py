@@ -0,0 +1,66 @@
+from __future__ import annotations
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING
+
+from PIL import Image as PILImage
+
+from adaptive_labeler.imaging.image_cache import (
+    ImageCache,
+    Size,
+    decode_base64,
+    encode_base64,
+)
+
+if TYPE_CHECKING:
+    from image_utils.image_path import ImagePath
+
+
+@dataclass(frozen=True)
+class DisplayProxy:
+    """
+    Resizes images to the box they are shown in before they go over the wire.
+
+    Only what is sent to Flet is affected; labels and recorded noise
+    parameters keep referring to the full-resolution source.
+    """
+
+    box_width: int = 1024
+    box_height: int = 1024
+    pixel_ratio: float = 2.0
+    format: str = "JPEG"
+    quality: int = 85
+
+    MIN_BOX = 64
+
+    @property
+    def target_size(self) -> Size:
+        return (
+            max(int(self.box_width * self.pixel_ratio), self.MIN_BOX),
+            max(int(self.box_height * self.pixel_ratio), self.MIN_BOX),
+        )
+
+    def fit(self, box_width: float, box_height: float) -> DisplayProxy:
+        """Proxy for a new viewer box, e.g. after the window was resized."""
+        return replace(
+            self,
+            box_width=max(int(box_width), self.MIN_BOX),
+            box_height=max(int(box_height), self.MIN_BOX),
+        )
+
+    def original_base64(
+        self, image_path: ImagePath, cache: ImageCache | None = None
+    ) -> str:
+        cache = cache or ImageCache.shared()
+        return cache.original_base64(
+            image_path, self.target_size, self.format, self.quality
+        )
+
+    def encode(self, image: PILImage.Image) -> str:
+        if image.width > self.target_size[0] or image.height > self.target_size[1]:
+            image = image.copy()
+            image.thumbnail(self.target_size)
+        return encode_base64(image, self.format, self.quality)
+
+    def from_base64(self, encoded: str) -> str:
+        """Re-encode a full-resolution base64 image as a display proxy."""
+        return self.encode(decode_base64(encoded))
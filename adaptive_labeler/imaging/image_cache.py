@@ -0,0 +1,219 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Hashable
+import base64
+import os
+import threading
+
+from PIL import Image as PILImage
+
+from adaptive_labeler.runtime.tracing import span
+
+if TYPE_CHECKING:
+    from image_utils.image_path import ImagePath
+
+    from adaptive_labeler.imaging.decoded_disk_cache import DecodedDiskCache
+
+
+Size = tuple[int, int]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes_used: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ByteBudgetLRU:
+    """Thread-safe LRU mapping that evicts once the stored bytes exceed a budget."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, nbytes: int) -> None:
+        with self._lock:
+            if key in self._entries:
+                self.stats.bytes_used -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                # Never let one oversized item flush everything else out.
+                self.stats.entries = len(self._entries)
+                return
+            self._entries[key] = (value, nbytes)
+            self.stats.bytes_used += nbytes
+            self._evict()
+
+    def get_or_create(
+        self, key: Hashable, factory: Callable[[], tuple[Any, int]]
+    ) -> Any:
+        value = self.get(key)
+        if value is None:
+            value, nbytes = factory()
+            self.put(key, value, nbytes)
+        return value
+
+    def set_budget(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.stats.bytes_used = 0
+            self.stats.entries = 0
+
+    def _evict(self) -> None:
+        while self.stats.bytes_used > self.max_bytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.stats.bytes_used -= nbytes
+            self.stats.evictions += 1
+        self.stats.entries = len(self._entries)
+
+
+def image_file(image_path: ImagePath | Path) -> Path:
+    return Path(getattr(image_path, "path", image_path))
+
+
+def image_nbytes(image: PILImage.Image) -> int:
+    return image.width * image.height * len(image.getbands())
+
+
+def encode_base64(
+    image: PILImage.Image, format: str = "JPEG", quality: int = 90
+) -> str:
+    buffer = BytesIO()
+    with span("encode"):
+        image.save(buffer, format=format, quality=quality)
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def decode_base64(encoded: str) -> PILImage.Image:
+    with PILImage.open(BytesIO(base64.b64decode(encoded))) as source:
+        return source.convert("RGB")
+
+
+class ImageCache:
+    """
+    Process-wide cache of encoded originals and decoded source images.
+
+    Entries are keyed on the file path, its mtime and the requested target
+    size, so an edited file on disk is never served stale.
+    """
+
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+    _shared: ImageCache | None = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        disk: DecodedDiskCache | None = None,
+    ):
+        self._lru = ByteBudgetLRU(max_bytes)
+        # Decoded display-resolution originals kept on disk across sessions.
+        self.disk = disk
+
+    @classmethod
+    def shared(cls) -> ImageCache:
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._lru.stats
+
+    def set_budget(self, max_bytes: int) -> None:
+        self._lru.set_budget(max_bytes)
+
+    def clear(self) -> None:
+        self._lru.clear()
+
+    def original_base64(
+        self,
+        image_path: ImagePath,
+        target_size: Size | None = None,
+        format: str = "JPEG",
+        quality: int = 90,
+    ) -> str:
+        """Base64 of the original, re-encoded at `target_size` when one is given."""
+
+        def load() -> tuple[str, int]:
+            if target_size is None:
+                with span("load_as_base64"):
+                    encoded = image_path.load_as_base64()
+            else:
+                image = self.decoded(image_path, target_size)
+                encoded = encode_base64(image, format, quality)
+            return encoded, len(encoded)
+
+        key = self._key("base64", image_path, target_size)
+        if target_size is not None:
+            key += (format, quality)
+        return self._lru.get_or_create(key, load)
+
+    def decoded(
+        self, image_path: ImagePath, target_size: Size | None = None
+    ) -> PILImage.Image:
+        """
+        Decoded RGB image, downscaled to fit `target_size` when one is given.
+
+        The returned image is shared between callers and must not be mutated.
+        """
+
+        def load() -> tuple[PILImage.Image, int]:
+            disk = self.disk
+            if (
+                disk is not None
+                and target_size is not None
+                and max(target_size) <= disk.max_size
+            ):
+                image = disk.get_or_decode(image_file(image_path))
+                image.thumbnail(target_size)
+            else:
+                with span("decode"), PILImage.open(image_file(image_path)) as source:
+                    image = source.convert("RGB")
+                    if target_size is not None:
+                        image.thumbnail(target_size)
+            return image, image_nbytes(image)
+
+        return self._lru.get_or_create(
+            self._key("decoded", image_path, target_size), load
+        )
+
+    @staticmethod
+    def _key(kind: str, image_path: ImagePath, target_size: Size | None) -> tuple:
+        path = image_file(image_path)
+        return (kind, str(path), os.stat(path).st_mtime_ns, target_size)
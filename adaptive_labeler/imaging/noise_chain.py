@@ -0,0 +1,358 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Iterator, Sequence
+import copy
+import random
+import threading
+
+import numpy as np
+from PIL import Image as PILImage
+
+from adaptive_labeler.imaging.array_engine import ArrayNoiseFn, apply_array_ops
+from adaptive_labeler.imaging.image_cache import ByteBudgetLRU, image_nbytes
+from adaptive_labeler.runtime.tracing import span
+
+if TYPE_CHECKING:
+    from image_utils.noising_operation import NosingOperation
+    from image_utils.noisy_image_maker import NoisyImageMaker
+
+
+class RenderFidelityError(ValueError):
+    """Raised when two renders that should match were made from different specs."""
+
+
+@dataclass(frozen=True)
+class RenderSpec:
+    """Everything that determines a noisy render: per-op severities and the seed."""
+
+    severities: tuple[tuple[str, float], ...]
+    seed: int
+
+    @classmethod
+    def from_maker(cls, maker: NoisyImageMaker, seed: int) -> RenderSpec:
+        return cls(
+            severities=tuple(
+                (noise_op.name, float(noise_op.severity or 0.0))
+                for noise_op in maker.noise_operations
+            ),
+            seed=seed,
+        )
+
+    def severity_of(self, name: str) -> float:
+        return dict(self.severities).get(name, 0.0)
+
+    def verify_matches(self, other: RenderSpec) -> None:
+        if self != other:
+            raise RenderFidelityError(
+                f"Render specs differ: {self} != {other}. "
+                "The full-resolution render would not match the preview."
+            )
+
+
+def maker_at(maker: NoisyImageMaker, spec: RenderSpec) -> NoisyImageMaker:
+    """
+    A copy of `maker` with its own noise ops, set to the severities in `spec`.
+
+    It can be rendered from another thread while the original keeps
+    following the sliders.
+    """
+    snapshot = copy.copy(maker)
+    snapshot.noise_operations = [copy.copy(op) for op in maker.noise_operations]
+    for noise_op in snapshot.noise_operations:
+        noise_op.severity = spec.severity_of(noise_op.name)
+    return snapshot
+
+
+class _GeneratorLock:
+    """
+    Reentrant lock on the global `random` and NumPy generators.
+
+    A waiting foreground thread goes before waiting background ones, so a
+    slider render is not queued behind prefetch or thumbnail work.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._owner: int | None = None
+        self._depth = 0
+        self._foreground_waiting = 0
+
+    def __enter__(self) -> None:
+        me = threading.get_ident()
+        foreground = not getattr(_thread_role, "background", False)
+        with self._condition:
+            if self._owner == me:
+                self._depth += 1
+                return
+            self._foreground_waiting += foreground
+            try:
+                self._condition.wait_for(
+                    lambda: self._owner is None
+                    and (foreground or not self._foreground_waiting)
+                )
+            finally:
+                self._foreground_waiting -= foreground
+            self._owner, self._depth = me, 1
+
+    def __exit__(self, *exc_info) -> None:
+        with self._condition:
+            self._depth -= 1
+            if not self._depth:
+                self._owner = None
+                self._condition.notify_all()
+
+
+_thread_role = threading.local()
+_rng_lock = _GeneratorLock()
+
+
+def mark_background() -> None:
+    """Executor initializer: this thread's renders yield to foreground ones."""
+    _thread_role.background = True
+
+
+class ChainGenerators:
+    """
+    A render's own `random` and NumPy generators.
+
+    They are seeded exactly like `seeded()` seeds the global ones, so a
+    chain draws the same numbers whichever it uses. Array-engine ops draw
+    from these directly. Ops from `image_utils` only take `(image,
+    severity)` and draw from the global generators, so they run under
+    `global_generators()`, one op at a time.
+    """
+
+    def __init__(self, seed: int):
+        self.random = random.Random(seed)
+        self.numpy = np.random.RandomState(seed % 2**32)
+
+    def state(self) -> tuple:
+        return self.random.getstate(), self.numpy.get_state()
+
+    def set_state(self, state: tuple) -> None:
+        self.random.setstate(state[0])
+        self.numpy.set_state(state[1])
+
+
+@contextmanager
+def seeded(seed: int) -> Iterator[None]:
+    """
+    Seed the global `random` and NumPy generators for the duration of a block.
+
+    For external code that only draws from the global generators, such as a
+    maker's own render or `LabelWriter`; the lock is held for the whole
+    block and the previous generator state is restored afterwards.
+    """
+    with _rng_lock:
+        random_state = random.getstate()
+        numpy_state = np.random.get_state()
+        random.seed(seed)
+        np.random.seed(seed % 2**32)
+        try:
+            yield
+        finally:
+            random.setstate(random_state)
+            np.random.set_state(numpy_state)
+
+
+@contextmanager
+def global_generators(generators: ChainGenerators) -> Iterator[None]:
+    """Load `generators` into the global ones for a block, then save them back."""
+    with _rng_lock:
+        saved = random.getstate(), np.random.get_state()
+        random.setstate(generators.random.getstate())
+        np.random.set_state(generators.numpy.get_state())
+        try:
+            yield
+        finally:
+            generators.set_state((random.getstate(), np.random.get_state()))
+            random.setstate(saved[0])
+            np.random.set_state(saved[1])
+
+
+def new_seed() -> int:
+    return random.SystemRandom().getrandbits(32)
+
+
+def split_master_severity(
+    total: float, names: Sequence[str], seed: int | None = None
+) -> dict[str, float]:
+    """
+    Split a master severity across the ops in `names` with random weights.
+
+    With a seed the split only depends on the seed and `total`, so the same
+    master value always maps to the same severity vector.
+    """
+    if not names or total <= 0:
+        return {name: 0.0 for name in names}
+    rng = random.Random(f"{seed}:{total:.3f}") if seed is not None else random
+    weights = [rng.random() for _ in names]
+    total_weight = sum(weights)
+    return {
+        name: round(total * weight / total_weight, 3)
+        for name, weight in zip(names, weights)
+    }
+
+
+@dataclass
+class PrefixCacheStats:
+    steps_reused: int = 0
+    steps_run: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of chain steps served from the cache instead of run."""
+        steps = self.steps_reused + self.steps_run
+        return self.steps_reused / steps if steps else 0.0
+
+
+class NoiseChainCache:
+    """
+    Intermediate outputs of `render_chain`, keyed on the source and the steps so far.
+
+    Each entry holds the image after a step together with the generator
+    state the step left behind, so a render that only changes op k resumes
+    from the output of the ops before it and still draws the same noise as
+    a render from scratch. Entries are kept up to `max_bytes`, least
+    recently used first out.
+    """
+
+    # Python and NumPy generator states stored with every entry.
+    RNG_STATE_BYTES = 8 * 1024
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024):
+        self.stats = PrefixCacheStats()
+        self._lru = ByteBudgetLRU(max_bytes)
+
+    @property
+    def bytes_used(self) -> int:
+        return self._lru.stats.bytes_used
+
+    @property
+    def evictions(self) -> int:
+        return self._lru.stats.evictions
+
+    def longest_prefix(self, keys: Sequence[Hashable]) -> tuple[int, Any]:
+        """Number of leading steps cached for `keys`, and the entry after them."""
+        for steps in range(len(keys), 0, -1):
+            if keys[steps - 1] in self._lru:
+                entry = self._lru.get(keys[steps - 1])
+                if entry is not None:
+                    return steps, entry
+        return 0, None
+
+    def put(self, key: Hashable, image: PILImage.Image, rng_state: Any) -> None:
+        self._lru.put(
+            key, (image, rng_state), image_nbytes(image) + self.RNG_STATE_BYTES
+        )
+
+    def clear(self) -> None:
+        self._lru.clear()
+
+
+def apply_noise_operation(
+    noise_op: NosingOperation, image: PILImage.Image, severity: float
+) -> PILImage.Image:
+    return noise_op.fn(image, severity)
+
+
+def render_chain(
+    image: PILImage.Image,
+    noise_operations: Sequence[NosingOperation],
+    spec: RenderSpec,
+    cache: NoiseChainCache | None = None,
+    source_key: Hashable | None = None,
+) -> PILImage.Image:
+    """
+    Apply `noise_operations` in order at the severities and seed in `spec`.
+
+    Every op runs, at zero severity too, so the chain draws the same random
+    numbers as the maker's own render of it. Runs of consecutive array-engine ops
+    are fused into one conversion to and from NumPy instead of a round trip
+    per op. With a `cache` and a `source_key` naming the input image, the
+    longest already rendered prefix of steps is reused.
+    """
+    steps = _chain_steps(noise_operations, spec)
+    keys: list[Hashable] = []
+    if cache is not None and source_key is not None:
+        signature: tuple = ()
+        for step_signature, _, _ in steps:
+            signature += (step_signature,)
+            keys.append((source_key, spec.seed, signature))
+
+    generators = ChainGenerators(spec.seed)
+    with span("noise"):
+        start = 0
+        if keys:
+            start, entry = cache.longest_prefix(keys)
+            if entry is not None:
+                cached, rng_state = entry
+                # Operations may work in place, so never hand them the cached image.
+                image = cached.copy()
+                generators.set_state(rng_state)
+        for index in range(start, len(steps)):
+            _, apply, uses_globals = steps[index]
+            if uses_globals:
+                with global_generators(generators):
+                    image = apply(image, generators)
+            else:
+                image = apply(image, generators)
+            if keys:
+                cache.put(keys[index], image.copy(), generators.state())
+        if keys:
+            cache.stats.steps_reused += start
+            cache.stats.steps_run += len(steps) - start
+    return image
+
+
+# (signature, apply, uses_globals)
+ChainStep = tuple[
+    Hashable, Callable[[PILImage.Image, ChainGenerators], PILImage.Image], bool
+]
+
+
+def _chain_steps(
+    noise_operations: Sequence[NosingOperation], spec: RenderSpec
+) -> list[ChainStep]:
+    """
+    The chain as (signature, apply, uses_globals) steps, one per op or per
+    fused array run; only external ops need the global generators.
+    """
+    steps: list = []
+    fused: list = []
+
+    def flush_fused() -> None:
+        if fused:
+            run = list(fused)
+            signature = ("array",) + tuple((op.name, sev) for op, sev in run)
+            steps.append(
+                (
+                    signature,
+                    lambda image, generators: apply_array_ops(
+                        image, run, numpy_rng=generators.numpy
+                    ),
+                    False,
+                )
+            )
+            fused.clear()
+
+    for noise_op in noise_operations:
+        # Not skipped at zero: the op may still draw from the generators, and
+        # `apply_array_ops` draws every op's seed whether it runs or not.
+        severity = spec.severity_of(noise_op.name)
+        if isinstance(noise_op.fn, ArrayNoiseFn):
+            fused.append((noise_op.fn.array_op, severity))
+            continue
+        flush_fused()
+        steps.append(
+            (
+                (noise_op.name, severity),
+                lambda image, generators, op=noise_op, sev=severity: (
+                    apply_noise_operation(op, image, sev)
+                ),
+                True,
+            )
+        )
+    flush_fused()
+    return steps
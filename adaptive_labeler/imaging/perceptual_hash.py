@@ -0,0 +1,162 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Hashable, Iterable
+import math
+
+import numpy as np
+from PIL import Image as PILImage
+from rich import print
+
+# Side of the grayscale image every hash is computed from.
+HASH_INPUT = 32
+HASH_BITS = 64
+
+
+@dataclass(frozen=True)
+class ImageHashes:
+    """Average, difference and DCT hashes of one image, as 64-bit ints."""
+
+    ahash: int
+    dhash: int
+    phash: int
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def load_gray(file: str | Path, size: int = HASH_INPUT) -> np.ndarray:
+    """`file` as a size x size float32 grayscale array."""
+    with PILImage.open(file) as image:
+        # JPEGs decode straight to a fraction of their size.
+        image.draft("L", (size * 2, size * 2))
+        gray = image.convert("L").resize((size, size), PILImage.Resampling.BOX)
+    return np.asarray(gray, dtype=np.float32)
+
+
+def hash_pixels(pixels: np.ndarray) -> np.ndarray:
+    """
+    aHash, dHash and pHash of a batch of grayscale images.
+
+    `pixels` is (N, 32, 32); the result is (N, 3) uint64. Every step is a
+    batched matrix product: the 8x8 and 8x9 downscales for aHash and dHash
+    are box filters, and pHash takes the 8x8 lowest frequencies of a 2D
+    DCT-II, thresholded at their median without the DC term.
+    """
+    pixels = np.asarray(pixels, dtype=np.float64)
+    rows8 = _box_matrix(8, HASH_INPUT)
+
+    small = rows8 @ pixels @ rows8.T
+    ahash = small.reshape(len(pixels), -1)
+    ahash = ahash > ahash.mean(axis=1, keepdims=True)
+
+    wide = rows8 @ pixels @ _box_matrix(9, HASH_INPUT).T
+    dhash = (wide[:, :, 1:] > wide[:, :, :-1]).reshape(len(pixels), -1)
+
+    dct = _dct_matrix(HASH_INPUT)
+    low = (dct @ pixels @ dct.T)[:, :8, :8].reshape(len(pixels), -1)
+    phash = low > np.median(low[:, 1:], axis=1, keepdims=True)
+
+    return np.stack([_pack(ahash), _pack(dhash), _pack(phash)], axis=1)
+
+
+def hash_files(files: Iterable[str | Path]) -> list[ImageHashes | None]:
+    """Hashes of each file, None for files that cannot be decoded."""
+    arrays: list[np.ndarray | None] = []
+    for file in files:
+        try:
+            arrays.append(load_gray(file))
+        except (OSError, PILImage.UnidentifiedImageError) as error:
+            print(f"[yellow]Could not hash {file}:[/yellow] {error}")
+            arrays.append(None)
+
+    decoded = [array for array in arrays if array is not None]
+    hashes = iter(hash_pixels(np.stack(decoded)).tolist() if decoded else [])
+    return [
+        ImageHashes(*next(hashes)) if array is not None else None for array in arrays
+    ]
+
+
+class HammingIndex:
+    """
+    Multi-index hash table of 64-bit hashes, searched by Hamming distance.
+
+    Each hash is cut into `max_distance + 1` chunks with a table per chunk.
+    Two hashes within `max_distance` bits of each other agree exactly on at
+    least one chunk, so a search compares the query only against hashes
+    sharing one of its buckets instead of against every hash.
+    """
+
+    def __init__(self, max_distance: int):
+        self.max_distance = max_distance
+        chunks = min(max_distance + 1, HASH_BITS)
+        widths = [HASH_BITS // chunks + (i < HASH_BITS % chunks) for i in range(chunks)]
+        shifts = [sum(widths[:i]) for i in range(chunks)]
+        self._chunks = [
+            (shift, (1 << width) - 1) for shift, width in zip(shifts, widths)
+        ]
+        self._tables: list[dict[int, set[Hashable]]] = [{} for _ in self._chunks]
+        self._hashes: dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._hashes
+
+    def add(self, item: Hashable, value: int) -> None:
+        self.remove(item)
+        self._hashes[item] = value
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            table.setdefault((value >> shift) & mask, set()).add(item)
+
+    def remove(self, item: Hashable) -> None:
+        value = self._hashes.pop(item, None)
+        if value is None:
+            return
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            bucket = table[(value >> shift) & mask]
+            bucket.discard(item)
+            if not bucket:
+                del table[(value >> shift) & mask]
+
+    def search(self, value: int) -> list[tuple[Hashable, int]]:
+        """Items within `max_distance` bits of `value`, with their distances."""
+        candidates: set[Hashable] = set()
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            candidates.update(table.get((value >> shift) & mask, ()))
+        matches = []
+        for item in candidates:
+            distance = hamming(value, self._hashes[item])
+            if distance <= self.max_distance:
+                matches.append((item, distance))
+        return matches
+
+
+# --- Internals ---
+
+
+def _pack(bits: np.ndarray) -> np.ndarray:
+    # Row-major bits, most significant first.
+    return np.packbits(bits, axis=1).view(">u8").astype(np.uint64).ravel()
+
+
+def _box_matrix(size: int, source: int) -> np.ndarray:
+    """(size, source) weights averaging `source` samples into `size` boxes."""
+    matrix = np.zeros((size, source))
+    scale = source / size
+    for row in range(size):
+        start, end = row * scale, (row + 1) * scale
+        for column in range(math.floor(start), math.ceil(end)):
+            matrix[row, column] = min(end, column + 1) - max(start, column)
+    return matrix / scale
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix, so `C @ X @ C.T` is the 2D transform."""
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * math.sqrt(2 / size)
+    matrix[0] /= math.sqrt(2)
+    return matrix
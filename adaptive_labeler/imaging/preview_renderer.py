@@ -0,0 +1,57 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import TYPE_CHECKING, Sequence
+
+from PIL import Image as PILImage
+
+from adaptive_labeler.imaging.image_cache import ImageCache, Size
+from adaptive_labeler.imaging.noise_chain import (
+    NoiseChainCache,
+    RenderSpec,
+    render_chain,
+)
+from adaptive_labeler.imaging.render_cache import content_hash
+
+if TYPE_CHECKING:
+    from image_utils.image_path import ImagePath
+    from image_utils.noising_operation import NosingOperation
+    from image_utils.noisy_image_maker import NoisyImageMaker
+
+
+class PreviewRenderer:
+    """
+    Runs the noise chain on a cached, downsampled copy of the original.
+
+    Used for interactive slider feedback. The full-resolution render happens
+    once, when the label is recorded, from the same RenderSpec. With a
+    `prefix_cache`, moving one op's slider only re-runs the ops after it.
+    """
+
+    def __init__(
+        self,
+        preview_size: Size,
+        image_cache: ImageCache | None = None,
+        prefix_cache: NoiseChainCache | None = None,
+    ):
+        self.preview_size = preview_size
+        self.image_cache = image_cache or ImageCache.shared()
+        self.prefix_cache = prefix_cache
+
+    def render(self, maker: NoisyImageMaker, spec: RenderSpec) -> PILImage.Image:
+        return self.render_file(maker.image_path, maker.noise_operations, spec)
+
+    def render_file(
+        self,
+        image_path: ImagePath | Path,
+        noise_operations: Sequence[NosingOperation],
+        spec: RenderSpec,
+    ) -> PILImage.Image:
+        """Render `spec` for any image, e.g. a recorded label under review."""
+        source = self.image_cache.decoded(image_path, self.preview_size)
+        source_key = None
+        if self.prefix_cache is not None:
+            source_key = (content_hash(image_path), source.size)
+        # Operations may work in place, so never hand them the cached image.
+        return render_chain(
+            source.copy(), noise_operations, spec, self.prefix_cache, source_key
+        )
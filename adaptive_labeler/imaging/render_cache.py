@@ -0,0 +1,100 @@
+from __future__ import annotations
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Hashable
+import hashlib
+import os
+
+from adaptive_labeler.imaging.image_cache import (
+    ByteBudgetLRU,
+    CacheStats,
+    Size,
+    image_file,
+)
+from adaptive_labeler.imaging.noise_chain import RenderSpec
+
+if TYPE_CHECKING:
+    from image_utils.image_path import ImagePath
+
+    from adaptive_labeler.pipeline.pregeneration import PregeneratedPool
+
+
+@lru_cache(maxsize=4096)
+def _hash_file(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        while chunk := file.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def severity_key(spec: RenderSpec) -> tuple[tuple[str, float], ...]:
+    """Ops left at zero do not change the render, whichever order they come in."""
+    return tuple(sorted((name, s) for name, s in spec.severities if s))
+
+
+def content_hash(image_path: ImagePath | Path) -> str:
+    """Hash of the file's bytes, computed once per path, mtime and size."""
+    path = image_file(image_path)
+    stat = os.stat(path)
+    return _hash_file(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+class RenderCache:
+    """
+    Encoded noisy renders keyed on (image content hash, severities, seed).
+
+    Renders are deterministic for a given key, so going back to an earlier
+    slider state, undoing a label or reviewing it later is a lookup instead
+    of another pass through the noise chain. `variant` separates renders of
+    the same spec at different sizes or encodings.
+    """
+
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        pregenerated: PregeneratedPool | None = None,
+    ):
+        self._lru = ByteBudgetLRU(max_bytes)
+        # Disk tier filled ahead of time by a `PregenerationJob`.
+        self.pregenerated = pregenerated
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._lru.stats
+
+    def set_budget(self, max_bytes: int) -> None:
+        self._lru.set_budget(max_bytes)
+
+    def get_or_render(
+        self,
+        image_path: ImagePath | Path,
+        spec: RenderSpec,
+        variant: Hashable,
+        render: Callable[[], str],
+        adapt: Callable[[str], str] | None = None,
+        source_size: Callable[[], Size] | None = None,
+    ) -> str:
+        """
+        Cached render of `spec`, else a pre-generated one passed through
+        `adapt` (e.g. to fit the display), else `render()`.
+
+        Pre-generated renders are only used when `source_size` is given and
+        they were noised at the size it returns, the size `render()` noises at.
+        """
+        digest = content_hash(image_path)
+        key = (digest, severity_key(spec), spec.seed, variant)
+
+        def create() -> tuple[str, int]:
+            encoded = None
+            if self.pregenerated is not None and source_size is not None:
+                encoded = self.pregenerated.load_base64(digest, spec, source_size())
+            if encoded is not None and adapt is not None:
+                encoded = adapt(encoded)
+            if encoded is None:
+                encoded = render()
+            return encoded, len(encoded)
+
+        return self._lru.get_or_create(key, create)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+import hashlib
+import io
+import os
+import threading
+
+from PIL import Image as PILImage
+from rich import print
+
+from adaptive_labeler.imaging.noise_chain import RenderSpec, mark_background
+from adaptive_labeler.imaging.render_cache import content_hash, severity_key
+from adaptive_labeler.runtime.tracing import span
+
+if TYPE_CHECKING:
+    from image_utils.image_path import ImagePath
+
+
+@dataclass
+class ThumbnailStats:
+    disk_hits: int = 0
+    rendered: int = 0
+    failed: int = 0
+    cancelled: int = 0
+
+
+class ThumbnailCache:
+    """
+    JPEG thumbnails of labeled renders, persisted under `directory`.
+
+    A thumbnail is keyed like the render cache, on the image's content hash,
+    its severities and seed, plus the thumbnail size, so each one is rendered
+    once and then read back from disk in every later session. `request()`
+    returns at once and renders misses on a pool of `workers`; a request
+    that has not started yet can be cancelled, e.g. for a tile scrolled out
+    of view. Files fan out over 256 subdirectories, and `close()` trims the
+    least recently used ones down to `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        render: Callable[[ImagePath | Path, RenderSpec], PILImage.Image],
+        size: int = 160,
+        workers: int | None = None,
+        max_bytes: int = 512 * 1024**2,
+        quality: int = 80,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.render = render
+        self.size = size
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self.stats = ThumbnailStats()
+
+        self._pending: dict[str, Future[bytes]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or os.cpu_count() or 4,
+            thread_name_prefix="thumbnail",
+            initializer=mark_background,
+        )
+
+    def key(self, image_path: ImagePath | Path, spec: RenderSpec) -> str:
+        identity = repr(
+            (content_hash(image_path), severity_key(spec), spec.seed, self.size)
+        )
+        return hashlib.blake2b(identity.encode(), digest_size=16).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.jpg"
+
+    def get(self, image_path: ImagePath | Path, spec: RenderSpec) -> bytes | None:
+        """The stored thumbnail, or None if it has not been rendered yet."""
+        return self._read(self.path_for(self.key(image_path, spec)))
+
+    def request(self, image_path: ImagePath | Path, spec: RenderSpec) -> Future[bytes]:
+        """Encoded JPEG thumbnail for `spec`, from disk or rendered on a worker."""
+        pending_key = self._pending_key(image_path, spec)
+        with self._lock:
+            future = self._pending.get(pending_key)
+            if future is not None and not future.cancelled():
+                return future
+            future = self._executor.submit(self._load, image_path, spec)
+            self._pending[pending_key] = future
+        future.add_done_callback(lambda done: self._settle(pending_key, done))
+        return future
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.trim()
+
+    def trim(self) -> int:
+        """Delete least recently used thumbnails beyond `max_bytes`; returns how many."""
+        files = []
+        for path in self.directory.glob("*/*.jpg"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    # --- Internals ---
+
+    @staticmethod
+    def _pending_key(image_path: ImagePath | Path, spec: RenderSpec) -> tuple:
+        # Cheaper than `key()`, which hashes the file; only has to be unique
+        # among in-flight requests.
+        return (str(image_path), severity_key(spec), spec.seed)
+
+    def _settle(self, pending_key: tuple, future: Future[bytes]) -> None:
+        with self._lock:
+            if self._pending.get(pending_key) is future:
+                del self._pending[pending_key]
+        if future.cancelled():
+            self.stats.cancelled += 1
+        elif future.exception() is not None:
+            self.stats.failed += 1
+            print(f"[red]Thumbnail failed:[/red] {future.exception()}")
+
+    def _load(self, image_path: ImagePath | Path, spec: RenderSpec) -> bytes:
+        path = self.path_for(self.key(image_path, spec))
+        data = self._read(path)
+        if data is not None:
+            self.stats.disk_hits += 1
+            return data
+
+        with span("thumbnail.render"):
+            image = self.render(image_path, spec).convert("RGB")
+            image.thumbnail((self.size, self.size))
+            buffer = io.BytesIO()
+            image.save(buffer, "JPEG", quality=self.quality)
+            data = buffer.getvalue()
+
+        path.parent.mkdir(exist_ok=True)
+        temporary = path.with_suffix(f".{threading.get_ident()}.tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, path)
+        self.stats.rendered += 1
+        return data
+
+    @staticmethod
+    def _read(path: Path) -> bytes | None:
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        # Marks it recently used for `trim()`.
+        os.utime(path)
+        return data
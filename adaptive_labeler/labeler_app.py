@@ -4,21 +4,30 @@ from flet import NavigationRailDestination as NavDest
 from pynput import keyboard
 from pynput.keyboard import Key, KeyCode
 from rich import print
-import threading
-import time
 
 from adaptive_labeler.color_scheme import LabelerColorScheme
+from adaptive_labeler.controls.latency_overlay import LatencyOverlay
+from adaptive_labeler.controls.loading_view import LoadingView
+from adaptive_labeler.runtime.key_dispatcher import KeyDispatcher, RepeatPolicy
+from adaptive_labeler.runtime.startup import StartupMetrics
+from adaptive_labeler.runtime.tracing import Tracer
+from adaptive_labeler.runtime.ui_loop import UiLoop
+from adaptive_labeler.runtime.update_batcher import UpdateBatcher
 from adaptive_labeler.views.image_pair_control_view import ImagePairControlView
-from adaptive_labeler import LabelerConfig
+from adaptive_labeler.labeler_config import LabelerConfig
 from labeling.label_manager import LabelManager
 from labeling.label_manager_config import LabelManagerConfig
 
+# Labeler view mode behind each navigation rail destination.
+MODES = ("labeling", "review")
+
 
 class LabelAppFactory:
 
     @staticmethod
     def create_labeler_app(config: LabelerConfig):
         def labeler_app(page: ft.Page):
+            startup = StartupMetrics()
             page.title = config.title
             page.window_width = config.window_width
             page.window_height = config.window_height
@@ -41,24 +50,36 @@ class LabelAppFactory:
                 height=0,
             )
 
-            label_manager = LabelManager(config.label_manager_config)
-            if label_manager.unlabeled_count() == 0:
-                page.add(ft.Text("No images found."))
-                return
+            tracer = Tracer.shared()
+            tracer.enabled = config.tracing
+
+            # Every control mutation happens on the page's event loop.
+            ui_loop = UiLoop.shared()
+            ui_loop.attach(page.loop)
 
-            image_labeler = ImagePairControlView(label_manager, color_scheme)
+            # Controls mark themselves dirty; each interaction sends one update.
+            update_batcher = UpdateBatcher()
+            loading_view = LoadingView(
+                "Scanning images…",
+                color_scheme=color_scheme,
+                update_batcher=update_batcher,
+            )
 
-            # Placeholder page content dict
-            views = {
-                0: image_labeler,
+            # Placeholder page content dict; the labeler replaces the loading
+            # view once it is built
+            views: dict[int, ft.Control] = {
+                0: loading_view,
                 # 2: ft.Text("About view (placeholder)", size=20),
             }
 
             content_area = ft.Container(content=views[0], expand=True)
 
-            def switch_page(e: ft.ControlEvent):
+            async def switch_page(e: ft.ControlEvent):
                 selected_index = e.control.selected_index
-                content_area.content = views[selected_index]
+                # Review is a mode of the labeler view, not a view of its own.
+                if isinstance(views[0], ImagePairControlView):
+                    views[0].set_mode(MODES[selected_index])
+                content_area.content = views.get(selected_index, views[0])
                 page.update()
 
             nav_rail = ft.NavigationRail(
@@ -69,10 +90,19 @@ class LabelAppFactory:
                 min_extended_width=200,
                 destinations=[
                     NavDest(icon=ft.Icons.IMAGE, label="Labeling"),
+                    NavDest(icon=ft.Icons.GRID_VIEW, label="Review"),
                     # NavDest(icon=ft.icons.INFO, label="About"),
                 ],
                 on_change=switch_page,
             )
+            if config.tracing and config.latency_overlay:
+                nav_rail.trailing = LatencyOverlay(
+                    tracer.latency,
+                    refresh_interval=config.latency_overlay_interval,
+                    color_scheme=color_scheme,
+                    update_batcher=update_batcher,
+                    ui_loop=ui_loop,
+                )
 
             layout = ft.Row(
                 controls=[
@@ -82,49 +112,95 @@ class LabelAppFactory:
                 expand=True,
             )
 
+            def on_disconnect(e):
+                if isinstance(views[0], ImagePairControlView):
+                    views[0].close()
+                if config.tracing:
+                    spans = tracer.export_chrome_trace(config.trace_file())
+                    print(f"Wrote {spans} spans to {config.trace_file()}")
+
+            page.on_disconnect = on_disconnect
             page.add(layout, silent_focus)
             page.update()
             silent_focus.focus()
-
-            # Key handler integration
-            def on_keyboard_press(key: Key | KeyCode):
-                if not page.window.focused:
+            startup.mark("first_paint")
+
+            def load_labeler():
+                """Scan images and load labels off the UI loop, then swap in on it."""
+                try:
+                    label_manager = LabelManager(config.label_manager_config)
+                    startup.mark("label_manager")
+                    if label_manager.unlabeled_count() == 0:
+                        ui_loop.call_soon(loading_view.show_message, "No images found.")
+                        return
+
+                    ui_loop.call_soon(loading_view.set_status, "Loading labels…")
+                    image_labeler = ImagePairControlView(
+                        label_manager,
+                        color_scheme,
+                        config=config,
+                        update_batcher=update_batcher,
+                    )
+                    startup.mark("view")
+                except Exception as error:
+                    print(f"[red]Failed to start the labeler:[/red] {error}")
+                    ui_loop.call_soon(
+                        loading_view.show_message, f"Failed to load images: {error}"
+                    )
                     return
 
+                ui_loop.run(show_labeler, image_labeler)
+
+            def show_labeler(image_labeler: ImagePairControlView):
+                async def on_resized(e: ft.ControlEvent):
+                    image_labeler.on_page_resized(e)
+
+                views[0] = image_labeler
+                content_area.content = image_labeler
+                page.on_resized = on_resized
+                page.update()
+                startup.mark("first_image")
+                print(f"Startup: {startup.summary()}")
+                try:
+                    startup.write(config.startup_metrics_file())
+                except OSError as error:
+                    print(f"[red]Failed to record startup metrics:[/red] {error}")
+
+            page.run_thread(load_labeler)
+
+            # Key handler integration: the dispatcher thread waits for each key
+            # to be handled on the UI loop, so held keys keep coalescing.
+            async def handle_key(key: Key | KeyCode, repeat: int) -> bool:
                 silent_focus.value = ""
                 silent_focus.focus()
 
-                if isinstance(content_area.content, ImagePairControlView):
-                    handled = content_area.content.handle_keyboard_event(key)
-                    if handled:
-                        page.update()
+                if not isinstance(content_area.content, ImagePairControlView):
+                    return False
+                return await content_area.content.handle_key(key, repeat)
 
-            # page.on_keyboard_event = on_keyboard_press
+            def on_keyboard_event(key: Key | KeyCode, repeat: int) -> bool:
+                return ui_loop.run_coroutine(handle_key(key, repeat)).result()
 
-            pressed = False
-            key_pressed: Key | KeyCode | None = None
+            repeat_policy = RepeatPolicy(
+                initial_delay=config.key_repeat_delay,
+                interval=config.key_repeat_interval,
+            )
+            dispatcher = KeyDispatcher(
+                on_keyboard_event,
+                repeat_policies={
+                    key: repeat_policy for key in ImagePairControlView.REPEATABLE_KEYS
+                },
+            )
+            dispatcher.start()
 
             def on_press(key: Key | KeyCode):
-                nonlocal pressed, key_pressed
-                if page.window.focused:
-                    pressed = True
-                    key_pressed = key
-
-            def on_release():
-                nonlocal pressed, key_pressed
                 if page.window.focused:
-                    pressed = False
-                    key_pressed = None
+                    dispatcher.press(key)
 
-            def key_capture_loop():
-                repeat_delay = config.key_press_debounce_delay
-                while True:
-                    if pressed:
-                        on_keyboard_press(key_pressed)
-                    time.sleep(repeat_delay)
+            def on_release(key: Key | KeyCode):
+                dispatcher.release(key)
 
             keyboard.Listener(on_press=on_press, on_release=on_release).start()
-            threading.Thread(target=key_capture_loop, daemon=True).start()
 
         return labeler_app
 
@@ -152,7 +228,6 @@ if __name__ == "__main__":
             temporary_dir=TEMPORARY_IMAGES_OUTPUT_PATH,
             image_samples=NUM_IMAGE_SAMPLES,
         ),
-        key_press_debounce_delay=0.001,
     )
 
     ft.app(target=LabelAppFactory.create_labeler_app(config))
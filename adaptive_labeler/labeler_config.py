@@ -1,8 +1,12 @@
 from __future__ import annotations
 import flet as ft
 from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+import warnings
 
-from labeling.label_manager_config import LabelManagerConfig
+if TYPE_CHECKING:
+    from labeling.label_manager_config import LabelManagerConfig
 
 
 @dataclass
@@ -16,4 +20,176 @@ class LabelerConfig:
     # ImageLoaderConfig
     label_manager_config: LabelManagerConfig | None = None
 
-    key_press_debounce_delay: float = 0.01
+    # Auto-repeat for held Up/Down/Space keys
+    key_repeat_delay: float = 0.3
+    key_repeat_interval: float = 0.05
+    # Deprecated and ignored: keys are no longer polled, so there is nothing
+    # to debounce; use key_repeat_delay and key_repeat_interval instead
+    key_press_debounce_delay: float | None = None
+
+    # Prefetching
+    prefetch_depth: int = 3
+    prefetch_workers: int = 2
+
+    # Process-wide cache of decoded and encoded originals
+    image_cache_bytes: int = 256 * 1024 * 1024
+
+    # Decoded originals, downscaled to fit decoded_disk_cache_max_size, in one
+    # memory-mapped file under temporary_dir/decoded so a reopened session
+    # skips the decodes; warmup decodes all of images_dir in the background
+    decoded_disk_cache: bool = False
+    decoded_disk_cache_bytes: int = 2 * 1024 * 1024 * 1024
+    decoded_disk_cache_max_size: int = 2048
+    decoded_disk_cache_warmup: bool = True
+
+    # Display proxies sent to Flet instead of full-resolution images
+    display_proxies: bool = True
+    display_pixel_ratio: float = 2.0
+    display_format: str = "JPEG"  # or "WEBP"
+    display_quality: int = 85
+
+    # How images reach the client: "base64" inlines them in the websocket
+    # patch, "http" serves them from a localhost endpoint at content-addressed
+    # URLs that the client fetches and caches as raw bytes
+    image_transport: str = "base64"
+    image_server_bytes: int = 64 * 1024 * 1024
+
+    # Slider feedback is rendered on a downsampled copy; the full-resolution
+    # render only happens when a label is recorded.
+    preview_noising: bool = True
+    preview_max_size: int = 1024
+    # Noise ops from the vectorized NumPy engine, by name, added after the
+    # maker's own ops (see KERNELS in imaging/array_engine.py)
+    array_noise_ops: tuple[str, ...] = ()
+    # Preview images after each noise op, so moving one op's slider only
+    # re-runs the ops after it; 0 turns the prefix cache off
+    noise_prefix_cache_bytes: int = 128 * 1024 * 1024
+    # Encoded noisy renders keyed on (image hash, severities, seed)
+    render_cache_bytes: int = 64 * 1024 * 1024
+
+    # Render upcoming images at these master values on every core, into
+    # temporary_dir/pregenerated, before the session reaches them
+    pregeneration: bool = False
+    pregeneration_images: int = 64
+    pregeneration_workers: int | None = None  # all cores
+    pregeneration_max_bytes: int = 512 * 1024 * 1024
+    pregeneration_max_size: int = 2048
+    pregeneration_master_values: tuple[float, ...] = (0.0, 0.1, 0.2, 0.3, 0.4, 0.5)
+
+    # Where each new pair's master slider starts and where Space moves it:
+    # "random" (clean start, random increments), "staircase" or "logistic",
+    # which home in on the acceptable/unacceptable boundary from the labels
+    severity_scheduler: str = "random"
+    # Most recent stored labels the scheduler is fitted on at startup
+    scheduler_warm_start: int = 1000
+
+    # Write-behind label journal; None keeps it next to the labeled output
+    label_journal_path: str | None = None
+    label_journal_batch_size: int = 256
+    label_journal_flush_interval: float = 0.5
+    # Also record through LabelManager.label_writer (in the background)
+    legacy_label_writer: bool = True
+
+    # Parquet label store fed by the journal; None keeps it next to the output
+    label_store_dir: str | None = None
+    label_store_compact_every: int = 32
+
+    # SQLite index of images_dir, polled for added, changed and removed files
+    image_index: bool = True
+    # Progress counts images with a label out of files on disk, from the
+    # index, instead of the label manager's labeled/total
+    image_index_progress: bool = False
+    image_index_path: str | None = None
+    image_index_poll_interval: float = 2.0
+    # Every Nth poll also re-stats each file, for files rewritten in place
+    image_index_full_scan_every: int = 30
+    # Perceptual hashes of every indexed image, computed on all cores and
+    # stored in the image index, group resized and re-exported copies so
+    # progress counts unique images; needs image_index
+    duplicate_index: bool = False
+    duplicate_index_workers: int | None = None  # all cores
+    # Bits two pHashes may differ by, confirmed by their dHashes
+    duplicate_max_distance: int = 6
+    duplicate_confirm_distance: int = 12
+    # Pass over new images whose near-duplicate already has a label
+    skip_near_duplicates: bool = True
+
+    # Review mode pages label metadata and renders images around the cursor
+    review_page_size: int = 128
+    review_max_pages: int = 4
+    review_neighbours: int = 2
+    # The review grid's thumbnails, rendered by a worker pool into
+    # temporary_dir/thumbnails and kept there for later sessions
+    review_thumbnail_size: int = 160
+    review_thumbnail_workers: int | None = None  # all cores
+    review_thumbnail_cache_bytes: int = 512 * 1024 * 1024
+
+    # Spans around the hot path, exported as a Chrome trace on close
+    tracing: bool = False
+    trace_path: str | None = None
+    # Rolling per-stage timings in the nav rail; needs tracing
+    latency_overlay: bool = False
+    latency_overlay_interval: float = 1.0
+
+    # Seconds from package import to first paint and first image, appended
+    # per launch; None keeps the history next to the labeled output
+    startup_metrics_path: str | None = None
+
+    def __post_init__(self):
+        if self.key_press_debounce_delay is not None:
+            warnings.warn(
+                "key_press_debounce_delay is ignored; "
+                "set key_repeat_delay and key_repeat_interval instead",
+                DeprecationWarning,
+                stacklevel=3,
+            )
+
+    def label_journal_file(self) -> Path:
+        if self.label_journal_path:
+            return Path(self.label_journal_path)
+        return self._output_dir() / "labels.journal.jsonl"
+
+    def label_store_directory(self) -> Path:
+        if self.label_store_dir:
+            return Path(self.label_store_dir)
+        return self._output_dir() / "labels"
+
+    def image_index_file(self) -> Path:
+        if self.image_index_path:
+            return Path(self.image_index_path)
+        return self._output_dir() / "image_index.sqlite"
+
+    def trace_file(self) -> Path:
+        if self.trace_path:
+            return Path(self.trace_path)
+        return self._output_dir() / "trace.json"
+
+    def startup_metrics_file(self) -> Path:
+        if self.startup_metrics_path:
+            return Path(self.startup_metrics_path)
+        return self._output_dir() / "startup_metrics.jsonl"
+
+    def pregeneration_directory(self) -> Path | None:
+        if self.label_manager_config is None:
+            return None
+        return Path(self.label_manager_config.temporary_dir) / "pregenerated"
+
+    def decoded_cache_directory(self) -> Path | None:
+        if self.label_manager_config is None:
+            return None
+        return Path(self.label_manager_config.temporary_dir) / "decoded"
+
+    def thumbnail_directory(self) -> Path:
+        if self.label_manager_config is None:
+            return self._output_dir() / "thumbnails"
+        return Path(self.label_manager_config.temporary_dir) / "thumbnails"
+
+    def images_root(self) -> Path | None:
+        if self.label_manager_config is None:
+            return None
+        return Path(self.label_manager_config.images_dir)
+
+    def _output_dir(self) -> Path:
+        if self.label_manager_config is None:
+            return Path(".")
+        return Path(self.label_manager_config.output_dir)
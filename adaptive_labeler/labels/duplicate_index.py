@@ -0,0 +1,427 @@
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+import os
+import sqlite3
+import threading
+import time
+
+from rich import print
+
+from adaptive_labeler.imaging.perceptual_hash import (
+    HammingIndex,
+    ImageHashes,
+    hamming,
+    hash_files,
+)
+from adaptive_labeler.labels.image_index import ImageIndex, IndexChanges
+
+# (path, size, mtime_ns, hashes) as computed by a worker.
+HashedRow = tuple[str, int, int, ImageHashes | None]
+
+_MASK = (1 << 64) - 1
+
+
+@dataclass
+class DuplicateStats:
+    hashed: int = 0
+    failed: int = 0
+    rebuilds: int = 0
+
+
+class DuplicateIndex:
+    """
+    Groups the near-duplicate images of an `ImageIndex` by perceptual hash.
+
+    Each indexed image gets an aHash, dHash and pHash, computed in batches on
+    a pool of `workers` processes and stored in the image index's database
+    with the size and mtime they were computed for. A batch is committed as
+    soon as it is hashed, so an interrupted run resumes where it stopped and
+    unchanged images are never hashed twice.
+
+    Images whose pHashes are within `max_distance` bits, confirmed by their
+    dHashes being within `confirm_distance`, share a group; groups are
+    transitive. Progress can then be counted in groups: an image is
+    redundant once another image of its group has a label.
+    """
+
+    def __init__(
+        self,
+        image_index: ImageIndex,
+        max_distance: int = 6,
+        confirm_distance: int = 12,
+        workers: int | None = None,
+        batch_size: int = 64,
+    ):
+        self.image_index = image_index
+        self.max_distance = max_distance
+        self.confirm_distance = confirm_distance
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.stats = DuplicateStats()
+        # Called on the indexing thread as groups change, at most once a second.
+        self.listeners: list[Callable[[], None]] = []
+
+        self._db = sqlite3.connect(
+            str(image_index.database), check_same_thread=False, timeout=30
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS perceptual_hashes ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+            "ahash INTEGER, dhash INTEGER, phash INTEGER)"
+        )
+        self._db.commit()
+
+        # Only touched by the indexing pass.
+        self._hashes: dict[str, tuple[int, int, ImageHashes | None]] = {}
+        self._table = HammingIndex(max_distance)
+        self._loaded = False
+        self._executor: ProcessPoolExecutor | None = None
+        self._notified = 0.0
+        self._pending = 0
+
+        # Groups as a union-find over hashed paths, with each group's members
+        # and labeled members, guarded by `_lock`.
+        self._lock = threading.Lock()
+        self._parent: dict[str, str] = {}
+        self._members: dict[str, set[str]] = {}
+        self._labeled: set[str] = set()
+        self._labeled_in: dict[str, int] = {}
+        self._merged = 0
+        self._redundant_labels = 0
+        self._gone: set[str] = set()
+
+        self._pass_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        image_index.listeners.append(self._on_images_changed)
+        image_index.label_listeners.append(self._on_label_changed)
+
+    # --- Progress ---
+
+    @property
+    def unique_total(self) -> int:
+        return max(self.image_index.total - self._merged, 0)
+
+    @property
+    def unique_labeled_count(self) -> int:
+        """Groups with at least one labeled image."""
+        return max(self.image_index.labeled_count - self._redundant_labels, 0)
+
+    def percentage_complete(self) -> float:
+        """Fraction of unique images with at least one labeled copy."""
+        total = self.unique_total
+        return self.unique_labeled_count / total if total else 0.0
+
+    def progress_text(self) -> str:
+        text = f"{self.unique_labeled_count}/{self.unique_total} unique images labeled"
+        pending = self.pending
+        return f"{text} ({pending} to hash)" if pending else text
+
+    @property
+    def pending(self) -> int:
+        """Images left to hash in the current pass."""
+        return self._pending
+
+    # --- Lookups ---
+
+    def hashes(self, path: str | Path) -> ImageHashes | None:
+        entry = self._hashes.get(self.image_index.key(path))
+        return entry[2] if entry else None
+
+    def group_of(self, path: str | Path) -> set[str]:
+        """Keys of every image in `path`'s group, including its own."""
+        key = self.image_index.key(path)
+        with self._lock:
+            if key not in self._parent:
+                return {key}
+            return set(self._members[self._find(key)])
+
+    def duplicates_of(self, path: str | Path) -> set[str]:
+        key = self.image_index.key(path)
+        return self.group_of(key) - {key}
+
+    def is_redundant(self, path: str | Path) -> bool:
+        """Unlabeled, but another image of its group has a label."""
+        key = self.image_index.key(path)
+        with self._lock:
+            if key not in self._parent or key in self._labeled:
+                return False
+            return self._labeled_in[self._find(key)] > 0
+
+    # --- Updating ---
+
+    def refresh(self) -> int:
+        """Hash new and changed images and group them; returns how many."""
+        with self._pass_lock:
+            if not self._loaded:
+                self._load()
+            with self._lock:
+                gone, self._gone = self._gone, set()
+            if gone:
+                self._forget(gone)
+
+            pending = sorted(
+                image.path
+                for image in self.image_index.images()
+                if self._hashes.get(image.path, (None, None))[:2]
+                != (image.size, image.mtime_ns)
+            )
+            self._pending = len(pending)
+            try:
+                self._hash(pending)
+            finally:
+                self._pending = 0
+            self._notify(force=True)
+            return len(pending)
+
+    def watch(self) -> None:
+        """Refresh on a background thread now and whenever images change."""
+        if self._thread:
+            return
+        self._wake.set()
+        self._thread = threading.Thread(
+            target=self._run, name="duplicate-index", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        for listeners, listener in (
+            (self.image_index.listeners, self._on_images_changed),
+            (self.image_index.label_listeners, self._on_label_changed),
+        ):
+            if listener in listeners:
+                listeners.remove(listener)
+        with self._pass_lock:
+            self._db.close()
+
+    # --- Internals ---
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.refresh()
+            except Exception as error:
+                print(f"[red]Failed to index duplicates:[/red] {error}")
+
+    def _on_images_changed(self, changes: IndexChanges) -> None:
+        with self._lock:
+            self._gone.update(changes.changed)
+            self._gone.update(changes.removed)
+        self._wake.set()
+
+    def _on_label_changed(self, path: str, labeled: bool) -> None:
+        with self._lock:
+            if path not in self._parent or (path in self._labeled) == labeled:
+                return
+            self._set_labeled(path, labeled)
+
+    def _load(self) -> None:
+        for path, size, mtime_ns, ahash, dhash, phash in self._db.execute(
+            "SELECT path, size, mtime_ns, ahash, dhash, phash FROM perceptual_hashes"
+        ):
+            hashes = (
+                ImageHashes(ahash & _MASK, dhash & _MASK, phash & _MASK)
+                if phash is not None
+                else None
+            )
+            self._hashes[path] = (size, mtime_ns, hashes)
+        self._loaded = True
+        self._rebuild()
+
+    def _forget(self, paths: set[str]) -> None:
+        with self._db:
+            self._db.executemany(
+                "DELETE FROM perceptual_hashes WHERE path = ?",
+                [(path,) for path in paths],
+            )
+        for path in paths:
+            self._hashes.pop(path, None)
+        # Union-find cannot split groups, so they are regrouped from scratch.
+        if any(path in self._table for path in paths):
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        self.stats.rebuilds += 1
+        self._table = HammingIndex(self.max_distance)
+        with self._lock:
+            self._parent.clear()
+            self._members.clear()
+            self._labeled.clear()
+            self._labeled_in.clear()
+            self._merged = 0
+            self._redundant_labels = 0
+        current = {
+            image.path: (image.size, image.mtime_ns)
+            for image in self.image_index.images()
+        }
+        for path, (size, mtime_ns, hashes) in sorted(self._hashes.items()):
+            if hashes is not None and current.get(path) == (size, mtime_ns):
+                self._insert(path, hashes)
+        self._notify(force=True)
+
+    def _hash(self, pending: list[str]) -> None:
+        if not pending:
+            return
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        batches = iter(
+            pending[i : i + self.batch_size]
+            for i in range(0, len(pending), self.batch_size)
+        )
+        in_flight: set[Future[list[HashedRow]]] = set()
+        while not self._stop.is_set():
+            for batch in batches:
+                in_flight.add(
+                    self._executor.submit(
+                        _hash_batch, str(self.image_index.root), batch
+                    )
+                )
+                if len(in_flight) >= 2 * self.workers:
+                    break
+            if not in_flight:
+                return
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                if not future.cancelled():
+                    self._store(future.result())
+
+    def _store(self, rows: list[HashedRow]) -> None:
+        current = []
+        for path, size, mtime_ns, hashes in rows:
+            image = self.image_index.get(path)
+            if image is None or (image.size, image.mtime_ns) != (size, mtime_ns):
+                # Changed again meanwhile; the next pass hashes it again.
+                continue
+            current.append((path, size, mtime_ns, hashes))
+        self._pending = max(self._pending - len(rows), 0)
+        stale = {path for path, *_ in current if path in self._table}
+        if stale:
+            # Rewritten since it was grouped, without a scan reporting it yet.
+            self._forget(stale)
+
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO perceptual_hashes VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (path, size, mtime_ns, *_signed(hashes))
+                    for path, size, mtime_ns, hashes in current
+                ],
+            )
+        for path, size, mtime_ns, hashes in current:
+            self._hashes[path] = (size, mtime_ns, hashes)
+            if hashes is None:
+                self.stats.failed += 1
+                continue
+            self.stats.hashed += 1
+            self._insert(path, hashes)
+        self._notify()
+
+    def _insert(self, path: str, hashes: ImageHashes) -> None:
+        matches = [
+            other
+            for other, _ in self._table.search(hashes.phash)
+            if other != path
+            and hamming(self._hashes[other][2].dhash, hashes.dhash)
+            <= self.confirm_distance
+        ]
+        self._table.add(path, hashes.phash)
+        with self._lock:
+            self._parent[path] = path
+            self._members[path] = {path}
+            self._labeled_in[path] = 0
+            if self.image_index.is_labeled(path):
+                self._set_labeled(path, True)
+            for other in matches:
+                self._union(path, other)
+
+    def _find(self, path: str) -> str:
+        parent = self._parent
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    def _union(self, a: str, b: str) -> None:
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return
+        if len(self._members[a]) < len(self._members[b]):
+            a, b = b, a
+        labeled_a, labeled_b = self._labeled_in[a], self._labeled_in.pop(b)
+        self._redundant_labels += (
+            _extra(labeled_a + labeled_b) - _extra(labeled_a) - _extra(labeled_b)
+        )
+        self._labeled_in[a] = labeled_a + labeled_b
+        self._members[a] |= self._members.pop(b)
+        self._parent[b] = a
+        self._merged += 1
+
+    def _set_labeled(self, path: str, labeled: bool) -> None:
+        root = self._find(path)
+        before = self._labeled_in[root]
+        after = before + (1 if labeled else -1)
+        if labeled:
+            self._labeled.add(path)
+        else:
+            self._labeled.discard(path)
+        self._labeled_in[root] = after
+        self._redundant_labels += _extra(after) - _extra(before)
+
+    def _notify(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._notified < 1.0:
+            return
+        self._notified = now
+        for listener in list(self.listeners):
+            try:
+                listener()
+            except Exception as error:
+                print(f"[red]Duplicate index listener failed:[/red] {error}")
+
+
+def _extra(labeled: int) -> int:
+    # Labeled images in a group beyond the first.
+    return max(labeled - 1, 0)
+
+
+def _signed(hashes: ImageHashes | None) -> tuple:
+    # SQLite integers are signed 64-bit.
+    if hashes is None:
+        return None, None, None
+    return tuple(
+        value - (1 << 64) if value >> 63 else value
+        for value in (hashes.ahash, hashes.dhash, hashes.phash)
+    )
+
+
+def _hash_batch(root: str, paths: list[str]) -> list[HashedRow]:
+    """Worker: hashes of `paths` under `root`, with the stat they are for."""
+    rows = []
+    files = []
+    for path in paths:
+        try:
+            stat = os.stat(Path(root) / path)
+        except OSError:
+            continue
+        rows.append((path, stat.st_size, stat.st_mtime_ns))
+        files.append(Path(root) / path)
+    return [
+        (path, size, mtime_ns, hashes)
+        for (path, size, mtime_ns), hashes in zip(rows, hash_files(files))
+    ]
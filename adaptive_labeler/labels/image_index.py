@@ -0,0 +1,484 @@
+from __future__ import annotations
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Mapping
+import json
+import os
+import sqlite3
+import threading
+
+from PIL import Image as PILImage
+from rich import print
+
+from adaptive_labeler.imaging.decoded_disk_cache import IMAGE_SUFFIXES
+from adaptive_labeler.imaging.render_cache import content_hash
+
+
+@dataclass
+class IndexedImage:
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str | None = None
+    width: int | None = None
+    height: int | None = None
+
+
+@dataclass
+class IndexChanges:
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+class ImageIndex:
+    """
+    Persistent index of the images under `root`, kept up to date by polling.
+
+    Each image is stored in SQLite with its size, mtime, content hash,
+    dimensions and whether it has a label. `refresh()` re-stats directories
+    and only lists the ones whose mtime moved, so a poll over an unchanged
+    tree costs one stat per directory. A `full` refresh also re-stats every
+    file, which catches files rewritten in place. New and changed files are
+    counted right away and hashed afterwards.
+
+    Totals and label counts live in memory and are updated as files and
+    labels come and go, so progress is a lookup rather than a rescan.
+    Paths are stored relative to `root`, like the label store's.
+    """
+
+    def __init__(
+        self,
+        database: str | Path,
+        root: str | Path,
+        poll_interval: float = 2.0,
+        full_scan_every: int = 30,
+        exclude: Iterable[str | Path] = (),
+    ):
+        self.database = Path(database)
+        self.root = Path(root).resolve()
+        self.poll_interval = poll_interval
+        self.full_scan_every = full_scan_every
+        # Directories under root that are never indexed, e.g. labeled output.
+        self.exclude = {Path(path).resolve() for path in exclude}
+        # Called with the changes of every refresh that found any (poll thread).
+        self.listeners: list[Callable[[IndexChanges], None]] = []
+        # Called with a path and whether it is labeled whenever that flips.
+        self.label_listeners: list[Callable[[str, bool], None]] = []
+
+        self._lock = threading.RLock()
+        self._scan_lock = threading.Lock()
+        self._hash_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self.database.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.database), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS images ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+            "content_hash TEXT, width INTEGER, height INTEGER, "
+            "labeled INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS directories ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, subdirectories TEXT)"
+        )
+        self._db.commit()
+
+        self._images: dict[str, IndexedImage] = {}
+        self._files_in: dict[str, set[str]] = defaultdict(set)
+        for row in self._db.execute(
+            "SELECT path, size, mtime_ns, content_hash, width, height FROM images"
+        ):
+            image = IndexedImage(*row)
+            self._images[image.path] = image
+            self._files_in[_parent(image.path)].add(image.path)
+        self._directories: dict[str, tuple[int, list[str]]] = {
+            path: (mtime_ns, json.loads(subdirectories))
+            for path, mtime_ns, subdirectories in self._db.execute(
+                "SELECT path, mtime_ns, subdirectories FROM directories"
+            )
+        }
+        self._unhashed = {
+            path for path, image in self._images.items() if image.content_hash is None
+        }
+
+        # Effective labels per image, whether or not the file is indexed yet.
+        self._labels: Counter[str] = Counter()
+        self._labeled = 0
+        self._dirty_labels: set[str] = set()
+
+    # --- Progress ---
+
+    @property
+    def total(self) -> int:
+        return len(self._images)
+
+    @property
+    def labeled_count(self) -> int:
+        return self._labeled
+
+    @property
+    def unlabeled_count(self) -> int:
+        return len(self._images) - self._labeled
+
+    def percentage_complete(self) -> float:
+        """Fraction of indexed images with at least one label."""
+        return self._labeled / len(self._images) if self._images else 0.0
+
+    def progress_text(self) -> str:
+        return f"{self._labeled}/{len(self._images)} images labeled"
+
+    @property
+    def pending_hashes(self) -> int:
+        return len(self._unhashed)
+
+    # --- Lookups ---
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def __contains__(self, path: str | Path) -> bool:
+        return self._key(path) in self._images
+
+    def get(self, path: str | Path) -> IndexedImage | None:
+        return self._images.get(self._key(path))
+
+    def key(self, path: str | Path) -> str:
+        """`path` as stored in the index, relative to `root`."""
+        return self._key(path)
+
+    def images(self) -> list[IndexedImage]:
+        with self._lock:
+            return list(self._images.values())
+
+    def is_labeled(self, path: str | Path) -> bool:
+        return self._labels[self._key(path)] > 0
+
+    def unlabeled(self) -> list[Path]:
+        with self._lock:
+            return [
+                self.root / path
+                for path in sorted(self._images)
+                if not self._labels[path]
+            ]
+
+    # --- Labels ---
+
+    def sync_labels(
+        self, image_paths: Iterable[str | Path] | Mapping[str | Path, int]
+    ) -> None:
+        """
+        Replace every label count with one per path, or with the counts of
+        a path to count mapping, e.g. the label store's `label_counts()`.
+        """
+        counts: Counter[str] = Counter()
+        if isinstance(image_paths, Mapping):
+            for path, count in image_paths.items():
+                counts[self._key(path)] += count
+        else:
+            counts.update(self._key(path) for path in image_paths)
+        with self._lock:
+            flipped = [
+                path
+                for path in set(self._labels) | set(counts)
+                if bool(self._labels[path]) != bool(counts[path])
+            ]
+            self._dirty_labels.update(flipped)
+            self._labels = counts
+            self._labeled = sum(1 for path in self._images if counts[path])
+        for path in flipped:
+            self._notify_label(path, bool(counts[path]))
+
+    def add_label(self, path: str | Path) -> None:
+        self._change_label(self._key(path), 1)
+
+    def remove_label(self, path: str | Path) -> None:
+        self._change_label(self._key(path), -1)
+
+    # --- Updating ---
+
+    def refresh(self, full: bool = False) -> IndexChanges:
+        """Pick up added, changed and removed files, then hash the new ones."""
+        with self._scan_lock:
+            changes = self._scan(full)
+        self._flush_labels()
+        if changes:
+            for listener in list(self.listeners):
+                try:
+                    listener(changes)
+                except Exception as error:
+                    print(f"[red]Image index listener failed:[/red] {error}")
+        self._hash_pending()
+        return changes
+
+    def watch(self) -> None:
+        """Refresh every `poll_interval` seconds on a background thread."""
+        if self._thread:
+            return
+        self._thread = threading.Thread(
+            target=self._poll, name="image-index", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self._flush_labels()
+        with self._lock:
+            self._db.close()
+
+    # --- Internals ---
+
+    def _key(self, path: str | Path) -> str:
+        path = Path(path)
+        resolved = path.resolve()
+        try:
+            return resolved.relative_to(self.root).as_posix()
+        except ValueError:
+            # A relative path outside the working directory's view of root is
+            # taken to be a key already.
+            return resolved.as_posix() if path.is_absolute() else path.as_posix()
+
+    def _change_label(self, path: str, delta: int) -> None:
+        with self._lock:
+            before = self._labels[path]
+            after = max(before + delta, 0)
+            self._labels[path] = after
+            flipped = bool(before) != bool(after)
+            if flipped:
+                self._dirty_labels.add(path)
+                if path in self._images:
+                    self._labeled += 1 if after else -1
+        if flipped:
+            self._notify_label(path, bool(after))
+
+    def _notify_label(self, path: str, labeled: bool) -> None:
+        for listener in list(self.label_listeners):
+            try:
+                listener(path, labeled)
+            except Exception as error:
+                print(f"[red]Image index listener failed:[/red] {error}")
+
+    def _poll(self) -> None:
+        polls = 0
+        while True:
+            try:
+                # The first pass re-stats everything the last session left.
+                self.refresh(full=polls % self.full_scan_every == 0)
+            except Exception as error:
+                print(f"[red]Failed to refresh the image index:[/red] {error}")
+            polls += 1
+            if self._stop.wait(self.poll_interval):
+                return
+
+    def _scan(self, full: bool) -> IndexChanges:
+        changes = IndexChanges()
+        stats: dict[str, os.stat_result] = {}
+        visited: set[str] = set()
+        directories: dict[str, tuple[int, list[str]] | None] = {}
+        stack = [""]
+        while stack and not self._stop.is_set():
+            directory = stack.pop()
+            visited.add(directory)
+            known = self._directories.get(directory)
+            try:
+                mtime_ns = os.stat(self.root / directory).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            except OSError as error:
+                print(f"[red]Failed to stat {directory or self.root}:[/red] {error}")
+                mtime_ns = None
+            if known and known[0] == mtime_ns and not full:
+                stack.extend(known[1])
+                continue
+
+            listing = self._list(directory) if mtime_ns is not None else None
+            if listing is None:
+                # Unreadable for now; keep what was indexed under it.
+                if known:
+                    stack.extend(known[1])
+                continue
+            subdirectories, files = listing
+            directories[directory] = (mtime_ns, subdirectories)
+            stack.extend(subdirectories)
+            self._diff(directory, files, changes, stats)
+
+        if self._stop.is_set():
+            return IndexChanges()
+        for directory in set(self._directories) - visited:
+            # Gone along with its parent's listing.
+            directories[directory] = None
+            self._diff(directory, {}, changes, stats)
+        self._apply(changes, stats, directories)
+        return changes
+
+    def _list(
+        self, directory: str
+    ) -> tuple[list[str], dict[str, os.stat_result]] | None:
+        """Subdirectories and image files in `directory`, None if unreadable."""
+        subdirectories: list[str] = []
+        files: dict[str, os.stat_result] = {}
+        try:
+            with os.scandir(self.root / directory) as entries:
+                for entry in entries:
+                    path = f"{directory}/{entry.name}" if directory else entry.name
+                    if entry.is_dir():
+                        if Path(entry.path).resolve() not in self.exclude:
+                            subdirectories.append(path)
+                    elif (
+                        entry.is_file()
+                        and os.path.splitext(entry.name)[1].lower() in IMAGE_SUFFIXES
+                    ):
+                        files[path] = entry.stat()
+        except OSError as error:
+            print(f"[red]Failed to list {directory or self.root}:[/red] {error}")
+            return None
+        return subdirectories, files
+
+    def _diff(
+        self,
+        directory: str,
+        files: dict[str, os.stat_result],
+        changes: IndexChanges,
+        stats: dict[str, os.stat_result],
+    ) -> None:
+        for path, stat in files.items():
+            image = self._images.get(path)
+            if image is None:
+                changes.added.append(path)
+            elif image.size != stat.st_size or image.mtime_ns != stat.st_mtime_ns:
+                changes.changed.append(path)
+            else:
+                continue
+            stats[path] = stat
+        changes.removed.extend(self._files_in.get(directory, set()) - set(files))
+
+    def _apply(
+        self,
+        changes: IndexChanges,
+        stats: dict[str, os.stat_result],
+        directories: dict[str, tuple[int, list[str]] | None],
+    ) -> None:
+        with self._lock:
+            for path in changes.added + changes.changed:
+                stat = stats[path]
+                if path not in self._images and self._labels[path]:
+                    self._labeled += 1
+                self._images[path] = IndexedImage(path, stat.st_size, stat.st_mtime_ns)
+                self._files_in[_parent(path)].add(path)
+                self._unhashed.add(path)
+            for path in changes.removed:
+                self._images.pop(path, None)
+                self._files_in[_parent(path)].discard(path)
+                self._unhashed.discard(path)
+                if self._labels[path]:
+                    self._labeled -= 1
+
+            for directory, entry in directories.items():
+                if entry is None:
+                    self._directories.pop(directory, None)
+                    self._files_in.pop(directory, None)
+                else:
+                    self._directories[directory] = entry
+
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO images "
+                    "(path, size, mtime_ns, content_hash, width, height, labeled) "
+                    "VALUES (?, ?, ?, NULL, NULL, NULL, ?)",
+                    [
+                        (
+                            path,
+                            self._images[path].size,
+                            self._images[path].mtime_ns,
+                            int(self._labels[path] > 0),
+                        )
+                        for path in changes.added + changes.changed
+                    ],
+                )
+                self._db.executemany(
+                    "DELETE FROM images WHERE path = ?",
+                    [(path,) for path in changes.removed],
+                )
+                self._db.executemany(
+                    "DELETE FROM directories WHERE path = ?",
+                    [(d,) for d, entry in directories.items() if entry is None],
+                )
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO directories VALUES (?, ?, ?)",
+                    [
+                        (d, entry[0], json.dumps(entry[1]))
+                        for d, entry in directories.items()
+                        if entry is not None
+                    ],
+                )
+
+    def _hash_pending(self, batch_size: int = 256) -> None:
+        # One hasher at a time; a concurrent refresh leaves the work to it.
+        if not self._hash_lock.acquire(blocking=False):
+            return
+        try:
+            while self._unhashed and not self._stop.is_set():
+                with self._lock:
+                    batch = sorted(self._unhashed)[:batch_size]
+                details = [self._details(path) for path in batch]
+                with self._lock:
+                    rows = []
+                    for path, (size, mtime_ns, digest, width, height) in zip(
+                        batch, details
+                    ):
+                        self._unhashed.discard(path)
+                        image = self._images.get(path)
+                        if image is None or (image.size, image.mtime_ns) != (
+                            size,
+                            mtime_ns,
+                        ):
+                            # Changed again meanwhile; the next scan requeues it.
+                            continue
+                        image.content_hash = digest
+                        image.width, image.height = width, height
+                        rows.append((digest, width, height, path))
+                    with self._db:
+                        self._db.executemany(
+                            "UPDATE images SET content_hash = ?, width = ?, height = ? "
+                            "WHERE path = ?",
+                            rows,
+                        )
+        finally:
+            self._hash_lock.release()
+
+    def _details(self, path: str) -> tuple:
+        file = self.root / path
+        try:
+            stat = os.stat(file)
+            with PILImage.open(file) as image:
+                width, height = image.size
+            return stat.st_size, stat.st_mtime_ns, content_hash(file), width, height
+        except (OSError, PILImage.UnidentifiedImageError) as error:
+            print(f"[yellow]Could not index {file}:[/yellow] {error}")
+            return None, None, None, None, None
+
+    def _flush_labels(self) -> None:
+        with self._lock:
+            if not self._dirty_labels:
+                return
+            rows = [(int(self._labels[path] > 0), path) for path in self._dirty_labels]
+            self._dirty_labels.clear()
+            with self._db:
+                self._db.executemany(
+                    "UPDATE images SET labeled = ? WHERE path = ?", rows
+                )
+
+
+def _parent(path: str) -> str:
+    return path.rpartition("/")[0]
@@ -0,0 +1,481 @@
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Mapping
+import itertools
+import json
+import os
+import threading
+import time
+
+from rich import print
+
+
+def fsync_directory(directory: Path) -> None:
+    """Make a rename or a new file in `directory` survive a power loss."""
+    if os.name == "nt":
+        # Windows cannot open a directory; its renames are durable as is.
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@dataclass
+class LabelEntry:
+    record_id: int
+    image_path: str
+    label: str
+    severities: dict[str, float] = field(default_factory=dict)
+    seed: int | None = None
+    timestamp: float = 0.0
+
+
+@dataclass
+class JournalOp:
+    """
+    One line of the journal: a new label (`record`), the undo of one
+    (`undo`), a new `label` for every record in `record_ids` (`relabel`,
+    whose `record_id` is the highest of them), or the first line after a
+    truncation (`checkpoint`, whose `record_id` is the last id handed out).
+    """
+
+    op: str
+    record_id: int
+    entry: LabelEntry | None = None
+    enqueued_at: float = 0.0
+    record_ids: list[int] = field(default_factory=list)
+    label: str | None = None
+
+    def to_json(self) -> str:
+        if self.op == "relabel":
+            return json.dumps(
+                {"op": self.op, "record_ids": self.record_ids, "label": self.label}
+            )
+        if self.entry is None:
+            return json.dumps({"op": self.op, "record_id": self.record_id})
+        return json.dumps({"op": self.op, **vars(self.entry)})
+
+    @classmethod
+    def from_json(cls, line: str) -> JournalOp:
+        data = json.loads(line)
+        op = data.pop("op")
+        if op == "relabel":
+            record_ids = [int(record_id) for record_id in data["record_ids"]]
+            return cls(
+                op,
+                max(record_ids, default=0),
+                record_ids=record_ids,
+                label=str(data["label"]),
+            )
+        if op in ("undo", "checkpoint"):
+            return cls(op, data["record_id"])
+        return cls(op, data["record_id"], LabelEntry(**data))
+
+
+@dataclass
+class JournalStats:
+    appended: int = 0
+    flushed: int = 0
+    batches: int = 0
+    max_durable_latency: float = 0.0
+    write_failures: int = 0
+    sink_failures: int = 0
+
+
+class LabelJournal:
+    """
+    Write-behind, append-only label log.
+
+    `record()` and `undo()` only append to an in-memory ring and return. A
+    background thread writes pending operations in batches, once
+    `batch_size` operations are queued or `flush_interval` seconds have
+    passed, and fsyncs each batch. Undo and relabel are appended entries,
+    so the file is never rewritten; a relabel of any number of records is
+    one line. Replaying the file after a crash yields every label whose
+    batch reached the disk, minus the undone ones, with their latest label.
+    A torn last line is ignored.
+
+    Each durable batch is then handed to the `sinks`, in order, on the
+    flusher thread.
+
+    A batch that fails to write goes back to the front of the ring and is
+    retried with backoff; a sink that raises gets every batch since the
+    last one it took on the next attempt. Until that succeeds, `error`
+    holds the failure and `flush()` reports it.
+
+    Once everything in the file is also held elsewhere (the label store),
+    `checkpoint()` truncates it, so opening the journal only replays what
+    was written since. That needs `durable_sinks`: every sink must have made
+    a batch durable by the time it returns, or a power loss right after a
+    checkpoint would lose labels from both.
+    """
+
+    # Seconds before the first retry, doubling up to MAX_RETRY_DELAY.
+    RETRY_DELAY = 0.05
+    MAX_RETRY_DELAY = 2.0
+    # Attempts left after `close()` before pending operations are given up.
+    CLOSE_RETRIES = 3
+    # Latest entries kept in memory for `undo()` across a checkpoint.
+    CHECKPOINT_KEEP = 1024
+
+    def __init__(
+        self,
+        path: str | Path,
+        sinks: list[Callable[[list[JournalOp]], None]] | None = None,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+        capacity: int = 65536,
+        fsync: bool = True,
+        durable_sinks: bool = False,
+    ):
+        self.path = Path(path)
+        self.sinks = list(sinks or [])
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.capacity = capacity
+        self.fsync = fsync
+        self.durable_sinks = durable_sinks
+        self.stats = JournalStats()
+        # The unresolved write or sink failure, if any.
+        self.error: Exception | None = None
+
+        self._effective: dict[int, LabelEntry] = {}
+        # Records up to this id were truncated away; the store has them.
+        self.checkpoint_id = 0
+        last_record_id = 0
+        for op in self.read_ops(self.path):
+            last_record_id = max(last_record_id, op.record_id)
+            if op.op == "checkpoint":
+                self.checkpoint_id = op.record_id
+            self._apply(self._effective, op)
+        self._next_id = last_record_id + 1
+
+        self._ring: deque[JournalOp] = deque()
+        self._in_flight = 0
+        # Callers blocked in `flush()`; while there are any, partial batches
+        # are written without waiting out `flush_interval`.
+        self._flush_waiters = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        # Written and delivered, or failed, batches; lets `flush()` tell a
+        # failure that happened after it was called.
+        self._attempts = 0
+        # Operations each sink (by position) has not taken yet.
+        self._undelivered: dict[int, list[JournalOp]] = {}
+        self._torn = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() and not self._ends_with_newline(self.path):
+            # Terminate a torn last line so the next batch starts cleanly.
+            self._file.write("\n")
+        self._thread = threading.Thread(
+            target=self._run, name="label-journal", daemon=True
+        )
+        self._thread.start()
+
+    # --- Public API ---
+
+    def record(
+        self,
+        image_path: str,
+        label: str,
+        severities: Mapping[str, float] | None = None,
+        seed: int | None = None,
+    ) -> LabelEntry:
+        with self._condition:
+            entry = LabelEntry(
+                record_id=self._next_id,
+                image_path=str(image_path),
+                label=label,
+                severities=dict(severities or {}),
+                seed=seed,
+                timestamp=time.time(),
+            )
+            self._next_id += 1
+            self._effective[entry.record_id] = entry
+            self._enqueue(JournalOp("record", entry.record_id, entry))
+        return entry
+
+    def undo(self, record_id: int | None = None) -> LabelEntry | None:
+        """Undo `record_id`, or the most recent label still in effect."""
+        with self._condition:
+            if record_id is None:
+                if not self._effective:
+                    return None
+                record_id = next(reversed(self._effective))
+            entry = self._effective.pop(record_id, None)
+            if entry is not None:
+                self._enqueue(JournalOp("undo", record_id))
+        return entry
+
+    def relabel(self, record_ids: Iterable[int], label: str) -> list[int]:
+        """
+        Give every record in `record_ids` that is still in effect `label`.
+
+        Returns the ids of the changed records. Records that already have
+        `label` are left out; if none change, nothing is appended. Records
+        no longer in memory since a checkpoint are relabeled as asked; the
+        store skips ones that were undone.
+        """
+        with self._condition:
+            changed = []
+            for record_id in record_ids:
+                entry = self._effective.get(record_id)
+                if entry is None:
+                    if record_id <= self.checkpoint_id:
+                        changed.append(record_id)
+                elif entry.label != label:
+                    self._effective[record_id] = replace(entry, label=label)
+                    changed.append(record_id)
+            if changed:
+                self._enqueue(
+                    JournalOp("relabel", max(changed), record_ids=changed, label=label)
+                )
+        return changed
+
+    def entries(self) -> list[LabelEntry]:
+        with self._condition:
+            return list(self._effective.values())
+
+    def __len__(self) -> int:
+        return len(self._effective)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Block until everything appended so far is durable and delivered.
+
+        Returns False on timeout, or once an attempt made after the call
+        fails; the operations stay queued and are retried.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._flush_waiters += 1
+            self._condition.notify_all()
+            attempts = self._attempts
+            try:
+                while self._ring or self._in_flight or self._undelivered:
+                    if self.error is not None and self._attempts > attempts:
+                        return False
+                    remaining = (
+                        None if deadline is None else deadline - time.monotonic()
+                    )
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+            finally:
+                self._flush_waiters -= 1
+        return True
+
+    def checkpoint(self) -> bool:
+        """
+        Truncate the file to one `checkpoint` line, once everything appended
+        so far is durable and delivered to the sinks, and forget all but
+        the latest `CHECKPOINT_KEEP` entries. Returns False, leaving the
+        file as it is, if that could not be done right now or the sinks are
+        not `durable_sinks`.
+        """
+        if not self.durable_sinks or not self.flush():
+            return False
+        with self._condition:
+            # The flusher only writes with `_in_flight` set, under this lock.
+            if self._ring or self._in_flight or self._undelivered:
+                return False
+            last_record_id = self._next_id - 1
+            tmp = self.path.with_suffix(".tmp")
+            try:
+                with open(tmp, "w", encoding="utf-8") as file:
+                    file.write(JournalOp("checkpoint", last_record_id).to_json() + "\n")
+                    file.flush()
+                    if self.fsync:
+                        os.fsync(file.fileno())
+                self._file.close()
+                os.replace(tmp, self.path)
+                if self.fsync:
+                    # Appends go to the new file; its name must be durable too.
+                    fsync_directory(self.path.parent)
+            except OSError as error:
+                print(f"[red]Failed to checkpoint label journal:[/red] {error}")
+                return False
+            finally:
+                # Append to whichever file is at `path` now.
+                self._file.close()
+                self._file = open(self.path, "a", encoding="utf-8")
+            self.checkpoint_id = last_record_id
+            stale = len(self._effective) - self.CHECKPOINT_KEEP
+            for record_id in list(itertools.islice(self._effective, max(stale, 0))):
+                del self._effective[record_id]
+        return True
+
+    def close(self) -> bool:
+        """Flush and stop; returns False if operations had to be given up."""
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._file.close()
+        lost = len(self._ring) + sum(len(ops) for ops in self._undelivered.values())
+        if lost:
+            print(
+                f"[red]Label journal closed with {lost} operations pending:[/red] "
+                f"{self.error}"
+            )
+        return not lost
+
+    @staticmethod
+    def read_ops(path: str | Path) -> Iterator[JournalOp]:
+        path = Path(path)
+        if not path.exists():
+            return
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield JournalOp.from_json(line)
+                except (ValueError, KeyError, TypeError):
+                    # Torn write from a crash mid-line; nothing after it was acknowledged.
+                    print(
+                        f"[yellow]Skipping unreadable journal line in {path}[/yellow]"
+                    )
+
+    @classmethod
+    def replay(cls, path: str | Path) -> list[LabelEntry]:
+        effective: dict[int, LabelEntry] = {}
+        for op in cls.read_ops(path):
+            cls._apply(effective, op)
+        return list(effective.values())
+
+    # --- Internals ---
+
+    @staticmethod
+    def _apply(effective: dict[int, LabelEntry], op: JournalOp) -> None:
+        if op.op == "record" and op.entry is not None:
+            effective[op.record_id] = op.entry
+        elif op.op == "undo":
+            effective.pop(op.record_id, None)
+        elif op.op == "relabel" and op.label is not None:
+            for record_id in op.record_ids:
+                entry = effective.get(record_id)
+                if entry is not None:
+                    effective[record_id] = replace(entry, label=op.label)
+
+    @staticmethod
+    def _ends_with_newline(path: Path) -> bool:
+        with open(path, "rb") as file:
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b"\n"
+
+    def _enqueue(self, op: JournalOp) -> None:
+        # Caller holds the condition. A full ring applies backpressure.
+        while len(self._ring) >= self.capacity and not self._closed:
+            self._condition.notify_all()
+            self._condition.wait()
+        op.enqueued_at = time.perf_counter()
+        self._ring.append(op)
+        self.stats.appended += 1
+        if len(self._ring) >= self.batch_size:
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        failures = 0
+        while True:
+            with self._condition:
+                if failures:
+                    if self._closed and failures > self.CLOSE_RETRIES:
+                        return
+                    # The full backoff, whatever else is queued or flushing.
+                    delay = self.RETRY_DELAY * 2 ** (failures - 1)
+                    retry_at = time.monotonic() + min(delay, self.MAX_RETRY_DELAY)
+                    while (remaining := retry_at - time.monotonic()) > 0:
+                        self._condition.wait(remaining)
+                elif not self._ring and not self._closed:
+                    self._condition.wait()
+                if self._ring and len(self._ring) < self.batch_size and not failures:
+                    # Give a partial batch until the interval expires to fill up.
+                    oldest = self._ring[0].enqueued_at
+                    wait = self.flush_interval - (time.perf_counter() - oldest)
+                    if wait > 0 and not (self._closed or self._flush_waiters):
+                        self._condition.wait(wait)
+                if not self._ring and not self._undelivered:
+                    if self._closed:
+                        return
+                    continue
+                batch = [
+                    self._ring.popleft()
+                    for _ in range(min(len(self._ring), self.batch_size))
+                ]
+                self._in_flight = len(batch)
+                self._condition.notify_all()
+
+            written = self._write(batch) if batch else True
+            delivered = written and self._deliver(batch)
+
+            with self._condition:
+                if not written:
+                    # Nothing was acknowledged as durable; retry it first.
+                    self._ring.extendleft(reversed(batch))
+                if delivered:
+                    failures = 0
+                    self.error = None
+                else:
+                    failures += 1
+                self._in_flight = 0
+                self._attempts += 1
+                self._condition.notify_all()
+
+    def _write(self, batch: list[JournalOp]) -> bool:
+        try:
+            if self._torn:
+                self._reopen()
+            self._file.write("".join(op.to_json() + "\n" for op in batch))
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        except OSError as error:
+            print(f"[red]Failed to write label journal:[/red] {error}")
+            self.error = error
+            self.stats.write_failures += 1
+            # Part of the batch may have reached the file; replaying an
+            # operation twice is harmless, a line cut short is not.
+            self._torn = True
+            return False
+        self._torn = False
+
+        now = time.perf_counter()
+        self.stats.flushed += len(batch)
+        self.stats.batches += 1
+        self.stats.max_durable_latency = max(
+            self.stats.max_durable_latency, now - batch[0].enqueued_at
+        )
+        return True
+
+    def _reopen(self) -> None:
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() and not self._ends_with_newline(self.path):
+            self._file.write("\n")
+
+    def _deliver(self, batch: list[JournalOp]) -> bool:
+        delivered = True
+        for position, sink in enumerate(self.sinks):
+            # Kept in `_undelivered` until taken, so `flush()` keeps waiting.
+            ops = self._undelivered.get(position, []) + batch
+            if not ops:
+                continue
+            try:
+                sink(ops)
+                self._undelivered.pop(position, None)
+            except Exception as error:
+                print(f"[red]Label journal sink failed:[/red] {error}")
+                self._undelivered[position] = ops
+                self.error = error
+                self.stats.sink_failures += 1
+                delivered = False
+        return delivered
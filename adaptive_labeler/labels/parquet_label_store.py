@@ -0,0 +1,445 @@
+from __future__ import annotations
+from dataclasses import replace
+from pathlib import Path
+from typing import Iterable, Mapping, Sequence
+import os
+import threading
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from adaptive_labeler.labels.label_journal import (
+    JournalOp,
+    LabelEntry,
+    fsync_directory,
+)
+
+SEVERITY_PREFIX = "sev_"
+
+BASE_SCHEMA = pa.schema(
+    [
+        ("record_id", pa.int64()),
+        ("image_path", pa.string()),
+        ("label", pa.string()),
+        ("seed", pa.int64()),
+        ("timestamp", pa.float64()),
+        ("master_severity", pa.float32()),
+        ("dominant_op", pa.string()),
+    ]
+)
+
+TOMBSTONE_SCHEMA = pa.schema([("record_id", pa.int64())])
+
+OVERRIDE_SCHEMA = pa.schema([("record_id", pa.int64()), ("label", pa.string())])
+
+
+def severity_column(noise_op: str) -> str:
+    return f"{SEVERITY_PREFIX}{noise_op}"
+
+
+def _write_durably(table: pa.Table, path: Path, **kwargs) -> None:
+    """
+    Write `table` to `path` whole or not at all: a crash mid-write leaves a
+    `.tmp` file behind instead of a truncated part, and once this returns
+    the file and its directory entry are on disk.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    pq.write_table(table, tmp, **kwargs)
+    with open(tmp, "rb") as file:
+        os.fsync(file.fileno())
+    os.replace(tmp, path)
+    fsync_directory(path.parent)
+
+
+class ParquetLabelStore:
+    """
+    Columnar label store on Parquet.
+
+    Each appended batch becomes a small part file, undone labels become
+    tombstone parts and relabels become override parts of (record id, new
+    label), so changing a label never rewrites a data file. Overrides are
+    read once into an in-memory index, latest wins, which every relabel
+    then updates; it resolves the `label` column and label filters on every
+    query. Once `compact_every` label and override parts pile up they are
+    merged, tombstones and overrides applied, into a single
+    `labels.parquet`. Image paths are stored relative to `root_dir`, so a
+    project can move between machines.
+
+    Every part is written to a temporary name, fsynced and renamed into
+    place, so once `append()` returns its labels survive a power loss and a
+    crash never leaves a part that cannot be read.
+
+    Every op's severity gets its own `sev_<op>` column, which lets queries
+    read only the columns they need and push filters down to row groups.
+    """
+
+    COMPACTED_NAME = "labels.parquet"
+
+    def __init__(
+        self,
+        directory: str | Path,
+        root_dir: str | Path | None = None,
+        compact_every: int = 32,
+    ):
+        self.directory = Path(directory)
+        self.root_dir = Path(root_dir).resolve() if root_dir else None
+        self.compact_every = compact_every
+
+        self.parts_dir = self.directory / "parts"
+        self.tombstones_dir = self.directory / "tombstones"
+        self.overrides_dir = self.directory / "overrides"
+        for directory in (self.parts_dir, self.tombstones_dir, self.overrides_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+            # Writes a crash interrupted; what they held is still in the journal.
+            for tmp in directory.glob("*.tmp"):
+                tmp.unlink()
+
+        self._lock = threading.RLock()
+        self._next_part = self._max_part_number() + 1
+        # Bumped on every write, so readers can tell their view went stale.
+        self.version = 0
+        # Latest relabel per record, read from the override parts on first use.
+        self._overrides: dict[int, str] | None = None
+        # The same as (record ids, labels) arrays; rebuilt after a relabel.
+        self._override_arrays: tuple[pa.Array, pa.Array] | None = None
+
+    # --- Writing ---
+
+    def append(
+        self,
+        entries: Sequence[LabelEntry],
+        undone_ids: Iterable[int] = (),
+        relabels: Mapping[int, str] | None = None,
+    ) -> None:
+        """Add `entries`, drop `undone_ids` and give records new `relabels`."""
+        undone_ids = list(undone_ids)
+        relabels = dict(relabels or {})
+        with self._lock:
+            if entries:
+                table = self._entries_to_table(entries)
+                _write_durably(table, self._part_path(self.parts_dir))
+            if undone_ids:
+                table = pa.table({"record_id": undone_ids}, schema=TOMBSTONE_SCHEMA)
+                _write_durably(table, self._part_path(self.tombstones_dir))
+            if relabels:
+                table = pa.table(
+                    {"record_id": list(relabels), "label": list(relabels.values())},
+                    schema=OVERRIDE_SCHEMA,
+                )
+                _write_durably(table, self._part_path(self.overrides_dir))
+                if self._overrides is not None:
+                    self._overrides.update(relabels)
+                self._override_arrays = None
+            if entries or undone_ids or relabels:
+                self.version += 1
+            parts = len(self._part_files()) + len(self._override_files())
+            if parts >= self.compact_every:
+                self.compact()
+
+    def journal_sink(self, batch: list[JournalOp]) -> None:
+        """`LabelJournal` sink: mirrors each durable batch into the store."""
+        entries = [op.entry for op in batch if op.op == "record" and op.entry]
+        undone = [op.record_id for op in batch if op.op == "undo"]
+        relabels = {
+            record_id: op.label
+            for op in batch
+            if op.op == "relabel" and op.label is not None
+            for record_id in op.record_ids
+        }
+        self.append(entries, undone, relabels)
+
+    def sync_from(self, ops: Iterable[JournalOp]) -> int:
+        """
+        Catch up on journal operations the store may have missed, e.g. the
+        journal's tail after a crash: append the records it has not seen,
+        tombstone the undone ones it still has and apply the relabels it
+        missed. Replaying operations it already holds changes nothing, and
+        only the records they touch are read. Returns how many records
+        changed.
+        """
+        ops = [op for op in ops if op.op != "checkpoint"]
+        touched = {
+            record_id for op in ops for record_id in op.record_ids or [op.record_id]
+        }
+        with self._lock:
+            known = self._labels_of(touched)
+            # Each touched record's label once the operations are applied.
+            labels = dict(known)
+            recorded: dict[int, LabelEntry] = {}
+            for op in ops:
+                if op.op == "record" and op.entry is not None:
+                    labels[op.record_id] = op.entry.label
+                    recorded[op.record_id] = op.entry
+                elif op.op == "undo":
+                    labels.pop(op.record_id, None)
+                elif op.op == "relabel" and op.label is not None:
+                    for record_id in op.record_ids:
+                        if record_id in labels:
+                            labels[record_id] = op.label
+
+            missing = [
+                replace(recorded[record_id], label=label)
+                for record_id, label in labels.items()
+                if record_id not in known
+            ]
+            undone = sorted(known.keys() - labels.keys())
+            relabels = {
+                record_id: label
+                for record_id, label in labels.items()
+                if record_id in known and known[record_id] != label
+            }
+            self.append(missing, undone, relabels)
+        return len(missing) + len(undone) + len(relabels)
+
+    def compact(self) -> None:
+        """Merge every part into one file, applying tombstones and overrides."""
+        with self._lock:
+            parts = self._part_files()
+            tombstones = self._tombstone_files()
+            overrides = self._override_files()
+            if not parts and not tombstones and not overrides:
+                return
+
+            table = self._resolve_labels(
+                self._dataset().to_table(filter=self._live_filter())
+            )
+            _write_durably(
+                table,
+                self.directory / self.COMPACTED_NAME,
+                row_group_size=64 * 1024,
+            )
+
+            for file in parts + tombstones + overrides:
+                file.unlink()
+            self._overrides = {}
+            self._override_arrays = None
+            self.version += 1
+
+    # --- Reading ---
+
+    def query(
+        self,
+        columns: list[str] | None = None,
+        label: str | None = None,
+        noise_op: str | None = None,
+        severity_range: tuple[float, float] | None = None,
+        record_id_range: tuple[int, int] | None = None,
+    ) -> pa.Table:
+        """
+        Labels matching every given predicate.
+
+        `noise_op` keeps rows where that op was applied; `severity_range`
+        then bounds that op's severity, or the master severity without one.
+        `record_id_range` is inclusive and, since ids grow with every label,
+        only touches the row groups that hold them.
+        """
+        with self._lock:
+            dataset = self._dataset()
+            if dataset is None or (
+                noise_op is not None
+                and severity_column(noise_op) not in dataset.schema.names
+            ):
+                schema = dataset.schema if dataset else BASE_SCHEMA
+                names = [c for c in columns or schema.names if c in schema.names]
+                return schema.empty_table().select(names)
+
+            expression = self._live_filter()
+            if label is not None:
+                expression &= self._label_filter(label)
+
+            severity = pc.field("master_severity")
+            if noise_op is not None:
+                severity = pc.field(severity_column(noise_op))
+                expression &= severity > 0
+            if severity_range is not None:
+                low, high = severity_range
+                expression &= (severity >= low) & (severity <= high)
+            if record_id_range is not None:
+                first, last = record_id_range
+                record_id = pc.field("record_id")
+                expression &= (record_id >= first) & (record_id <= last)
+
+            # Overridden labels are looked up by record id.
+            extra = (
+                ["record_id"]
+                if columns and "label" in columns and "record_id" not in columns
+                else []
+            )
+            table = dataset.to_table(
+                columns=columns and columns + extra, filter=expression
+            )
+            return self._resolve_labels(table).drop_columns(extra)
+
+    def count(self) -> int:
+        with self._lock:
+            dataset = self._dataset()
+            return dataset.count_rows(filter=self._live_filter()) if dataset else 0
+
+    def label_counts(self) -> dict[str, int]:
+        """Number of labels per image path, as stored."""
+        table = self.query(columns=["image_path"])
+        counts = table.group_by("image_path").aggregate([("image_path", "count")])
+        return dict(
+            zip(
+                counts.column("image_path").to_pylist(),
+                counts.column("image_path_count").to_pylist(),
+            )
+        )
+
+    def noise_ops(self) -> list[str]:
+        with self._lock:
+            dataset = self._dataset()
+            names = dataset.schema.names if dataset else []
+        return [
+            name.removeprefix(SEVERITY_PREFIX)
+            for name in names
+            if name.startswith(SEVERITY_PREFIX)
+        ]
+
+    def absolute_path(self, image_path: str) -> Path:
+        path = Path(image_path)
+        return path if path.is_absolute() or not self.root_dir else self.root_dir / path
+
+    # --- Internals ---
+
+    def _relative_path(self, image_path: str) -> str:
+        if not self.root_dir:
+            return image_path
+        try:
+            return Path(image_path).resolve().relative_to(self.root_dir).as_posix()
+        except ValueError:
+            return image_path
+
+    def _entries_to_table(self, entries: Sequence[LabelEntry]) -> pa.Table:
+        noise_ops = sorted({name for entry in entries for name in entry.severities})
+        columns = {
+            "record_id": [entry.record_id for entry in entries],
+            "image_path": [self._relative_path(entry.image_path) for entry in entries],
+            "label": [entry.label for entry in entries],
+            "seed": [entry.seed for entry in entries],
+            "timestamp": [entry.timestamp for entry in entries],
+            "master_severity": [sum(entry.severities.values()) for entry in entries],
+            "dominant_op": [
+                (
+                    max(entry.severities, key=entry.severities.get)
+                    if any(entry.severities.values())
+                    else None
+                )
+                for entry in entries
+            ],
+        }
+        schema = BASE_SCHEMA
+        for noise_op in noise_ops:
+            name = severity_column(noise_op)
+            columns[name] = [entry.severities.get(noise_op, 0.0) for entry in entries]
+            schema = schema.append(pa.field(name, pa.float64()))
+        return pa.table(columns, schema=schema)
+
+    def _part_path(self, directory: Path) -> Path:
+        path = directory / f"part-{self._next_part:08d}.parquet"
+        self._next_part += 1
+        return path
+
+    def _part_files(self) -> list[Path]:
+        return sorted(self.parts_dir.glob("part-*.parquet"))
+
+    def _tombstone_files(self) -> list[Path]:
+        return sorted(self.tombstones_dir.glob("part-*.parquet"))
+
+    def _override_files(self) -> list[Path]:
+        return sorted(self.overrides_dir.glob("part-*.parquet"))
+
+    def _max_part_number(self) -> int:
+        numbers = [
+            int(path.stem.split("-")[1])
+            for path in self._part_files()
+            + self._tombstone_files()
+            + self._override_files()
+        ]
+        return max(numbers, default=0)
+
+    def _data_files(self) -> list[Path]:
+        compacted = self.directory / self.COMPACTED_NAME
+        return ([compacted] if compacted.exists() else []) + self._part_files()
+
+    def _dataset(self) -> ds.Dataset | None:
+        files = self._data_files()
+        if not files:
+            return None
+        # Parts may know different noise ops; missing severity columns read as null.
+        schema = pa.unify_schemas([pq.read_schema(file) for file in files])
+        return ds.dataset(
+            [str(file) for file in files], schema=schema, format="parquet"
+        )
+
+    def _live_filter(self) -> ds.Expression:
+        files = self._tombstone_files()
+        if not files:
+            return pc.scalar(True)
+        undone = pa.concat_tables([pq.read_table(file) for file in files])
+        return ~pc.field("record_id").isin(undone.column("record_id"))
+
+    def _labels_of(self, record_ids: set[int]) -> dict[int, str]:
+        """Current label of each of `record_ids` still in the store."""
+        dataset = self._dataset()
+        if dataset is None or not record_ids:
+            return {}
+        record_id = pc.field("record_id")
+        expression = (
+            self._live_filter()
+            # The range lets row groups that hold none of them be skipped.
+            & (record_id >= min(record_ids))
+            & (record_id <= max(record_ids))
+            & record_id.isin(pa.array(sorted(record_ids), pa.int64()))
+        )
+        table = self._resolve_labels(
+            dataset.to_table(columns=["record_id", "label"], filter=expression)
+        )
+        return dict(
+            zip(
+                table.column("record_id").to_pylist(), table.column("label").to_pylist()
+            )
+        )
+
+    def _override_index(self) -> tuple[pa.Array, pa.Array] | None:
+        """Record ids and their latest relabel; the parts are only read once."""
+        if self._overrides is None:
+            self._overrides = {}
+            # Parts are in write order, so a later relabel of an id wins.
+            for file in self._override_files():
+                table = pq.read_table(file)
+                self._overrides.update(
+                    zip(
+                        table.column("record_id").to_pylist(),
+                        table.column("label").to_pylist(),
+                    )
+                )
+        if not self._overrides:
+            return None
+        if self._override_arrays is None:
+            self._override_arrays = (
+                pa.array(list(self._overrides), pa.int64()),
+                pa.array(list(self._overrides.values()), pa.string()),
+            )
+        return self._override_arrays
+
+    def _label_filter(self, label: str) -> ds.Expression:
+        expression = pc.field("label") == label
+        overrides = self._override_index()
+        if overrides is None:
+            return expression
+        record_ids, labels = overrides
+        record_id = pc.field("record_id")
+        relabeled = record_ids.filter(pc.equal(labels, label))
+        return (expression & ~record_id.isin(record_ids)) | record_id.isin(relabeled)
+
+    def _resolve_labels(self, table: pa.Table) -> pa.Table:
+        overrides = self._override_index()
+        if overrides is None or "label" not in table.column_names:
+            return table
+        record_ids, labels = overrides
+        positions = pc.index_in(table.column("record_id"), value_set=record_ids)
+        resolved = pc.coalesce(labels.take(positions), table.column("label"))
+        return table.set_column(table.column_names.index("label"), "label", resolved)
@@ -0,0 +1,186 @@
+from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Generic, TypeVar
+import threading
+
+import numpy as np
+import pyarrow as pa
+
+from adaptive_labeler.imaging.noise_chain import RenderSpec, mark_background
+from adaptive_labeler.labels.parquet_label_store import (
+    SEVERITY_PREFIX,
+    ParquetLabelStore,
+)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ReviewRecord:
+    record_id: int
+    image_path: Path
+    label: str
+    render_spec: RenderSpec
+
+
+class ReviewCursor(Generic[T]):
+    """
+    Lazy, paged walk over the labels in a `ParquetLabelStore`.
+
+    Only the live record ids are held for the whole store (8 bytes a label).
+    Record metadata is read `page_size` rows at a time into a small LRU of
+    pages, and `prepare` - typically decoding and rendering the images - runs
+    in the background for the current record and `neighbours` either side.
+    Anything further away is dropped, so memory stays flat however many
+    labels there are. With `label` set, only records with that label are
+    walked.
+    """
+
+    def __init__(
+        self,
+        store: ParquetLabelStore,
+        prepare: Callable[[ReviewRecord], T],
+        page_size: int = 128,
+        max_pages: int = 4,
+        neighbours: int = 2,
+        label: str | None = None,
+    ):
+        self.store = store
+        self.prepare = prepare
+        self.page_size = max(page_size, 1)
+        self.max_pages = max(max_pages, 1)
+        self.neighbours = max(neighbours, 0)
+        self.label = label
+        self.index = 0
+
+        self._record_ids = np.empty(0, dtype=np.int64)
+        self._version: int | None = None
+        self._pages: OrderedDict[int, list[ReviewRecord]] = OrderedDict()
+        self._prepared: dict[int, Future[T]] = {}
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="review-prefetch",
+            initializer=mark_background,
+        )
+
+    # --- Public API ---
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh_if_stale()
+            return len(self._record_ids)
+
+    def record_ids(self) -> np.ndarray:
+        """Every record id in order, e.g. to select all under the label filter."""
+        with self._lock:
+            self._refresh_if_stale()
+            return self._record_ids.copy()
+
+    def record(self, index: int) -> ReviewRecord:
+        with self._lock:
+            self._refresh_if_stale()
+            page_number, offset = divmod(index, self.page_size)
+            return self._page(page_number)[offset]
+
+    def set_label(self, label: str | None) -> None:
+        """Walk only records labeled `label`, or every record with None."""
+        with self._lock:
+            if label == self.label:
+                return
+            self.label = label
+            self.index = 0
+            self._version = None
+
+    def step(self, direction: int) -> tuple[ReviewRecord, T] | None:
+        """Move by `direction` (wrapping around) and return the record and its images."""
+        return self.seek(self.index + direction)
+
+    def seek(self, index: int) -> tuple[ReviewRecord, T] | None:
+        """Jump to `index` (wrapping around), e.g. a tile picked in the grid."""
+        with self._lock:
+            n = len(self)
+            if n == 0:
+                return None
+            self.index = index % n
+            current = self._schedule_window()
+            record = self.record(self.index)
+        return record, current.result()
+
+    def close(self) -> None:
+        with self._lock:
+            for future in self._prepared.values():
+                future.cancel()
+            self._prepared.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Internals ---
+
+    def _refresh_if_stale(self) -> None:
+        if self._version == self.store.version:
+            return
+        table = self.store.query(columns=["record_id"], label=self.label)
+        self._record_ids = np.sort(table.column("record_id").to_numpy())
+        self._version = self.store.version
+        self._pages.clear()
+        for future in self._prepared.values():
+            future.cancel()
+        self._prepared.clear()
+        self.index = min(self.index, max(len(self._record_ids) - 1, 0))
+
+    def _schedule_window(self) -> Future[T]:
+        n = len(self._record_ids)
+        window = {
+            (self.index + offset) % n
+            for offset in range(-self.neighbours, self.neighbours + 1)
+        }
+        for index in list(self._prepared):
+            if index not in window:
+                self._prepared.pop(index).cancel()
+        for index in sorted(window, key=lambda i: i != self.index):
+            if index not in self._prepared:
+                record = self.record(index)
+                self._prepared[index] = self._executor.submit(self.prepare, record)
+        return self._prepared[self.index]
+
+    def _page(self, page_number: int) -> list[ReviewRecord]:
+        page = self._pages.get(page_number)
+        if page is not None:
+            self._pages.move_to_end(page_number)
+            return page
+
+        ids = self._record_ids[
+            page_number * self.page_size : (page_number + 1) * self.page_size
+        ]
+        table = self.store.query(
+            label=self.label, record_id_range=(int(ids[0]), int(ids[-1]))
+        )
+        page = sorted(self._records(table), key=lambda record: record.record_id)
+        self._pages[page_number] = page
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return page
+
+    def _records(self, table: pa.Table) -> list[ReviewRecord]:
+        severity_columns = [
+            name for name in table.column_names if name.startswith(SEVERITY_PREFIX)
+        ]
+        records = []
+        for row in table.to_pylist():
+            severities = tuple(
+                (name.removeprefix(SEVERITY_PREFIX), row[name])
+                for name in severity_columns
+                if row[name] is not None
+            )
+            records.append(
+                ReviewRecord(
+                    record_id=row["record_id"],
+                    image_path=self.store.absolute_path(row["image_path"]),
+                    label=row["label"],
+                    render_spec=RenderSpec(severities, row["seed"]),
+                )
+            )
+        return records
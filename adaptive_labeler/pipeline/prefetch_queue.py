@@ -0,0 +1,262 @@
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Collection, Mapping
+import threading
+
+from rich import print
+
+from adaptive_labeler.imaging.array_engine import bind_array_ops
+from adaptive_labeler.imaging.display_proxy import DisplayProxy
+from adaptive_labeler.imaging.image_cache import ImageCache, encode_base64
+from adaptive_labeler.imaging.noise_chain import (
+    RenderSpec,
+    mark_background,
+    new_seed,
+    render_chain,
+    seeded,
+    split_master_severity,
+)
+from adaptive_labeler.imaging.preview_renderer import PreviewRenderer
+from adaptive_labeler.runtime.tracing import span
+
+if TYPE_CHECKING:
+    from image_utils.noisy_image_maker import NoisyImageMaker
+    from labeling.label_manager import LabelManager
+
+
+@dataclass
+class PreparedImagePair:
+    noisy_image_maker: NoisyImageMaker
+    original_image_base64: str
+    noisy_image_base64: str
+    render_spec: RenderSpec
+    generation: int = 0
+    # Master slider value the pair was rendered at.
+    master: float = 0.0
+
+    @property
+    def image_name(self) -> str:
+        return self.noisy_image_maker.image_path.name
+
+
+@dataclass
+class PrefetchStats:
+    hits: int = 0
+    misses: int = 0
+    discarded: int = 0
+    skipped: int = 0
+
+
+class PrefetchQueue:
+    """
+    Bounded queue of image pairs prepared ahead of time by a worker pool.
+
+    Each entry is rendered at the severity state the next pair starts from:
+    `severity_state`, or the split of `start_master` when one is given.
+    Changing that state, or calling `invalidate()` once `start_master` would
+    answer differently, bumps the generation: queued entries are cancelled,
+    or dropped and released if already being prepared, and the queue refills
+    for the new generation.
+    """
+
+    # Makers passed over in a row by `skip` before one is used regardless.
+    MAX_SKIPS = 32
+
+    def __init__(
+        self,
+        label_manager: LabelManager,
+        depth: int = 3,
+        workers: int = 2,
+        severity_state: Mapping[str, float] | None = None,
+        display_proxy: DisplayProxy | None = None,
+        preview_renderer: PreviewRenderer | None = None,
+        array_ops: Collection[str] = (),
+        source: Callable[[], tuple[NoisyImageMaker, int]] | None = None,
+        render_noisy: Callable[[NoisyImageMaker, RenderSpec], str] | None = None,
+        start_master: Callable[[NoisyImageMaker, int], float] | None = None,
+        skip: Callable[[NoisyImageMaker], bool] | None = None,
+        release: Callable[[NoisyImageMaker], None] | None = None,
+        publish: Callable[[str], str] | None = None,
+    ):
+        self.label_manager = label_manager
+        self.array_ops = frozenset(array_ops)
+        # Where makers and their seeds come from, e.g. a `PregenerationJob`.
+        self.source = source
+        # Overrides the built-in noisy render, e.g. to go through a render cache.
+        self.render_noisy = render_noisy
+        # Per-pair starting master value, e.g. from a `SeverityScheduler`; the
+        # pair is rendered at that value's split instead of `severity_state`.
+        self.start_master = start_master
+        # Makers not worth showing, e.g. near-duplicates of labeled images.
+        self.skip = skip
+        # Called with each skipped maker, e.g. to free its pre-generated renders.
+        self.release = release
+        # Called with each encoded image, e.g. to hand it to an `ImageServer`
+        # here on the worker rather than when it is shown.
+        self.publish = publish
+        self.display_proxy = display_proxy
+        self.preview_renderer = preview_renderer
+        self.depth = max(depth, 0)
+        self.stats = PrefetchStats()
+        # Counters are bumped from the workers and from `take()`.
+        self._stats_lock = threading.Lock()
+
+        self._severity_state = dict(severity_state or {})
+        self._generation = 0
+        self._pending: deque[Future[PreparedImagePair]] = deque()
+        self._lock = threading.Lock()
+        # LabelManager is not documented as thread-safe, so sample creation is serialized.
+        self._manager_lock = threading.Lock()
+        self._executor = (
+            ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix="prefetch",
+                initializer=mark_background,
+            )
+            if self.depth
+            else None
+        )
+
+        self._fill()
+
+    # --- Public API ---
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def set_severity_state(self, severity_state: Mapping[str, float]) -> None:
+        """Change the starting severities; pairs queued for the old ones go stale."""
+        severity_state = dict(severity_state)
+        with self._lock:
+            if severity_state == self._severity_state:
+                return
+            self._severity_state = severity_state
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Queued pairs go stale, e.g. once `start_master` has a new fit."""
+        with self._lock:
+            self._generation += 1
+            stale, self._pending = self._pending, deque()
+        for future in stale:
+            self._count("discarded")
+            if not future.cancel():
+                future.add_done_callback(self._release_stale)
+        self._fill()
+
+    def take(self) -> PreparedImagePair:
+        """Return the next prepared pair, preparing one inline on a miss."""
+        while True:
+            with self._lock:
+                future = self._pending.popleft() if self._pending else None
+
+            if future is None:
+                self._count("misses")
+                pair = self._prepare()
+                break
+
+            ready = future.done()
+            try:
+                pair = future.result()
+            except Exception as error:
+                print(f"[red]Prefetch failed:[/red] {error}")
+                continue
+
+            self._count("hits" if ready else "misses")
+            break
+
+        self._fill()
+        return pair
+
+    def close(self) -> None:
+        with self._lock:
+            for future in self._pending:
+                future.cancel()
+            self._pending.clear()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # --- Internals ---
+
+    def _count(self, stat: str) -> None:
+        with self._stats_lock:
+            setattr(self.stats, stat, getattr(self.stats, stat) + 1)
+
+    def _release_stale(self, future: Future[PreparedImagePair]) -> None:
+        if self.release and not future.cancelled() and not future.exception():
+            self.release(future.result().noisy_image_maker)
+
+    def _fill(self) -> None:
+        with self._lock:
+            if not self._executor:
+                return
+            while len(self._pending) < self.depth:
+                self._pending.append(self._executor.submit(self._prepare))
+
+    def _next_maker(self) -> tuple[NoisyImageMaker, int]:
+        if self.source:
+            return self.source()
+        with self._manager_lock:
+            return self.label_manager.new_noisy_image_maker(), new_seed()
+
+    def _prepare(self) -> PreparedImagePair:
+        with self._lock:
+            generation = self._generation
+            severity_state = self._severity_state
+        maker, seed = self._next_maker()
+        for _ in range(self.MAX_SKIPS):
+            if not (self.skip and self.skip(maker)):
+                break
+            self._count("skipped")
+            if self.release:
+                self.release(maker)
+            maker, seed = self._next_maker()
+        bind_array_ops(maker, self.array_ops)
+
+        master = 0.0
+        if self.start_master:
+            master = self.start_master(maker, seed)
+            severity_state = split_master_severity(
+                master, [noise_op.name for noise_op in maker.noise_operations], seed
+            )
+        for noise_op in maker.noise_operations:
+            maker.update_severity(noise_op.name, severity_state.get(noise_op.name, 0.0))
+
+        spec = RenderSpec.from_maker(maker, seed)
+        proxy = self.display_proxy
+        if proxy:
+            original_base64 = proxy.original_base64(maker.image_path)
+        else:
+            original_base64 = ImageCache.shared().original_base64(maker.image_path)
+
+        if self.render_noisy:
+            noisy_base64 = self.render_noisy(maker, spec)
+        elif self.preview_renderer:
+            preview = self.preview_renderer.render(maker, spec)
+            noisy_base64 = proxy.encode(preview) if proxy else encode_base64(preview)
+        elif proxy:
+            # Proxied before it is encoded, not decoded and encoded again.
+            source = ImageCache.shared().decoded(maker.image_path)
+            with span("noisy_render"):
+                noisy = render_chain(source.copy(), maker.noise_operations, spec)
+            noisy_base64 = proxy.encode(noisy)
+        else:
+            with span("noisy_base64"), seeded(spec.seed):
+                noisy_base64 = maker.noisy_base64()
+
+        if self.publish:
+            self.publish(original_base64)
+            self.publish(noisy_base64)
+
+        return PreparedImagePair(
+            noisy_image_maker=maker,
+            original_image_base64=original_base64,
+            noisy_image_base64=noisy_base64,
+            render_spec=spec,
+            generation=generation,
+            master=master,
+        )
@@ -0,0 +1,416 @@
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Collection, Sequence
+import base64
+import json
+import os
+import threading
+
+from PIL import Image as PILImage
+from rich import print
+
+from adaptive_labeler.imaging.array_engine import bind_array_ops
+from adaptive_labeler.imaging.image_cache import Size, image_file
+from adaptive_labeler.imaging.noise_chain import (
+    RenderSpec,
+    new_seed,
+    render_chain,
+    split_master_severity,
+)
+from adaptive_labeler.imaging.render_cache import content_hash, severity_key
+
+if TYPE_CHECKING:
+    from image_utils.noisy_image_maker import NoisyImageMaker
+    from labeling.label_manager import LabelManager
+
+
+Severities = tuple[tuple[str, float], ...]
+
+
+@dataclass(frozen=True)
+class PregeneratedRender:
+    digest: str
+    severities: Severities
+    seed: int
+    file: str
+    nbytes: int
+    # Size of the source the chain noised, which a render is only served at:
+    # per-pixel noise drawn at another size does not survive resizing.
+    size: Size | None = None
+
+
+@dataclass
+class PregenerationStats:
+    images: int = 0
+    renders: int = 0
+    hits: int = 0
+    misses: int = 0
+    released: int = 0
+
+
+class PregeneratedPool:
+    """
+    Disk pool of noisy renders made ahead of time, under `directory`.
+
+    Renders are JPEG files indexed by an append-only `manifest.jsonl`. On
+    open the manifest is replayed and rewritten with only the live entries,
+    and files it does not list (left by a crash between writing a render and
+    recording it) are removed, so a restarted session picks up where the
+    last one stopped.
+    """
+
+    MANIFEST_NAME = "manifest.jsonl"
+
+    def __init__(self, directory: str | Path, max_bytes: int = 512 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.stats = PregenerationStats()
+
+        self._renders: dict[
+            tuple[str, Severities, int, Size | None], PregeneratedRender
+        ] = {}
+        self._by_image: dict[str, list[PregeneratedRender]] = {}
+        # Released while their renders were still being made; those renders
+        # are dropped when they land instead of being indexed.
+        self._released: set[str] = set()
+        self._bytes_used = 0
+        self._lock = threading.Lock()
+
+        self._load()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / self.MANIFEST_NAME
+
+    @property
+    def bytes_used(self) -> int:
+        return self._bytes_used
+
+    def has_room(self) -> bool:
+        return self._bytes_used < self.max_bytes
+
+    def seed_for(self, digest: str) -> int | None:
+        """Seed the image was pre-generated with, so on-demand renders line up."""
+        with self._lock:
+            renders = self._by_image.get(digest)
+            return renders[0].seed if renders else None
+
+    def expect(self, digest: str) -> None:
+        """Renders for `digest` are on their way; keep them when they land."""
+        with self._lock:
+            self._released.discard(digest)
+
+    def add(self, renders: Sequence[PregeneratedRender]) -> None:
+        with self._lock:
+            stale = [
+                render
+                for render in renders
+                if render.digest in self._released
+                or not (self.directory / render.file).exists()
+            ]
+            for render in stale:
+                (self.directory / render.file).unlink(missing_ok=True)
+            renders = [render for render in renders if render not in stale]
+            if not renders:
+                return
+            with open(self.manifest_path, "a") as manifest:
+                for render in renders:
+                    manifest.write(json.dumps({"op": "add", **asdict(render)}) + "\n")
+            for render in renders:
+                self._index(render)
+            self.stats.images += bool(renders)
+            self.stats.renders += len(renders)
+
+    def load_base64(self, digest: str, spec: RenderSpec, size: Size) -> str | None:
+        """Render of `spec` noised at `size`, the size the caller would noise at."""
+        with self._lock:
+            render = self._renders.get(
+                (digest, severity_key(spec), spec.seed, tuple(size))
+            )
+        if render is None:
+            self.stats.misses += 1
+            return None
+        try:
+            data = (self.directory / render.file).read_bytes()
+        except OSError:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return base64.b64encode(data).decode("ascii")
+
+    def release(self, digest: str) -> None:
+        """Delete an image's renders once the session has moved past it."""
+        with self._lock:
+            self._released.add(digest)
+            renders = self._by_image.pop(digest, [])
+            if not renders:
+                return
+            for render in renders:
+                self._renders.pop(_key(render))
+                self._bytes_used -= render.nbytes
+                (self.directory / render.file).unlink(missing_ok=True)
+            with open(self.manifest_path, "a") as manifest:
+                manifest.write(json.dumps({"op": "release", "digest": digest}) + "\n")
+            self.stats.released += 1
+
+    # --- Internals ---
+
+    def _index(self, render: PregeneratedRender) -> None:
+        key = _key(render)
+        if key in self._renders:
+            return
+        self._renders[key] = render
+        self._by_image.setdefault(render.digest, []).append(render)
+        self._bytes_used += render.nbytes
+
+    def _load(self) -> None:
+        if self.manifest_path.exists():
+            for line in self.manifest_path.read_text().splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line
+                if entry.pop("op") == "release":
+                    self._by_image.pop(entry["digest"], None)
+                    continue
+                entry["severities"] = tuple(map(tuple, entry["severities"]))
+                if entry.get("size") is not None:
+                    entry["size"] = tuple(entry["size"])
+                render = PregeneratedRender(**entry)
+                if (self.directory / render.file).exists():
+                    self._by_image.setdefault(render.digest, []).append(render)
+
+        live = [render for renders in self._by_image.values() for render in renders]
+        self._by_image.clear()
+        for render in live:
+            self._index(render)
+
+        keep = {render.file for render in live} | {self.MANIFEST_NAME}
+        for path in self.directory.iterdir():
+            if path.name not in keep:
+                path.unlink(missing_ok=True)
+
+        tmp = self.manifest_path.with_suffix(".tmp")
+        with open(tmp, "w") as manifest:
+            for render in live:
+                manifest.write(json.dumps({"op": "add", **asdict(render)}) + "\n")
+        os.replace(tmp, self.manifest_path)
+
+
+def _key(render: PregeneratedRender) -> tuple[str, Severities, int, Size | None]:
+    return (render.digest, render.severities, render.seed, render.size)
+
+
+# --- Worker processes ---
+
+_worker_operations: list | None = None
+
+
+@dataclass(frozen=True)
+class RenderJob:
+    image_file: str
+    seed: int
+    master_values: tuple[float, ...]
+    # Box the source is fitted into, as `ImageCache.decoded` fits previews.
+    size: Size
+    quality: int
+    directory: str
+    # Side the decoded disk cache fits sources to before the preview box.
+    prescale: int | None = None
+
+
+def _init_worker(label_manager_config: Any, array_ops: Collection[str]) -> None:
+    """Give each worker process its own noise ops, built by LabelManager."""
+    global _worker_operations
+    from labeling.label_manager import LabelManager
+
+    maker = LabelManager(label_manager_config).new_noisy_image_maker()
+    bind_array_ops(maker, array_ops)
+    _worker_operations = maker.noise_operations
+
+
+def _render_job(job: RenderJob) -> list[PregeneratedRender]:
+    path = Path(job.image_file)
+    digest = content_hash(path)
+    with PILImage.open(path) as source:
+        image = source.convert("RGB")
+    if job.prescale is not None:
+        image.thumbnail((job.prescale, job.prescale))
+    image.thumbnail(job.size)
+    names = [noise_op.name for noise_op in _worker_operations]
+
+    renders = []
+    for index, master in enumerate(job.master_values):
+        severities = split_master_severity(master, names, job.seed)
+        spec = RenderSpec(tuple(severities.items()), job.seed)
+        noisy = render_chain(image.copy(), _worker_operations, spec)
+
+        name = f"{digest}-{job.seed}-{index}.jpg"
+        tmp = Path(job.directory) / f".{name}.{os.getpid()}.tmp"
+        noisy.save(tmp, format="JPEG", quality=job.quality)
+        os.replace(tmp, Path(job.directory) / name)
+        renders.append(
+            PregeneratedRender(
+                digest=digest,
+                severities=severity_key(spec),
+                seed=job.seed,
+                file=name,
+                nbytes=(Path(job.directory) / name).stat().st_size,
+                size=image.size,
+            )
+        )
+    return renders
+
+
+# --- Scheduling ---
+
+
+class PregenerationJob:
+    """
+    Plans the next images and renders them on every core ahead of the UI.
+
+    The job takes makers from `LabelManager` up to `images` ahead of the
+    session and hands them out, in order, through `next_maker()`. Each
+    planned image is rendered in a worker process at every master value in
+    `master_values`, split across ops exactly as the master slider does for
+    that image's seed, from the source fitted into `size` the way previews
+    are. Planning pauses while the pool is over its byte
+    budget; `release()` frees an image's renders once it has been shown.
+    """
+
+    def __init__(
+        self,
+        label_manager: LabelManager,
+        label_manager_config: Any,
+        pool: PregeneratedPool,
+        master_values: Sequence[float],
+        images: int = 64,
+        workers: int | None = None,
+        size: Size = (2048, 2048),
+        quality: int = 90,
+        prescale: int | None = None,
+        array_ops: Collection[str] = (),
+    ):
+        self.label_manager = label_manager
+        self.pool = pool
+        self.master_values = tuple(master_values)
+        self.images = max(images, 1)
+        self.workers = workers or os.cpu_count() or 1
+        # Set when the preview size changes; later images render at the new size.
+        self.size = size
+        self.quality = quality
+        self.prescale = prescale
+
+        self._planned: deque[tuple[NoisyImageMaker, int]] = deque()
+        self._in_flight: set[Future] = set()
+        # Seeds of images being rendered, so an image planned twice is only
+        # rendered once.
+        self._rendering: dict[str, int] = {}
+        self._condition = threading.Condition()
+        self._manager_lock = threading.Lock()
+        self._closed = False
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(label_manager_config, tuple(array_ops)),
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="pregeneration", daemon=True
+        )
+        self._thread.start()
+
+    def next_maker(self) -> tuple[NoisyImageMaker, int]:
+        """Next planned maker and its seed; plans one inline if none is ready."""
+        with self._condition:
+            if self._planned:
+                planned = self._planned.popleft()
+                self._condition.notify_all()
+                return planned
+        with self._manager_lock:
+            maker = self.label_manager.new_noisy_image_maker()
+        digest = content_hash(maker.image_path)
+        with self._condition:
+            seed = self._rendering.get(digest)
+        if seed is None:
+            seed = self.pool.seed_for(digest)
+        return maker, seed if seed is not None else new_seed()
+
+    def release(self, maker: NoisyImageMaker) -> None:
+        self.pool.release(content_hash(maker.image_path))
+        with self._condition:
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Internals ---
+
+    def _ready_to_plan(self) -> bool:
+        return self._closed or (
+            len(self._planned) < self.images
+            and len(self._in_flight) < 2 * self.workers
+            and self.pool.has_room()
+        )
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(self._ready_to_plan)
+                if self._closed:
+                    return
+            try:
+                self._plan_one()
+            except Exception as error:
+                print(f"[red]Pre-generation failed:[/red] {error}")
+                with self._condition:
+                    self._condition.wait(1.0)
+
+    def _plan_one(self) -> None:
+        with self._manager_lock:
+            maker = self.label_manager.new_noisy_image_maker()
+        digest = content_hash(maker.image_path)
+        with self._condition:
+            seed = self._rendering.get(digest)
+        if seed is None:
+            seed = self.pool.seed_for(digest)
+
+        if seed is None:
+            # Not on disk from an earlier session: render it now.
+            seed = new_seed()
+            job = RenderJob(
+                image_file=str(image_file(maker.image_path)),
+                seed=seed,
+                master_values=self.master_values,
+                size=self.size,
+                quality=self.quality,
+                directory=str(self.pool.directory),
+                prescale=self.prescale,
+            )
+            self.pool.expect(digest)
+            future = self._executor.submit(_render_job, job)
+            with self._condition:
+                self._in_flight.add(future)
+                self._rendering[digest] = seed
+            future.add_done_callback(lambda done: self._on_rendered(done, digest))
+
+        with self._condition:
+            self._planned.append((maker, seed))
+
+    def _on_rendered(self, future: Future, digest: str) -> None:
+        try:
+            if not future.cancelled():
+                self.pool.add(future.result())
+        except Exception as error:
+            print(f"[red]Pre-generation failed:[/red] {error}")
+        finally:
+            with self._condition:
+                self._in_flight.discard(future)
+                self._rendering.pop(digest, None)
+                self._condition.notify_all()
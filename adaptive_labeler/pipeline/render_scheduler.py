@@ -0,0 +1,119 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable, Generic, TypeVar
+import threading
+
+from rich import print
+
+StateT = TypeVar("StateT")
+ResultT = TypeVar("ResultT")
+
+
+@dataclass
+class RenderStats:
+    requested: int = 0
+    rendered: int = 0
+    superseded: int = 0
+    published: int = 0
+
+
+class RenderScheduler(Generic[StateT, ResultT]):
+    """
+    Latest-wins render queue with a single worker thread.
+
+    Callers submit the desired state from any thread. Requests that arrive
+    while a render is running replace each other, so only the newest one is
+    rendered next, and a finished render is published only if no newer
+    request came in meanwhile. An older render can therefore never overwrite
+    a newer one.
+    """
+
+    def __init__(
+        self,
+        render: Callable[[StateT], ResultT],
+        publish: Callable[[ResultT], None],
+        name: str = "render-scheduler",
+    ):
+        self.render = render
+        self.publish = publish
+        self.stats = RenderStats()
+
+        self._condition = threading.Condition()
+        self._pending: tuple[int, StateT] | None = None
+        self._generation = 0
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def request(self, state: StateT) -> int:
+        with self._condition:
+            self._generation += 1
+            if self._pending is not None:
+                self.stats.superseded += 1
+            self._pending = (self._generation, state)
+            self.stats.requested += 1
+            self._condition.notify_all()
+            return self._generation
+
+    def cancel(self) -> None:
+        """Drop the pending request and keep any in-flight render from publishing."""
+        with self._condition:
+            self._generation += 1
+            if self._pending is not None:
+                self.stats.superseded += 1
+            self._pending = None
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._pending = None
+            self._condition.notify_all()
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """Block until nothing is pending or rendering; False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._closed or (self._pending is None and not self._busy),
+                timeout,
+            )
+
+    def _is_latest(self, generation: int) -> bool:
+        with self._condition:
+            return generation == self._generation
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                generation, state = self._pending
+                self._pending = None
+                self._busy = True
+
+            try:
+                self._render_and_publish(generation, state)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _render_and_publish(self, generation: int, state: StateT) -> None:
+        try:
+            result = self.render(state)
+        except Exception as error:
+            print(f"[red]Render failed:[/red] {error}")
+            return
+        self.stats.rendered += 1
+
+        if not self._is_latest(generation):
+            self.stats.superseded += 1
+            return
+
+        try:
+            self.publish(result)
+            self.stats.published += 1
+        except Exception as error:
+            print(f"[red]Publishing render failed:[/red] {error}")
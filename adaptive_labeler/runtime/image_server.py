@@ -0,0 +1,165 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import base64
+import hashlib
+import threading
+from typing import Hashable
+
+from adaptive_labeler.imaging.image_cache import ByteBudgetLRU
+from adaptive_labeler.runtime.tracing import span
+
+CONTENT_TYPES = {
+    b"\xff\xd8\xff": ("image/jpeg", "jpg"),
+    b"\x89PNG": ("image/png", "png"),
+    b"RIFF": ("image/webp", "webp"),
+    b"GIF8": ("image/gif", "gif"),
+}
+
+
+@dataclass
+class ImageServerStats:
+    published: int = 0
+    requests: int = 0
+    not_modified: int = 0
+    not_found: int = 0
+    bytes_served: int = 0
+
+
+def sniff_content_type(data: bytes) -> tuple[str, str]:
+    """MIME type and file extension from an encoded image's magic bytes."""
+    for magic, content_type in CONTENT_TYPES.items():
+        if data.startswith(magic):
+            return content_type
+    return "application/octet-stream", "bin"
+
+
+class ImageServer:
+    """
+    Encoded images over HTTP on localhost, at content-addressed URLs.
+
+    `publish()` stores the bytes under their hash and returns a URL for
+    `ft.Image.src`, so the client fetches raw bytes instead of receiving a
+    base64 string over the websocket. A URL never changes content, so
+    responses are marked immutable and the client's image cache serves
+    repeats (an original shown again, an undone sample) without a request.
+    Published images are kept in memory up to `max_bytes`, least recently
+    used first out. The image last published to each `slot` is pinned on
+    top of that, so a URL still on screen is never evicted from under it.
+
+    Publishing decodes and hashes, so do it on the worker that rendered the
+    image; publishing the same string again on the UI loop is a lookup.
+    """
+
+    # Recently published base64 strings; a str caches its hash, so showing
+    # the same render again skips the decode and the digest.
+    RECENT_STRINGS = 32
+
+    def __init__(
+        self, host: str = "127.0.0.1", port: int = 0, max_bytes: int = 64 * 1024**2
+    ):
+        self.stats = ImageServerStats()
+        self._images = ByteBudgetLRU(max_bytes)
+        self._recent: OrderedDict[str, tuple[str, str]] = OrderedDict()
+        # slot -> (digest, entry) of the image it shows.
+        self._pinned: dict[Hashable, tuple[str, tuple[bytes, str]]] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="image-server", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def publish(self, data: bytes, slot: Hashable | None = None) -> str:
+        with span("image_server.publish"):
+            digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+            content_type, extension = sniff_content_type(data)
+            entry = (data, content_type)
+            self._images.put(digest, entry, len(data))
+            self.stats.published += 1
+        if slot is not None:
+            self._pin(slot, digest, entry)
+        return f"{self.base_url}/images/{digest}.{extension}"
+
+    def publish_base64(self, image_base64: str, slot: Hashable | None = None) -> str:
+        with self._lock:
+            recent = self._recent.get(image_base64)
+            if recent:
+                self._recent.move_to_end(image_base64)
+        entry = self._lookup(recent[0]) if recent else None
+        if entry is not None:
+            if slot is not None:
+                self._pin(slot, recent[0], entry)
+            return recent[1]
+
+        url = self.publish(base64.b64decode(image_base64), slot)
+        digest = url.rsplit("/", 1)[-1].split(".", 1)[0]
+        with self._lock:
+            self._recent[image_base64] = (digest, url)
+            while len(self._recent) > self.RECENT_STRINGS:
+                self._recent.popitem(last=False)
+        return url
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    # --- Internals ---
+
+    def _pin(self, slot: Hashable, digest: str, entry: tuple[bytes, str]) -> None:
+        with self._lock:
+            self._pinned[slot] = (digest, entry)
+
+    def _lookup(self, digest: str) -> tuple[bytes, str] | None:
+        entry = self._images.get(digest)
+        if entry is None:
+            with self._lock:
+                for pinned_digest, pinned in self._pinned.values():
+                    if pinned_digest == digest:
+                        return pinned
+        return entry
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.stats.requests += 1
+                name = self.path.rsplit("/", 1)[-1]
+                digest = name.split(".", 1)[0]
+                entry = server._lookup(digest)
+                if entry is None:
+                    server.stats.not_found += 1
+                    self.send_error(404)
+                    return
+
+                etag = f'"{digest}"'
+                if self.headers.get("If-None-Match") == etag:
+                    server.stats.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                data, content_type = entry
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+                self.send_header("ETag", etag)
+                self.end_headers()
+                server.stats.bytes_served += len(data)
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,171 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Callable, Hashable, Mapping
+import queue
+import threading
+import time
+
+from rich import print
+
+from adaptive_labeler.runtime.latency import LatencyStats
+
+
+@dataclass(frozen=True)
+class RepeatPolicy:
+    """Auto-repeat timing for a held key. No `initial_delay` means no repeat."""
+
+    initial_delay: float | None = None
+    interval: float = 0.05
+
+
+@dataclass(order=True)
+class _HeldKey:
+    next_fire: float
+    key: Hashable = field(compare=False)
+    policy: RepeatPolicy = field(compare=False)
+
+
+def action_name(key) -> str:
+    name = getattr(key, "name", None) or getattr(key, "char", None)
+    return str(name if name is not None else key)
+
+
+class KeyDispatcher:
+    """
+    Single consumer for keyboard events posted from listener threads.
+
+    The dispatcher thread blocks on its queue while idle and wakes only for
+    new events or for the next auto-repeat deadline of a held key. Repeats
+    and taps of a repeatable key that piled up while the handler was busy
+    are coalesced into one call with a `repeat` count.
+
+    `handler(key, repeat)` returns True when it changed something;
+    `on_handled()` is then called (e.g. `page.update`) before the
+    key-to-paint latency for that action is recorded.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        handler: Callable[[Hashable, int], bool],
+        repeat_policies: Mapping[Hashable, RepeatPolicy] | None = None,
+        on_handled: Callable[[], None] | None = None,
+    ):
+        self.handler = handler
+        self.repeat_policies = dict(repeat_policies or {})
+        self.on_handled = on_handled
+        self.latency = LatencyStats()
+
+        self._events: queue.Queue = queue.Queue()
+        self._down: set[Hashable] = set()
+        self._held: dict[Hashable, _HeldKey] = {}
+        self._lookahead = None
+        self._thread: threading.Thread | None = None
+
+    # --- Producer side (any thread) ---
+
+    def press(self, key: Hashable) -> None:
+        self._events.put((key, True, time.perf_counter()))
+
+    def release(self, key: Hashable) -> None:
+        self._events.put((key, False, time.perf_counter()))
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="key-dispatcher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._events.put(self._STOP)
+
+    # --- Consumer side (dispatcher thread) ---
+
+    def _run(self) -> None:
+        while True:
+            try:
+                event = self._next_event(self._seconds_to_next_repeat())
+            except queue.Empty:
+                event = None
+
+            if event is self._STOP:
+                return
+            if event is not None:
+                self._handle_event(*event)
+            # Checked after every event too: OS auto-repeat keeps the queue busy.
+            self._fire_due_repeats()
+
+    def _handle_event(self, key: Hashable, pressed: bool, posted_at: float) -> None:
+        if not pressed:
+            self._down.discard(key)
+            self._held.pop(key, None)
+            return
+
+        # Listeners replay OS auto-repeat as extra presses; repeat timing is ours.
+        if key in self._down:
+            return
+        self._down.add(key)
+
+        policy = self.repeat_policies.get(key, RepeatPolicy())
+        repeat = 1
+        if policy.initial_delay is not None:
+            repeat, still_held = self._coalesce_taps(key)
+            if not still_held:
+                self._down.discard(key)
+            else:
+                self._held[key] = _HeldKey(
+                    posted_at + policy.initial_delay, key, policy
+                )
+        self._dispatch(key, repeat, posted_at)
+
+    def _next_event(self, timeout: float | None):
+        if self._lookahead is not None:
+            event, self._lookahead = self._lookahead, None
+            return event
+        return self._events.get(timeout=timeout)
+
+    def _coalesce_taps(self, key: Hashable) -> tuple[int, bool]:
+        """Fold queued press/release events of `key` into a tap count."""
+        taps, held = 1, True
+        while self._lookahead is None:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if event is self._STOP or event[0] != key:
+                self._lookahead = event
+                break
+            if event[1] and not held:
+                taps += 1
+            held = event[1]
+        return taps, held
+
+    def _seconds_to_next_repeat(self) -> float | None:
+        if not self._held:
+            return None
+        return max(min(self._held.values()).next_fire - time.perf_counter(), 0.0)
+
+    def _fire_due_repeats(self) -> None:
+        now = time.perf_counter()
+        for held in list(self._held.values()):
+            if held.next_fire > now:
+                continue
+            interval = held.policy.interval
+            repeat = 1 + int((now - held.next_fire) / interval)
+            due_at = held.next_fire
+            held.next_fire += repeat * interval
+            self._dispatch(held.key, repeat, due_at)
+
+    def _dispatch(self, key: Hashable, repeat: int, posted_at: float) -> None:
+        try:
+            handled = self.handler(key, repeat)
+            if handled and self.on_handled:
+                self.on_handled()
+        except Exception as error:
+            print(f"[red]Key handler failed for {action_name(key)}:[/red] {error}")
+            return
+
+        if handled:
+            self.latency.record(action_name(key), time.perf_counter() - posted_at)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+from collections import defaultdict, deque
+from dataclasses import dataclass
+import threading
+
+
+@dataclass
+class LatencySummary:
+    count: int
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class LatencyStats:
+    """Rolling window of durations (in seconds) per named action."""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._samples: dict[str, deque[float]] = defaultdict(
+            lambda: deque(maxlen=self.window)
+        )
+        self._lock = threading.Lock()
+
+    def record(self, action: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[action].append(seconds)
+
+    def actions(self) -> list[str]:
+        with self._lock:
+            return list(self._samples)
+
+    def summary(self, action: str) -> LatencySummary:
+        with self._lock:
+            values = sorted(self._samples.get(action, ()))
+        return LatencySummary(
+            count=len(values),
+            p50=percentile(values, 0.50),
+            p95=percentile(values, 0.95),
+            p99=percentile(values, 0.99),
+            max=values[-1] if values else 0.0,
+        )
+
+    def summaries(self) -> dict[str, LatencySummary]:
+        return {action: self.summary(action) for action in self.actions()}
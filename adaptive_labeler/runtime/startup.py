@@ -0,0 +1,46 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+import json
+import time
+
+from adaptive_labeler.runtime.tracing import Tracer
+
+# When the package was first imported; the closest we get to process start.
+PACKAGE_IMPORTED = time.perf_counter()
+
+
+@dataclass
+class StartupMetrics:
+    """
+    Seconds from package import to each startup milestone.
+
+    Milestones are also recorded as `startup.<name>` spans on the shared
+    tracer, and `write()` appends them to a JSON lines history.
+    """
+
+    origin: float = PACKAGE_IMPORTED
+    marks: dict[str, float] = field(default_factory=dict)
+
+    def mark(self, name: str) -> float:
+        now = time.perf_counter()
+        self.marks[name] = now - self.origin
+        tracer = Tracer.shared()
+        if tracer.enabled:
+            tracer.record(f"startup.{name}", int(self.origin * 1e9), int(now * 1e9))
+        return self.marks[name]
+
+    @property
+    def time_to_first_image(self) -> float | None:
+        return self.marks.get("first_image")
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{name} {seconds:.2f}s" for name, seconds in self.marks.items()
+        )
+
+    def write(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a") as history:
+            history.write(json.dumps({"timestamp": time.time(), **self.marks}) + "\n")
@@ -0,0 +1,115 @@
+from __future__ import annotations
+from collections import deque
+from pathlib import Path
+import json
+import os
+import threading
+import time
+
+from adaptive_labeler.runtime.latency import LatencyStats
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer: Tracer, name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self) -> _Span:
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.tracer.record(self.name, self.start, time.perf_counter_ns())
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> _NoSpan:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """
+    Named timing spans around the label loop's hot path.
+
+    Disabled, `span()` hands back a shared no-op context manager. Enabled,
+    every span is kept (up to `max_events`) for a Chrome trace export, and
+    fed into a rolling `LatencyStats` per stage for the on-screen overlay.
+    """
+
+    _shared: Tracer | None = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self, enabled: bool = False, max_events: int = 100_000, window: int = 200
+    ):
+        self.enabled = enabled
+        self.latency = LatencyStats(window)
+        self._events: deque[tuple[str, int, int, int]] = deque(maxlen=max_events)
+        self._thread_names: dict[int, str] = {}
+
+    @classmethod
+    def shared(cls) -> Tracer:
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def span(self, name: str) -> _Span | _NoSpan:
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, start_ns: int, end_ns: int) -> None:
+        thread = threading.current_thread()
+        self._thread_names.setdefault(thread.ident, thread.name)
+        self._events.append((name, start_ns, end_ns - start_ns, thread.ident))
+        self.latency.record(name, (end_ns - start_ns) / 1e9)
+
+    def clear(self) -> None:
+        self._events.clear()
+
+    def export_chrome_trace(self, path: str | Path) -> int:
+        """Write the spans as Chrome trace JSON (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for tid, name in list(self._thread_names.items())
+        ]
+        spans = list(self._events)
+        events += [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": start_ns / 1000,
+                "dur": duration_ns / 1000,
+                "pid": pid,
+                "tid": tid,
+            }
+            for name, start_ns, duration_ns, tid in spans
+        ]
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"traceEvents": events}))
+        return len(spans)
+
+
+def span(name: str) -> _Span | _NoSpan:
+    """Time a block under `name` on the shared tracer."""
+    return Tracer.shared().span(name)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, TypeVar
+import asyncio
+import threading
+
+from rich import print
+
+T = TypeVar("T")
+
+
+class Scheduled:
+    """Handle for a callback scheduled on the UI loop; `cancel()` is thread-safe."""
+
+    def __init__(self):
+        self.cancelled = False
+        self._handle: asyncio.TimerHandle | None = None
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        handle = self._handle
+        if handle is not None:
+            handle.cancel()
+
+
+class UiLoop:
+    """
+    The one event loop that mutates controls.
+
+    In the app this is the page's own asyncio loop (`attach(page.loop)`);
+    without a page, e.g. headless, a private loop runs on one `ui-loop`
+    thread. Debounces, fades and render completions are scheduled on it
+    instead of each getting a thread or a Timer, and blocking work goes to
+    `executor`, a fixed pool, so the thread count does not grow with input.
+    """
+
+    _shared: UiLoop | None = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, loop: asyncio.AbstractEventLoop | None = None, workers: int = 4):
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="ui-work"
+        )
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def shared(cls) -> UiLoop:
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Schedule on `loop` from now on, e.g. the page's loop."""
+        with self._lock:
+            self._loop = loop
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="ui-loop", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def in_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    # --- Scheduling (any thread) ---
+
+    def call_soon(self, fn: Callable[..., Any], *args) -> None:
+        self.loop.call_soon_threadsafe(self._guarded, fn, args)
+
+    def call_later(self, delay: float, fn: Callable[..., Any], *args) -> Scheduled:
+        scheduled = Scheduled()
+
+        def schedule():
+            if not scheduled.cancelled:
+                scheduled._handle = self.loop.call_later(
+                    delay, self._run_scheduled, scheduled, fn, args
+                )
+
+        self.loop.call_soon_threadsafe(schedule)
+        return scheduled
+
+    def every(self, interval: float, fn: Callable[[], Any]) -> Scheduled:
+        """Call `fn` every `interval` seconds until the handle is cancelled."""
+        scheduled = Scheduled()
+
+        def tick():
+            if scheduled.cancelled:
+                return
+            self._guarded(fn, ())
+            scheduled._handle = self.loop.call_later(interval, tick)
+
+        self.loop.call_soon_threadsafe(
+            lambda: setattr(scheduled, "_handle", self.loop.call_later(interval, tick))
+        )
+        return scheduled
+
+    def run(self, fn: Callable[..., T], *args) -> T:
+        """Run `fn` on the loop and wait for its result; inline on the loop itself."""
+        if self.in_loop():
+            return fn(*args)
+        future: Future = Future()
+
+        def call():
+            try:
+                future.set_result(fn(*args))
+            except BaseException as error:
+                future.set_exception(error)
+
+        self.loop.call_soon_threadsafe(call)
+        return future.result()
+
+    def run_coroutine(self, coroutine: Awaitable[T]) -> Future[T]:
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    # --- Inside coroutines ---
+
+    async def run_blocking(self, fn: Callable[..., T], *args) -> T:
+        """Await `fn` on the executor, keeping the loop free meanwhile."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, partial(fn, *args)
+        )
+
+    # --- Internals ---
+
+    def _run_scheduled(self, scheduled: Scheduled, fn: Callable, args: tuple) -> None:
+        if not scheduled.cancelled:
+            self._guarded(fn, args)
+
+    @staticmethod
+    def _guarded(fn: Callable, args: tuple) -> None:
+        try:
+            fn(*args)
+        except Exception as error:
+            print(f"[red]UI callback failed:[/red] {error}")
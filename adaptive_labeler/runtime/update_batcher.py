@@ -0,0 +1,71 @@
+from __future__ import annotations
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+import threading
+
+import flet as ft
+
+from adaptive_labeler.runtime.tracing import span
+
+
+@dataclass
+class ActionUpdateCount:
+    interactions: int = 0
+    updates_sent: int = 0
+
+    @property
+    def updates_per_interaction(self) -> float:
+        return self.updates_sent / self.interactions if self.interactions else 0.0
+
+
+class UpdateBatcher:
+    """
+    Collects dirty controls and sends them with one `page.update()` per interaction.
+
+    Controls call `touch()` instead of `update()`. Inside a `batch()` block the
+    touched controls are only recorded and get flushed together when the
+    outermost block exits. Outside of a batch, `touch()` sends its controls
+    right away, still as a single update. Batches are tracked per thread.
+    """
+
+    UNBATCHED = "unbatched"
+
+    def __init__(self):
+        self.counts: dict[str, ActionUpdateCount] = defaultdict(ActionUpdateCount)
+        self._local = threading.local()
+        self._counts_lock = threading.Lock()
+
+    def touch(self, *controls: ft.Control) -> None:
+        dirty = getattr(self._local, "dirty", None)
+        if dirty is None:
+            self._send(list(controls), self.UNBATCHED)
+            return
+        for control in controls:
+            dirty.setdefault(id(control), control)
+
+    @contextmanager
+    def batch(self, action: str = "interaction") -> Iterator[None]:
+        if getattr(self._local, "dirty", None) is not None:
+            # Nested batch: the outermost block flushes.
+            yield
+            return
+
+        self._local.dirty = {}
+        try:
+            yield
+        finally:
+            dirty = list(self._local.dirty.values())
+            self._local.dirty = None
+            self._send(dirty, action)
+
+    def _send(self, controls: list[ft.Control], action: str) -> None:
+        mounted = [control for control in controls if control.page is not None]
+        with self._counts_lock:
+            counts = self.counts[action]
+            counts.interactions += 1
+            counts.updates_sent += int(bool(mounted))
+        if mounted:
+            with span("page.update"):
+                mounted[0].page.update(*mounted)
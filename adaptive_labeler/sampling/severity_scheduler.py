@@ -0,0 +1,319 @@
+from __future__ import annotations
+from collections import deque
+from typing import Callable, Mapping
+import math
+import random
+import threading
+
+# Severity vector the master slider gives for a master value (for one pair).
+Split = Callable[[float], Mapping[str, float]]
+
+UNACCEPTABLE = "unacceptable"
+
+
+class SeverityScheduler:
+    """
+    Picks where a new pair's master slider starts and where Space moves it.
+
+    This base class is the hand-tuned behaviour: pairs start clean and
+    every Space press adds a random 0-0.2. Subclasses fit the
+    acceptable/unacceptable boundary from recorded labels and send the
+    labeler to it instead. `observe()` updates the fit in place without
+    revisiting earlier labels, so it can run on the key loop; its cost grows
+    with the number of noise operations, which it copies to keep the last
+    `undo_depth` observations undoable.
+    """
+
+    MAX_INCREMENT = 0.2
+
+    def __init__(self, max_master: float = 1.0, undo_depth: int = 32):
+        self.max_master = max_master
+        self.labels = 0
+        self._history: deque[tuple] = deque(maxlen=undo_depth)
+        self._lock = threading.Lock()
+
+    # --- Public API ---
+
+    def propose(self, split: Split, rng: random.Random) -> float:
+        """Master value a new pair starts at."""
+        with self._lock:
+            return self._clamp(self._propose(split, rng))
+
+    def step(self, master: float, split: Split, rng: random.Random) -> float:
+        """Master value after one Space press from `master`."""
+        with self._lock:
+            return self._clamp(self._step(master, split, rng))
+
+    def observe(
+        self,
+        severities: Mapping[str, float],
+        label: str,
+        undoable: bool = True,
+    ) -> None:
+        with self._lock:
+            if undoable:
+                self._history.append(self._state())
+            self._update(severities, label == UNACCEPTABLE)
+            self.labels += 1
+
+    def undo(self) -> None:
+        """Take back the last undoable observation, if it is still held."""
+        with self._lock:
+            if self._history:
+                self._restore(self._history.pop())
+                self.labels -= 1
+
+    def estimate(self, direction: Mapping[str, float] | None = None) -> float | None:
+        """
+        Master severity at the boundary when it is split in proportion to
+        `direction` (evenly across the seen ops when omitted), or None
+        before there is an estimate.
+        """
+        return None
+
+    # --- Hooks ---
+
+    def _propose(self, split: Split, rng: random.Random) -> float:
+        return 0.0
+
+    def _step(self, master: float, split: Split, rng: random.Random) -> float:
+        return master + round(rng.uniform(0.0, self.MAX_INCREMENT), 3)
+
+    def _update(self, severities: Mapping[str, float], unacceptable: bool) -> None:
+        pass
+
+    def _state(self) -> tuple:
+        return ()
+
+    def _restore(self, state: tuple) -> None:
+        pass
+
+    def _clamp(self, master: float) -> float:
+        return round(min(max(master, 0.0), self.max_master), 3)
+
+
+class StaircaseScheduler(SeverityScheduler):
+    """
+    One-up/one-down staircase on the master severity.
+
+    The labeled master becomes the new level: acceptable moves it up a
+    step, unacceptable down a step, and every reversal halves the step
+    (down to `min_step`), bisecting towards the 50% point. The estimate is
+    the mean of the last `reversals` reversal levels.
+    """
+
+    def __init__(
+        self,
+        start: float = 0.25,
+        step: float = 0.1,
+        min_step: float = 0.01,
+        reversals: int = 6,
+        max_master: float = 1.0,
+        undo_depth: int = 32,
+    ):
+        super().__init__(max_master, undo_depth)
+        self.level = start
+        self.step_size = step
+        self.min_step = min_step
+        self._direction = 0
+        self._reversals: deque[float] = deque(maxlen=reversals)
+        self._reversal_sum = 0.0
+
+    def estimate(self, direction: Mapping[str, float] | None = None) -> float | None:
+        # A single level: the staircase does not tell ops apart.
+        if not self._reversals:
+            return None
+        return self._reversal_sum / len(self._reversals)
+
+    def _propose(self, split: Split, rng: random.Random) -> float:
+        return self.level
+
+    def _step(self, master: float, split: Split, rng: random.Random) -> float:
+        # Jump to just below the level, then walk through it.
+        if master < self.level - self.step_size:
+            return self.level - self.step_size
+        return master + rng.uniform(0.0, self.step_size)
+
+    def _update(self, severities: Mapping[str, float], unacceptable: bool) -> None:
+        master = sum(severities.values())
+        direction = -1 if unacceptable else 1
+        if self._direction and direction != self._direction:
+            if len(self._reversals) == self._reversals.maxlen:
+                self._reversal_sum -= self._reversals[0]
+            self._reversals.append(master)
+            self._reversal_sum += master
+            self.step_size = max(self.step_size / 2, self.min_step)
+        self._direction = direction
+        self.level = self._clamp(master + direction * self.step_size)
+
+    def _state(self) -> tuple:
+        return (
+            self.level,
+            self.step_size,
+            self._direction,
+            tuple(self._reversals),
+            self._reversal_sum,
+        )
+
+    def _restore(self, state: tuple) -> None:
+        self.level, self.step_size, self._direction, reversals, total = state
+        self._reversals.clear()
+        self._reversals.extend(reversals)
+        self._reversal_sum = total
+
+
+class LogisticScheduler(SeverityScheduler):
+    """
+    Online logistic fit of P(unacceptable) over the per-op severities.
+
+    Each label is one AdaGrad step on the log loss, O(number of ops), and
+    the model used is an exponential moving average of those steps, which
+    smooths out single-label noise. The fitted boundary is a plane in
+    severity space. A pair's split changes direction with the master value,
+    so its master values are scanned on a `grid`, and only those whose split
+    lands within `band` logits of the boundary are informative: a new pair
+    starts at one of them, and Space moves to the next one up. The prior
+    puts the boundary at master `prior_threshold`.
+    """
+
+    def __init__(
+        self,
+        prior_threshold: float = 0.25,
+        prior_slope: float = 20.0,
+        learning_rate: float = 10.0,
+        averaging: float = 0.05,
+        grid: float = 0.01,
+        band: float = 1.5,
+        max_master: float = 1.0,
+        undo_depth: int = 32,
+    ):
+        super().__init__(max_master, undo_depth)
+        self.prior_slope = prior_slope
+        self.learning_rate = learning_rate
+        self.averaging = averaging
+        self.grid = grid
+        self.band = band
+        # Averaged model, then the raw AdaGrad iterate it follows.
+        self.weights: dict[str, float] = {}
+        self.bias = -prior_slope * prior_threshold
+        self._step_weights: dict[str, float] = {}
+        self._step_bias = self.bias
+        self._grad_squares: dict[str, float] = {}
+        self._bias_grad_square = 1.0
+
+    def logit(self, severities: Mapping[str, float]) -> float:
+        return self.bias + sum(
+            self.weights.get(name, self.prior_slope) * severity
+            for name, severity in severities.items()
+        )
+
+    def probability(self, severities: Mapping[str, float]) -> float:
+        return _sigmoid(self.logit(severities))
+
+    def estimate(self, direction: Mapping[str, float] | None = None) -> float | None:
+        if direction is None:
+            direction = {name: 1.0 for name in self.weights}
+        total = sum(direction.values())
+        if not total:
+            return -self.bias / self.prior_slope
+        slope = self.logit(direction) - self.bias
+        if slope <= 0:
+            return None
+        return -self.bias * total / slope
+
+    def boundaries(self) -> dict[str, float]:
+        """Per op, the severity at which that op alone is 50% unacceptable."""
+        return {
+            name: -self.bias / weight
+            for name, weight in self.weights.items()
+            if weight > 0
+        }
+
+    def _propose(self, split: Split, rng: random.Random) -> float:
+        logits = self._scan(split)
+        informative = [m for m, logit in logits if abs(logit) <= self.band]
+        if informative:
+            return rng.choice(informative)
+        return min(logits, key=lambda point: abs(point[1]))[0]
+
+    def _step(self, master: float, split: Split, rng: random.Random) -> float:
+        for m, logit in self._scan(split):
+            if m > master and logit >= -self.band:
+                return m
+        return master + self.grid
+
+    def _scan(self, split: Split) -> list[tuple[float, float]]:
+        steps = int(round(self.max_master / self.grid))
+        return [
+            (round(i * self.grid, 3), self.logit(split(i * self.grid)))
+            for i in range(steps + 1)
+        ]
+
+    def _update(self, severities: Mapping[str, float], unacceptable: bool) -> None:
+        for name in severities:
+            if name not in self.weights:
+                self.weights[name] = self._step_weights[name] = self.prior_slope
+                self._grad_squares[name] = 1.0
+
+        step_logit = self._step_bias + sum(
+            self._step_weights[name] * severity for name, severity in severities.items()
+        )
+        error = _sigmoid(step_logit) - float(unacceptable)
+        for name, severity in severities.items():
+            gradient = error * severity
+            self._grad_squares[name] += gradient * gradient
+            self._step_weights[name] -= (
+                self.learning_rate * gradient / math.sqrt(self._grad_squares[name])
+            )
+        self._bias_grad_square += error * error
+        self._step_bias -= (
+            self.learning_rate * error / math.sqrt(self._bias_grad_square)
+        )
+
+        for name, weight in self._step_weights.items():
+            self.weights[name] += self.averaging * (weight - self.weights[name])
+        self.bias += self.averaging * (self._step_bias - self.bias)
+
+    def _state(self) -> tuple:
+        return (
+            dict(self.weights),
+            self.bias,
+            dict(self._step_weights),
+            self._step_bias,
+            dict(self._grad_squares),
+            self._bias_grad_square,
+        )
+
+    def _restore(self, state: tuple) -> None:
+        (
+            self.weights,
+            self.bias,
+            self._step_weights,
+            self._step_bias,
+            self._grad_squares,
+            self._bias_grad_square,
+        ) = state
+
+
+def _sigmoid(x: float) -> float:
+    if x >= 0:
+        return 1.0 / (1.0 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1.0 + z)
+
+
+SCHEDULERS: dict[str, type[SeverityScheduler]] = {
+    "random": SeverityScheduler,
+    "staircase": StaircaseScheduler,
+    "logistic": LogisticScheduler,
+}
+
+
+def make_scheduler(name: str, **kwargs) -> SeverityScheduler:
+    try:
+        scheduler = SCHEDULERS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown severity scheduler {name!r}; expected one of {list(SCHEDULERS)}"
+        ) from None
+    return scheduler(**kwargs)
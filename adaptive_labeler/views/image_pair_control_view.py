@@ -1,35 +1,237 @@
-import time
 import random
 import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Sequence
 import flet as ft
 from pynput.keyboard import Key, KeyCode
+from PIL import Image as PILImage
 from rich import print
 
+from image_utils.image_path import ImagePath
 from image_utils.noising_operation import NosingOperation
 from image_utils.noisy_image_maker import NoisyImageMaker
 from labeling.label_manager import LabelManager
 
 from adaptive_labeler.controls.image_viewer_panel import ImageViewerPanel
 from adaptive_labeler.controls.labeling_controls import LabelingController
+from adaptive_labeler.controls.review_controls import ReviewControls
+from adaptive_labeler.controls.review_grid import ReviewGrid
+from adaptive_labeler.imaging.decoded_disk_cache import DecodedDiskCache, image_files
+from adaptive_labeler.imaging.display_proxy import DisplayProxy
+from adaptive_labeler.imaging.image_cache import (
+    ImageCache,
+    Size,
+    encode_base64,
+    image_file,
+)
+from adaptive_labeler.imaging.noise_chain import (
+    NoiseChainCache,
+    RenderFidelityError,
+    RenderSpec,
+    maker_at,
+    mark_background,
+    render_chain,
+    seeded,
+    split_master_severity,
+)
+from adaptive_labeler.imaging.preview_renderer import PreviewRenderer
+from adaptive_labeler.imaging.render_cache import RenderCache
+from adaptive_labeler.imaging.thumbnail_cache import ThumbnailCache
+from adaptive_labeler.labeler_config import LabelerConfig
+from adaptive_labeler.labels.duplicate_index import DuplicateIndex
+from adaptive_labeler.labels.image_index import ImageIndex, IndexChanges
+from adaptive_labeler.labels.label_journal import LabelJournal
+from adaptive_labeler.labels.parquet_label_store import (
+    ParquetLabelStore,
+    severity_column,
+)
+from adaptive_labeler.labels.review_cursor import ReviewCursor, ReviewRecord
+from adaptive_labeler.pipeline.pregeneration import (
+    PregeneratedPool,
+    PregenerationJob,
+)
+from adaptive_labeler.pipeline.prefetch_queue import PrefetchQueue, PreparedImagePair
+from adaptive_labeler.pipeline.render_scheduler import RenderScheduler
+from adaptive_labeler.sampling.severity_scheduler import (
+    Split,
+    make_scheduler,
+)
+from adaptive_labeler.runtime.image_server import ImageServer
+from adaptive_labeler.runtime.key_dispatcher import action_name
+from adaptive_labeler.runtime.tracing import span
+from adaptive_labeler.runtime.ui_loop import Scheduled, UiLoop
+from adaptive_labeler.runtime.update_batcher import UpdateBatcher
+
+# A label as the severity scheduler sees it: (record id, severities, label).
+Observation = tuple[int, dict[str, float], str]
+
+
+@dataclass
+class RenderedImages:
+    noisy_image_maker: NoisyImageMaker
+    render_spec: RenderSpec
+    original_image_base64: str
+    noisy_image_base64: str
+
+
+@dataclass
+class ReviewImages:
+    original_image_base64: str
+    noisy_image_base64: str
 
 
 class ImagePairControlView(ft.Column):
-    DEBOUNCE_INTERVAL = 0.3
     MASTER_STEP = 0.01
+    # Keys that auto-repeat while held; everything else fires once per press.
+    REPEATABLE_KEYS = (Key.up, Key.down, Key.space)
+    NAV_RAIL_WIDTH = 80
+    # Labeled samples kept so an undo can show them again.
+    UNDO_DEPTH = 32
+    LABEL_COLORS = {
+        "acceptable": ft.colors.GREEN_400,
+        "unacceptable": ft.colors.RED_400,
+    }
 
     def __init__(
-        self, label_manager: LabelManager, color_scheme=None, start_mode="labeling"
+        self,
+        label_manager: LabelManager,
+        color_scheme=None,
+        start_mode="labeling",
+        config: LabelerConfig | None = None,
+        update_batcher: UpdateBatcher | None = None,
     ):
         super().__init__()
 
         self.label_manager = label_manager
         self.color_scheme = color_scheme or ft.ColorScheme()
         self.mode = start_mode
+        self.config = config or LabelerConfig()
+        self.update_batcher = update_batcher or UpdateBatcher()
+        # Controls are only mutated on this loop; workers hand results to it.
+        self.ui_loop = UiLoop.shared()
+        self.image_cache = ImageCache.shared()
+        self.image_cache.set_budget(self.config.image_cache_bytes)
+        self.decoded_disk_cache = self._build_decoded_disk_cache()
+        self.display_proxy = (
+            DisplayProxy(
+                pixel_ratio=self.config.display_pixel_ratio,
+                format=self.config.display_format,
+                quality=self.config.display_quality,
+            )
+            if self.config.display_proxies
+            else None
+        )
+        self.image_server = (
+            ImageServer(max_bytes=self.config.image_server_bytes)
+            if self.config.image_transport == "http"
+            else None
+        )
+        self.noise_prefix_cache = (
+            NoiseChainCache(self.config.noise_prefix_cache_bytes)
+            if self.config.noise_prefix_cache_bytes > 0
+            else None
+        )
+        self.preview_renderer = (
+            PreviewRenderer(
+                self._preview_size(), self.image_cache, self.noise_prefix_cache
+            )
+            if self.config.preview_noising
+            else None
+        )
+        self.pregeneration = self._build_pregeneration()
+        self.render_cache = RenderCache(
+            self.config.render_cache_bytes,
+            pregenerated=self.pregeneration.pool if self.pregeneration else None,
+        )
+        # Full-resolution renders and label writes run in order, off the UI thread.
+        self._label_executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="label-writer",
+            initializer=mark_background,
+        )
+        self._maker_lock = threading.RLock()
+        # Slider, key and resize triggered renders all go through one scheduler.
+        self.render_scheduler: RenderScheduler[
+            tuple[NoisyImageMaker, RenderSpec], RenderedImages
+        ] = RenderScheduler(
+            self._render_images,
+            lambda rendered: self.ui_loop.call_soon(self._publish_images, rendered),
+        )
 
         # --- Data ---
-        self.noisy_image_maker = self.label_manager.new_noisy_image_maker()
-        self.labeled_image_pairs = self.label_manager.retrieve_records()
-        self._review_index = 0
+        self.label_store = ParquetLabelStore(
+            self.config.label_store_directory(),
+            root_dir=self.config.images_root(),
+            compact_every=self.config.label_store_compact_every,
+        )
+        self.label_journal = LabelJournal(
+            self.config.label_journal_file(),
+            sinks=[self.label_store.journal_sink],
+            batch_size=self.config.label_journal_batch_size,
+            flush_interval=self.config.label_journal_flush_interval,
+            # The store fsyncs every part before its sink returns.
+            durable_sinks=True,
+        )
+        # Labels that became durable in the journal right before a crash; once
+        # the store has them, the journal starts over from a checkpoint.
+        self.label_store.sync_from(LabelJournal.read_ops(self.label_journal.path))
+        self.label_journal.checkpoint()
+        self.image_index = self._build_image_index()
+        self.duplicate_index = self._build_duplicate_index()
+        # Decides where pairs start and where Space goes, from the labels so far.
+        self.severity_scheduler = make_scheduler(self.config.severity_scheduler)
+        # Guards swapping the scheduler against labels observed meanwhile,
+        # which a refit collects to replay.
+        self._scheduler_lock = threading.Lock()
+        self._observed_during_refit: list[Observation] | None = None
+        # Every new pair starts with all sliders at zero, so that is the state
+        # the prefetch workers render ahead of time.
+        self.prefetch_queue = PrefetchQueue(
+            label_manager,
+            depth=self.config.prefetch_depth,
+            workers=self.config.prefetch_workers,
+            display_proxy=self.display_proxy,
+            preview_renderer=self.preview_renderer,
+            array_ops=self.config.array_noise_ops,
+            source=self.pregeneration.next_maker if self.pregeneration else None,
+            render_noisy=self._render_noisy_base64,
+            start_master=self._start_master,
+            skip=self._is_near_duplicate,
+            release=self.pregeneration.release if self.pregeneration else None,
+            publish=self._publish,
+        )
+        # Queued pairs are prepared again once the scheduler has its fit.
+        self._label_executor.submit(self._warm_start_scheduler)
+        self._current_pair = self.prefetch_queue.take()
+        self.noisy_image_maker = self._current_pair.noisy_image_maker
+        self._preview_spec: RenderSpec = self._current_pair.render_spec
+        # Space increments for the current pair, drawn from its seed.
+        self._interaction_rng = random.Random(self._preview_spec.seed)
+        self._labeled_samples: deque[tuple[NoisyImageMaker, RenderSpec]] = deque(
+            maxlen=self.UNDO_DEPTH
+        )
+        # Pages labels from the store on demand instead of loading every record.
+        self.review_cursor: ReviewCursor[ReviewImages] = ReviewCursor(
+            self.label_store,
+            self._prepare_review_images,
+            page_size=self.config.review_page_size,
+            max_pages=self.config.review_max_pages,
+            neighbours=self.config.review_neighbours,
+        )
+        self.thumbnail_renderer = PreviewRenderer(
+            (self.config.review_thumbnail_size, self.config.review_thumbnail_size),
+            self.image_cache,
+        )
+        self.thumbnail_cache = ThumbnailCache(
+            self.config.thumbnail_directory(),
+            self._render_thumbnail,
+            size=self.config.review_thumbnail_size,
+            workers=self.config.review_thumbnail_workers,
+            max_bytes=self.config.review_thumbnail_cache_bytes,
+        )
 
         # --- UI Controls ---
         self.image_panel = self._build_image_panel()
@@ -37,27 +239,189 @@ class ImagePairControlView(ft.Column):
         self.feedback_overlay = ft.Container(
             bgcolor=ft.colors.GREEN_400, opacity=0.0, expand=1
         )
+        self.review_grid = ReviewGrid(
+            self.review_cursor,
+            self.thumbnail_cache,
+            self.open_review,
+            label_colors=self.LABEL_COLORS,
+            color_scheme=self.color_scheme,
+            update_batcher=self.update_batcher,
+            ui_loop=self.ui_loop,
+            image_server=self.image_server,
+            on_relabel=self.relabel,
+        )
+        self.review_controls = ReviewControls(
+            self.color_scheme, self.close_review, self.change_label
+        )
+        self.labeling_area = ft.Container(self.labeling_controls, padding=20, expand=5)
+        self.review_area = ft.Container(self.review_controls, padding=20, expand=5)
 
         self.expand = True
         self.controls = [
             self.image_panel,
-            ft.Container(self.labeling_controls, padding=20, expand=5),
+            self.labeling_area,
+            self.review_area,
             self.feedback_overlay,
+            self.review_grid,
         ]
 
         # --- State ---
         self.shift_pressed = False
-        self._last_action_time = 0.0
+        self._feedback_fade: Scheduled | None = None
+        # In review mode, a pair opened from the grid instead of the grid.
+        self._review_open = False
+        self._review_record: ReviewRecord | None = None
+        self._apply_layout()
+
+        if self.image_index is not None:
+            self.image_index.listeners.append(self._on_images_changed)
+            self.image_index.watch()
+        if self.duplicate_index is not None:
+            self.duplicate_index.listeners.append(self._on_duplicates_changed)
+            self.duplicate_index.watch()
 
     def _build_image_panel(self) -> ImageViewerPanel:
         return ImageViewerPanel(
-            original_image_name=self.noisy_image_maker.image_path.name,
-            noisy_image_name=self.noisy_image_maker.image_path.name,
-            original_image_base64=self.noisy_image_maker.image_path.load_as_base64(),
-            noisy_image_base64=self.noisy_image_maker.noisy_base64(),
+            original_image_name=self._current_pair.image_name,
+            noisy_image_name=self._current_pair.image_name,
+            original_image_base64=self._current_pair.original_image_base64,
+            noisy_image_base64=self._current_pair.noisy_image_base64,
             color_scheme=self.color_scheme,
+            update_batcher=self.update_batcher,
+            image_server=self.image_server,
+        )
+
+    def _build_decoded_disk_cache(self) -> DecodedDiskCache | None:
+        directory = self.config.decoded_cache_directory()
+        if not self.config.decoded_disk_cache or directory is None:
+            return None
+        disk = DecodedDiskCache(
+            directory,
+            self.config.decoded_disk_cache_bytes,
+            self.config.decoded_disk_cache_max_size,
+        )
+        self.image_cache.disk = disk
+        if self.config.decoded_disk_cache_warmup:
+            disk.warm(image_files(self.config.images_root()))
+        return disk
+
+    def _build_image_index(self) -> ImageIndex | None:
+        root = self.config.images_root()
+        if not self.config.image_index or root is None:
+            return None
+        manager_config = self.config.label_manager_config
+        index = ImageIndex(
+            self.config.image_index_file(),
+            root,
+            poll_interval=self.config.image_index_poll_interval,
+            full_scan_every=self.config.image_index_full_scan_every,
+            exclude=[manager_config.output_dir, manager_config.temporary_dir],
+        )
+        index.sync_labels(self.label_store.label_counts())
+        return index
+
+    def _build_duplicate_index(self) -> DuplicateIndex | None:
+        if not self.config.duplicate_index or self.image_index is None:
+            return None
+        return DuplicateIndex(
+            self.image_index,
+            max_distance=self.config.duplicate_max_distance,
+            confirm_distance=self.config.duplicate_confirm_distance,
+            workers=self.config.duplicate_index_workers,
+        )
+
+    def _is_near_duplicate(self, maker: NoisyImageMaker) -> bool:
+        return (
+            self.duplicate_index is not None
+            and self.config.skip_near_duplicates
+            and self.duplicate_index.is_redundant(image_file(maker.image_path))
         )
 
+    def _on_duplicates_changed(self) -> None:
+        self.ui_loop.call_soon(self.labeling_controls.update_progress)
+
+    def _on_images_changed(self, changes: IndexChanges) -> None:
+        self.ui_loop.call_soon(self.labeling_controls.update_progress)
+
+    def _build_pregeneration(self) -> PregenerationJob | None:
+        directory = self.config.pregeneration_directory()
+        if not self.config.pregeneration or directory is None:
+            return None
+        pool = PregeneratedPool(directory, self.config.pregeneration_max_bytes)
+        size, prescale = self._pregeneration_fit()
+        return PregenerationJob(
+            self.label_manager,
+            self.config.label_manager_config,
+            pool,
+            self.config.pregeneration_master_values,
+            images=self.config.pregeneration_images,
+            workers=self.config.pregeneration_workers,
+            size=size,
+            prescale=prescale,
+            array_ops=self.config.array_noise_ops,
+        )
+
+    def _pregeneration_fit(self) -> tuple[Size, int | None]:
+        """Box and prescale that fit pre-generated sources as renders fit theirs."""
+        if not self.preview_renderer:
+            side = self.config.pregeneration_max_size
+            return (side, side), None
+        size = self._preview_size()
+        disk = self.decoded_disk_cache
+        if disk is not None and max(size) <= disk.max_size:
+            return size, disk.max_size
+        return size, None
+
+    def did_mount(self):
+        self.on_page_resized()
+
+    def on_page_resized(self, e=None):
+        """Re-fit display proxies and the review grid to the space they now occupy."""
+        if not self.page or not self.page.width or not self.page.height:
+            return
+
+        panel_width = self.page.width - self.NAV_RAIL_WIDTH
+        self.review_grid.fit(panel_width, self.page.height)
+        if not self.display_proxy:
+            return
+
+        # Column children share the page height by their expand weights.
+        total_expand = sum(
+            int(control.expand or 0)
+            for control in (self.image_panel, self.labeling_area, self.feedback_overlay)
+        )
+        panel_height = self.page.height * self.image_panel.expand / total_expand
+
+        proxy = self.display_proxy.fit(
+            *self.image_panel.image_box(panel_width, panel_height)
+        )
+        if proxy != self.display_proxy:
+            self.display_proxy = proxy
+            self.prefetch_queue.display_proxy = proxy
+            if self.preview_renderer:
+                self.preview_renderer.preview_size = self._preview_size()
+                if self.pregeneration:
+                    fit = self._pregeneration_fit()
+                    self.pregeneration.size, self.pregeneration.prescale = fit
+            if e is not None and self.mode == "labeling":
+                self._resample_noisy_image()
+
+    def _preview_size(self) -> tuple[int, int]:
+        if self.display_proxy:
+            return self.display_proxy.target_size
+        return (self.config.preview_max_size, self.config.preview_max_size)
+
+    def _original_base64(self, maker: NoisyImageMaker) -> str:
+        image_path = maker.image_path
+        if self.display_proxy:
+            return self.display_proxy.original_base64(image_path, self.image_cache)
+        return self.image_cache.original_base64(image_path)
+
+    def _display_base64(self, image_base64: str) -> str:
+        if self.display_proxy:
+            return self.display_proxy.from_base64(image_base64)
+        return image_base64
+
     def _build_labeling_controls(self) -> LabelingController:
         controller = LabelingController(
             self.label_manager,
@@ -65,75 +429,496 @@ class ImagePairControlView(ft.Column):
             color_scheme=self.color_scheme,
             severity_update_callback=self._on_slider_update,
             noisy_image_maker=self.noisy_image_maker,
+            update_batcher=self.update_batcher,
+            severity_seed=self._preview_spec.seed,
+            master_value=self._current_pair.master,
+            image_index=(
+                self.image_index if self.config.image_index_progress else None
+            ),
+            duplicate_index=self.duplicate_index,
         )
         controller.visible = self.mode == "labeling"
         return controller
 
     def toggle_mode(self, e=None):
-        self.mode = "review" if self.mode == "labeling" else "labeling"
-        self.labeling_controls.visible = self.mode == "labeling"
-        self.update()
+        self.set_mode("review" if self.mode == "labeling" else "labeling")
+
+    def set_mode(self, mode: str) -> None:
+        """Switch between labeling and review, which starts on the grid."""
+        if mode == self.mode:
+            return
+        self.mode = mode
+        self._review_open = False
+        if mode == "review":
+            self.review_grid.refresh()
+        else:
+            # The pair viewer may still show a reviewed pair; a cache hit.
+            self.render_scheduler.request((self.noisy_image_maker, self._preview_spec))
+        self._apply_layout()
+        self.update_batcher.touch(self)
+
+    def _apply_layout(self) -> None:
+        labeling = self.mode == "labeling"
+        grid = not labeling and not self._review_open
+        self.labeling_controls.visible = labeling
+        self.labeling_area.visible = labeling
+        self.review_area.visible = not labeling and not grid
+        self.image_panel.visible = not grid
+        self.review_grid.visible = grid
 
     def _on_slider_update(self, e: ft.ControlEvent, fn_name: str, value: float):
         self._resample_noisy_image()
 
     def _resample_noisy_image(self):
-        print(self.noisy_image_maker)
-        self.labeling_controls.update_severity(self.noisy_image_maker)
-        print(self.noisy_image_maker)
+        """Request a render of the current slider state; only the newest is shown."""
+        with span("_resample_noisy_image"):
+            with self._maker_lock:
+                self.labeling_controls.update_severity(self.noisy_image_maker)
+                spec = RenderSpec.from_maker(
+                    self.noisy_image_maker, self._preview_spec.seed
+                )
+            self.render_scheduler.request((self.noisy_image_maker, spec))
 
-        self.image_panel.update_images(
-            original_image_name=self.noisy_image_maker.image_path.name,
-            noisy_image_name=self.noisy_image_maker.image_path.name,
-            original_image_base64=self.noisy_image_maker.image_path.load_as_base64(),
-            noisy_image_base64=self.noisy_image_maker.noisy_base64(),
+    def _render_images(
+        self, state: tuple[NoisyImageMaker, RenderSpec]
+    ) -> RenderedImages:
+        maker, spec = state
+        return RenderedImages(
+            noisy_image_maker=maker,
+            render_spec=spec,
+            original_image_base64=self._publish(self._original_base64(maker)),
+            noisy_image_base64=self._publish(self._render_noisy_base64(maker, spec)),
+        )
+
+    def _publish(self, image_base64: str) -> str:
+        """Hand `image_base64` to the image server (worker thread)."""
+        if self.image_server:
+            self.image_server.publish_base64(image_base64)
+        return image_base64
+
+    def _publish_images(self, rendered: RenderedImages) -> None:
+        # A render for a pair that was already skipped past must not show up.
+        if rendered.noisy_image_maker is not self.noisy_image_maker:
+            return
+
+        name = rendered.noisy_image_maker.image_path.name
+        with self.update_batcher.batch("render"):
+            self.image_panel.update_images(
+                original_image_name=name,
+                noisy_image_name=name,
+                original_image_base64=rendered.original_image_base64,
+                noisy_image_base64=rendered.noisy_image_base64,
+            )
+        self._preview_spec = rendered.render_spec
+
+    def _render_noisy_base64(self, maker: NoisyImageMaker, spec: RenderSpec) -> str:
+        if self.preview_renderer:
+            return self._preview_base64(
+                self.preview_renderer, maker.image_path, maker.noise_operations, spec
+            )
+
+        def render() -> str:
+            if self.display_proxy:
+                # Proxied before it is encoded, not decoded and encoded again.
+                source = self.image_cache.decoded(maker.image_path)
+                with span("noisy_render"):
+                    noisy = render_chain(source.copy(), maker.noise_operations, spec)
+                return self.display_proxy.encode(noisy)
+            # The maker renders from its own severities; a copy is pinned to
+            # `spec` so the sliders stay free while it renders.
+            snapshot = maker_at(maker, spec)
+            with span("noisy_base64"), seeded(spec.seed):
+                return snapshot.noisy_base64()
+
+        def source_size() -> Size:
+            # The maker noises the source at full resolution.
+            with PILImage.open(image_file(maker.image_path)) as source:
+                return source.size
+
+        variant = ("full", self.display_proxy, self.config.array_noise_ops)
+        return self.render_cache.get_or_render(
+            maker.image_path,
+            spec,
+            variant,
+            render,
+            adapt=self._display_base64,
+            source_size=source_size,
+        )
+
+    def _preview_base64(
+        self,
+        renderer: PreviewRenderer,
+        image_path: ImagePath | Path,
+        noise_operations: Sequence[NosingOperation],
+        spec: RenderSpec,
+    ) -> str:
+        def render() -> str:
+            preview = renderer.render_file(image_path, noise_operations, spec)
+            if self.display_proxy:
+                return self.display_proxy.encode(preview)
+            return encode_base64(preview)
+
+        variant = (
+            renderer.preview_size,
+            self.display_proxy,
+            self.config.array_noise_ops,
+        )
+        return self.render_cache.get_or_render(
+            image_path,
+            spec,
+            variant,
+            render,
+            adapt=self._display_base64,
+            source_size=lambda: renderer.image_cache.decoded(
+                image_path, renderer.preview_size
+            ).size,
         )
 
     def _label_image(self, label: str) -> None:
-        self.label_manager.label_writer.record(self.noisy_image_maker, label)
-        self._show_feedback(
-            color=ft.colors.GREEN_400 if label == "acceptable" else ft.colors.RED_400
+        maker = self.noisy_image_maker
+        with self._maker_lock:
+            spec = RenderSpec.from_maker(maker, self._preview_spec.seed)
+
+        # The label must describe exactly what was on screen.
+        try:
+            spec.verify_matches(self._preview_spec)
+        except RenderFidelityError as error:
+            print(f"[red]Label not recorded:[/red] {error}")
+            self._show_feedback(color=ft.colors.AMBER_400)
+            return
+
+        entry = self.label_journal.record(
+            image_file(maker.image_path), label, dict(spec.severities), spec.seed
         )
-        self.labeling_controls.update_progress()
+        if self.image_index is not None:
+            self.image_index.add_label(entry.image_path)
+            self.labeling_controls.update_progress()
+        with self._scheduler_lock:
+            self.severity_scheduler.observe(dict(spec.severities), label)
+            if self._observed_during_refit is not None:
+                self._observed_during_refit.append(
+                    (entry.record_id, dict(spec.severities), label)
+                )
+        self._scheduler_changed()
+        self._labeled_samples.append((maker, spec))
+        if self.config.legacy_label_writer:
+            self._label_executor.submit(self._record_label, maker, label, spec)
+        self._show_feedback(color=self.LABEL_COLORS[label])
+
+    def _record_label(self, maker: NoisyImageMaker, label: str, spec: RenderSpec):
+        """
+        Render and write the full-resolution sample for `spec` (worker thread).
+
+        The sample is rendered through `render_chain`, like the preview, from
+        a copy of the maker; the writer gets that finished render, so neither
+        the maker nor the global generators are held while it writes.
+        """
+        try:
+            snapshot = maker_at(maker, spec)
+            RenderSpec.from_maker(snapshot, spec.seed).verify_matches(spec)
+            source = self.image_cache.decoded(maker.image_path)
+            with span("label_render"):
+                noisy = render_chain(source.copy(), snapshot.noise_operations, spec)
+            snapshot.noisy_image = lambda: noisy.copy()
+            snapshot.noisy_base64 = lambda: encode_base64(noisy)
+
+            with span("label_writer.record"):
+                self.label_manager.label_writer.record(snapshot, label)
+        except Exception as error:
+            print(f"[red]Failed to record label:[/red] {error}")
+            return
+
+        self.ui_loop.call_soon(self.labeling_controls.update_progress)
 
     def _remove_label_image(self):
-        self.label_manager.delete_last_label()
-        self._load_next_image()
+        entry = self.label_journal.undo()
+        if entry and self.image_index is not None:
+            self.image_index.remove_label(entry.image_path)
+        with self._scheduler_lock:
+            self.severity_scheduler.undo()
+            if entry and self._observed_during_refit:
+                self._observed_during_refit = [
+                    observed
+                    for observed in self._observed_during_refit
+                    if observed[0] != entry.record_id
+                ]
+        self._scheduler_changed()
+        if self.config.legacy_label_writer:
+            # Queued behind any pending writes so the right label is removed.
+            self._label_executor.submit(self.label_manager.delete_last_label)
+        if self._labeled_samples:
+            self._restore_sample(*self._labeled_samples.pop())
+        else:
+            self._load_next_image()
+
+    def _restore_sample(self, maker: NoisyImageMaker, spec: RenderSpec) -> None:
+        """Show an undone sample again; its render comes from the render cache."""
+        self.render_scheduler.cancel()
+        self.noisy_image_maker = maker
+        self.labeling_controls.noisy_image_maker = maker
+        self.labeling_controls.severity_seed = spec.seed
+        self._interaction_rng = random.Random(spec.seed)
+
+        master = self.labeling_controls.master_slider
+        master.set_value(
+            min(sum(severity for _, severity in spec.severities), master.max_val)
+        )
+        for slider in self.labeling_controls.threshold_sliders:
+            slider.set_value(spec.severity_of(slider.label))
+
+        self.render_scheduler.request((maker, spec))
+        self.labeling_controls.update_progress()
+
+    def close(self) -> None:
+        """Stop background work and make every recorded label durable."""
+        self.render_scheduler.close()
+        self.prefetch_queue.close()
+        if self.pregeneration:
+            self.pregeneration.close()
+        self.review_cursor.close()
+        self.thumbnail_cache.close()
+        self._label_executor.shutdown(wait=True)
+        self.label_journal.close()
+        if self.duplicate_index is not None:
+            self.duplicate_index.close()
+        if self.image_index is not None:
+            self.image_index.close()
+        if self.image_server:
+            self.image_server.close()
+        if self.noise_prefix_cache is not None:
+            stats = self.noise_prefix_cache.stats
+            print(
+                f"Noise prefix cache: {stats.hit_rate:.0%} of "
+                f"{stats.steps_reused + stats.steps_run} steps reused"
+            )
+        if self.decoded_disk_cache:
+            self.image_cache.disk = None
+            self.decoded_disk_cache.close()
 
     def _load_next_image(self):
-        self.noisy_image_maker = self.label_manager.new_noisy_image_maker()
+        self._leave_current_pair()
+        self._show_pair(self.prefetch_queue.take())
+
+    def _leave_current_pair(self) -> None:
+        self.render_scheduler.cancel()
+        if self.pregeneration:
+            # Its pre-generated renders are no longer needed on disk.
+            self._label_executor.submit(
+                self.pregeneration.release, self.noisy_image_maker
+            )
+
+    def _show_pair(self, pair: PreparedImagePair) -> None:
+        self._current_pair = pair
+        self.noisy_image_maker = pair.noisy_image_maker
         self.labeling_controls.noisy_image_maker = self.noisy_image_maker
+        self._preview_spec = pair.render_spec
+        self.labeling_controls.severity_seed = pair.render_spec.seed
+        self._interaction_rng = random.Random(pair.render_spec.seed)
 
-        # Reset master slider value
-        self.labeling_controls.master_slider.set_value(0.0)
+        # Start from the master value the scheduler picked for this pair
+        self.labeling_controls.master_slider.set_value(pair.master)
 
         # Update all sliders to reflect new value
-        self.labeling_controls.distribute_master_severity(master_value=0.0)
+        self.labeling_controls.distribute_master_severity(master_value=pair.master)
 
-        # Update images and UI
-        self._resample_noisy_image()
+        # The prefetched pair was already rendered at that value
+        self.image_panel.update_images(
+            original_image_name=pair.image_name,
+            noisy_image_name=pair.image_name,
+            original_image_base64=pair.original_image_base64,
+            noisy_image_base64=pair.noisy_image_base64,
+        )
         self.labeling_controls.update_progress()
 
-    def _review_step(self, direction: int):
-        n = len(self.labeled_image_pairs)
-        if n == 0:
+    async def open_review(self, index: int) -> None:
+        """Show the pair behind grid tile `index` in the pair viewer."""
+        self._review_open = True
+        self._apply_layout()
+        await self._show_review(self.review_cursor.seek, index)
+
+    async def close_review(self, e=None) -> None:
+        """Back from the pair viewer to the grid, scrolled to the last pair seen."""
+        self.review_grid.reveal(self.review_cursor.index)
+        self._review_open = False
+        self._apply_layout()
+        self.update_batcher.touch(self)
+
+    async def relabel(self, record_ids: list[int], label: str) -> None:
+        """
+        Give past labels a new `label`. However many records change, that is
+        one journal entry and one override part in the label store; nothing
+        already written is rewritten.
+        """
+        changed = self.label_journal.relabel(record_ids, label)
+        if not changed:
             return
-        self._review_index = (self._review_index + direction) % n
-        pair = self.labeled_image_pairs[self._review_index]
-        self.image_panel.update_images(
-            pair.original_image_name,
-            pair.noisy_image_name,
-            pair.original_image_base64,
-            pair.noisy_image_base64,
+        print(f"Relabeled {len(changed)} as {label}")
+        self._show_feedback(color=self.LABEL_COLORS[label])
+        # Review reads the store, which sees the relabel once it is durable.
+        if not await self.ui_loop.run_blocking(self.label_journal.flush):
+            print(
+                "[red]Relabel not saved yet, retrying in the background:[/red] "
+                f"{self.label_journal.error}"
+            )
+            return
+        # The scheduler saw the old labels; fit it again on the stored ones.
+        self._label_executor.submit(self._refit_scheduler)
+
+    async def change_label(self, e=None, label: str | None = None) -> None:
+        """Relabel the pair open in review; without `label`, to the next one."""
+        record = self._review_record
+        if record is None:
+            return
+        if label is None:
+            labels = list(self.LABEL_COLORS)
+            label = labels[(labels.index(record.label) + 1) % len(labels)]
+        await self.relabel([record.record_id], label)
+        # Show it again as stored; under a label filter the next pair moves up.
+        await self._show_review(self.review_cursor.seek, self.review_cursor.index)
+        self.review_grid.refresh()
+
+    async def _review_step(self, direction: int) -> None:
+        await self._show_review(self.review_cursor.step, direction)
+
+    async def _show_review(
+        self,
+        move: Callable[[int], tuple[ReviewRecord, ReviewImages] | None],
+        argument: int,
+    ) -> None:
+        # Reading the page and rendering the pair happen off the loop.
+        try:
+            step = await self.ui_loop.run_blocking(move, argument)
+        except Exception as error:
+            print(f"[red]Failed to load label for review:[/red] {error}")
+            return
+        if step is None:
+            return
+
+        record, images = step
+        self._review_record = record
+        name = record.image_path.name
+        with self.update_batcher.batch("review"):
+            self.image_panel.update_images(
+                name,
+                f"{name} ({record.label})",
+                images.original_image_base64,
+                images.noisy_image_base64,
+            )
+            self.review_controls.update_label(
+                record.label,
+                f"{self.review_cursor.index + 1} of {len(self.review_cursor)}",
+            )
+            self.update_batcher.touch(self)
+
+    def _prepare_review_images(self, record: ReviewRecord) -> ReviewImages:
+        """Decode and re-noise a recorded label from its seed and severities."""
+        renderer = self.preview_renderer or PreviewRenderer(
+            self._preview_size(), self.image_cache
         )
-        self.update()
+        noisy_base64 = self._preview_base64(
+            renderer,
+            record.image_path,
+            self.noisy_image_maker.noise_operations,
+            record.render_spec,
+        )
+        if self.display_proxy:
+            original_base64 = self.display_proxy.original_base64(
+                record.image_path, self.image_cache
+            )
+        else:
+            original_base64 = self.image_cache.original_base64(
+                record.image_path, self._preview_size()
+            )
+        return ReviewImages(self._publish(original_base64), self._publish(noisy_base64))
 
-    def _can_act(self) -> bool:
-        now = time.time()
-        if now - self._last_action_time >= self.DEBOUNCE_INTERVAL:
-            self._last_action_time = now
-            return True
-        return False
+    def _render_thumbnail(
+        self, image_path: ImagePath | Path, spec: RenderSpec
+    ) -> PILImage.Image:
+        """A recorded label's noisy render at thumbnail size (thumbnail worker)."""
+        return self.thumbnail_renderer.render_file(
+            image_path, self.noisy_image_maker.noise_operations, spec
+        )
+
+    def _split_for(self, maker: NoisyImageMaker, seed: int) -> Split:
+        """The severity vector the master slider gives for a pair, by master value."""
+        names = [noise_op.name for noise_op in maker.noise_operations]
+        return lambda master: split_master_severity(master, names, seed)
+
+    def _start_master(self, maker: NoisyImageMaker, seed: int) -> float:
+        return self.severity_scheduler.propose(
+            self._split_for(maker, seed), random.Random(f"start:{seed}")
+        )
+
+    def _warm_start_scheduler(self) -> None:
+        """Fit the scheduler on the most recent stored labels (worker thread)."""
+        if self.config.scheduler_warm_start <= 0:
+            return
+        try:
+            observations = self._stored_observations(self.config.scheduler_warm_start)
+        except Exception as error:
+            print(f"[red]Failed to warm start the severity scheduler:[/red] {error}")
+            return
+        for _, severities, label in observations:
+            self.severity_scheduler.observe(severities, label, undoable=False)
+        self._scheduler_changed()
+
+    def _refit_scheduler(self) -> None:
+        """
+        Replace the scheduler with one fitted on the stored labels, after
+        relabels changed labels it has already seen (worker thread).
+
+        Labels observed from here on are collected; once the store has
+        everything observed before, it is read, and the collected labels it
+        did not include are replayed before the new scheduler takes over.
+        """
+        with self._scheduler_lock:
+            self._observed_during_refit = []
+            count = max(
+                self.config.scheduler_warm_start, self.severity_scheduler.labels
+            )
+        try:
+            if not self.label_journal.flush():
+                raise RuntimeError(self.label_journal.error)
+            observations = self._stored_observations(count)
+        except Exception as error:
+            print(f"[red]Failed to refit the severity scheduler:[/red] {error}")
+            with self._scheduler_lock:
+                self._observed_during_refit = None
+            return
+        last_stored = max((record_id for record_id, _, _ in observations), default=0)
+        scheduler = make_scheduler(self.config.severity_scheduler)
+        for _, severities, label in observations:
+            scheduler.observe(severities, label, undoable=False)
+        with self._scheduler_lock:
+            for record_id, severities, label in self._observed_during_refit:
+                if record_id > last_stored:
+                    scheduler.observe(severities, label)
+            self.severity_scheduler = scheduler
+            self._observed_during_refit = None
+        self._scheduler_changed()
+
+    def _scheduler_changed(self) -> None:
+        """Queued pairs start where the old fit put them; prepare them again."""
+        # The hand-tuned scheduler starts every pair clean whatever the labels.
+        if self.config.severity_scheduler != "random":
+            self.prefetch_queue.invalidate()
+
+    def _stored_observations(self, count: int) -> list[Observation]:
+        """Record id, severities and current label of the last `count` labels."""
+        names = self.label_store.noise_ops()
+        table = self.label_store.query(
+            columns=["record_id", "label"] + [severity_column(name) for name in names]
+        )
+        table = table.slice(max(table.num_rows - count, 0))
+        columns = [table.column(severity_column(name)).to_pylist() for name in names]
+        return [
+            (record_id, {name: s or 0.0 for name, s in zip(names, severities)}, label)
+            for record_id, label, *severities in zip(
+                table.column("record_id").to_pylist(),
+                table.column("label").to_pylist(),
+                *columns,
+            )
+        ]
 
     def _increment_master_slider(self, increment: float):
         master = self.labeling_controls.master_slider
@@ -147,23 +932,81 @@ class ImagePairControlView(ft.Column):
     def _show_feedback(self, color: str = ft.colors.GREEN_400, duration: float = 0.2):
         self.feedback_overlay.bgcolor = color
         self.feedback_overlay.opacity = 0.5
-        self.update()
+        self.update_batcher.touch(self.feedback_overlay)
 
         def hide_overlay():
-            time.sleep(duration)
             self.feedback_overlay.opacity = 0.0
-            self.update()
+            self.update_batcher.touch(self.feedback_overlay)
 
-        threading.Thread(target=hide_overlay, daemon=True).start()
+        # A newer label restarts the fade instead of stacking another one.
+        if self._feedback_fade:
+            self._feedback_fade.cancel()
+        self._feedback_fade = self.ui_loop.call_later(duration, hide_overlay)
 
-    def handle_keyboard_event(self, key: Key | KeyCode) -> bool:
-        if not self._can_act():
-            return False
+    async def handle_key(self, key: Key | KeyCode, repeat: int = 1) -> bool:
+        """
+        `handle_keyboard_event` on the UI loop, as one batched update. Waiting
+        for the next prepared pair happens on the executor, so a prefetch
+        miss does not stall the loop.
+        """
+        if self.mode == "review":
+            return await self._handle_review_key(key, repeat)
+        if key == Key.tab:
+            self._leave_current_pair()
+            pair = await self.ui_loop.run_blocking(self.prefetch_queue.take)
+            with self.update_batcher.batch(action_name(key)):
+                self._show_pair(pair)
+            return True
+        with self.update_batcher.batch(action_name(key)):
+            return self.handle_keyboard_event(key, repeat)
+
+    async def _handle_review_key(self, key: Key | KeyCode, repeat: int) -> bool:
+        """
+        On the grid Up/Down scroll; on a pair Left/Right step, A/D relabel it
+        unacceptable/acceptable and Esc goes back to the grid.
+        """
+        if not self._review_open:
+            match key:
+                case Key.up | Key.down:
+                    self.review_grid.scroll_by(repeat if key == Key.down else -repeat)
+                    return True
+                case Key.page_up | Key.page_down:
+                    rows = self.review_grid.rows * repeat
+                    self.review_grid.scroll_by(rows if key == Key.page_down else -rows)
+                    return True
+                case _:
+                    return False
+        match key:
+            case Key.right | Key.left:
+                await self._review_step(repeat if key == Key.right else -repeat)
+                return True
+            case Key.esc:
+                await self.close_review()
+                return True
+            case k if isinstance(k, KeyCode) and k.char == "d":
+                await self.change_label(label="acceptable")
+                return True
+            case k if isinstance(k, KeyCode) and k.char == "a":
+                await self.change_label(label="unacceptable")
+                return True
+            case _:
+                return False
 
+    def handle_keyboard_event(self, key: Key | KeyCode, repeat: int = 1) -> bool:
+        """
+        Apply one key action. `repeat` > 1 means several coalesced repeats of a
+        held key, which are applied as a single step and a single resample.
+        """
         match key:
             case Key.space:
-                increment = round(random.uniform(0.0, 0.2), 3)
-                self._increment_master_slider(increment)
+                master = self.labeling_controls.master_slider.slider.value
+                split = self._split_for(self.noisy_image_maker, self._preview_spec.seed)
+                target = master
+                for _ in range(repeat):
+                    target = self.severity_scheduler.step(
+                        target, split, self._interaction_rng
+                    )
+                self._increment_master_slider(target - master)
                 return True
             # case Key.right:
             #     self._label_image("acceptable")
@@ -172,16 +1015,13 @@ class ImagePairControlView(ft.Column):
             #     self._label_image("unacceptable")
             #     return True
             case Key.up:
-                self._increment_master_slider(self.MASTER_STEP)
+                self._increment_master_slider(self.MASTER_STEP * repeat)
                 return True
             case Key.down:
-                self._increment_master_slider(-self.MASTER_STEP)
+                self._increment_master_slider(-self.MASTER_STEP * repeat)
                 return True
             case Key.tab:
                 self._load_next_image()
-                self.labeling_controls.master_slider.set_value(0.0)
-                self.labeling_controls.master_slider.update()
-                self.labeling_controls.update()
                 return True
             case k if isinstance(k, KeyCode) and k.char == "d":
                 self._label_image("acceptable")
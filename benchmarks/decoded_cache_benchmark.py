@@ -0,0 +1,85 @@
+"""
+Display-size originals: JPEG decode versus the memory-mapped disk cache.
+
+    python -m benchmarks.decoded_cache_benchmark --images 20 --size 4000x3000
+
+Each image is fetched the way the viewer asks for it (downscaled to a
+display box) through a fresh ImageCache, once decoding the JPEG and once
+from a reopened DecodedDiskCache that a warmup filled. The data file was
+just written, so it is read from the page cache, as it would be on a
+reopen shortly after the last session.
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from adaptive_labeler.imaging.decoded_disk_cache import DecodedDiskCache, image_files
+from adaptive_labeler.imaging.image_cache import ImageCache
+from benchmarks.headless import make_corpus
+
+
+def time_fetches(cache: ImageCache, paths: list[Path], target: tuple) -> dict:
+    timings = []
+    for path in paths:
+        start = time.perf_counter()
+        cache.decoded(path, target)
+        timings.append(time.perf_counter() - start)
+    return {
+        "median_ms": statistics.median(timings) * 1000,
+        "total_s": sum(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--size", default="4000x3000", help="WIDTHxHEIGHT")
+    parser.add_argument("--target", type=int, default=1600, help="display box side")
+    parser.add_argument("--max-size", type=int, default=2048)
+    args = parser.parse_args()
+
+    width, height = (int(n) for n in args.size.lower().split("x"))
+    target = (args.target, args.target)
+    with tempfile.TemporaryDirectory() as workspace:
+        workspace = Path(workspace)
+        images = make_corpus(workspace / "images", args.images, width, height)
+        paths = list(image_files(images))
+
+        jpeg = time_fetches(ImageCache(), paths, target)
+
+        disk = DecodedDiskCache(workspace / "decoded", max_size=args.max_size)
+        start = time.perf_counter()
+        for path in paths:
+            disk.get_or_decode(path)
+        warmup_s = time.perf_counter() - start
+        disk.close()
+
+        reopened = DecodedDiskCache(workspace / "decoded", max_size=args.max_size)
+        cached = time_fetches(ImageCache(disk=reopened), paths, target)
+        stats = reopened.stats
+        reopened.close()
+
+    print(
+        json.dumps(
+            {
+                "images": args.images,
+                "size": [width, height],
+                "target": list(target),
+                "jpeg_decode": jpeg,
+                "disk_cache": cached,
+                "disk_hit_rate": stats.hit_rate,
+                "disk_bytes": stats.bytes_used,
+                "warmup_s": warmup_s,
+                "speedup": jpeg["median_ms"] / cached["median_ms"],
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Duplicate index: hashing a folder on every core, with an interruption.
+
+    python -m benchmarks.duplicate_index_benchmark --images 5000 --copies 500
+
+Writes --images smooth random JPEGs plus --copies downscaled PNG re-exports of
+some of them. The index is started in the background and closed once about
+half the images are hashed, then reopened; "resumed_hashed" is what the
+second session still had to hash. "grouped_copies" counts copies that landed
+in their original's group, and "search_us" is one near-duplicate lookup.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image as PILImage
+
+from adaptive_labeler.labels.duplicate_index import DuplicateIndex
+from adaptive_labeler.labels.image_index import ImageIndex
+
+
+def make_photos(directory: Path, count: int) -> Path:
+    """Smooth random pictures, unlike each other the way distinct photos are."""
+    directory.mkdir(parents=True)
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        pixels = (rng.random((12, 16, 3)) * 255).astype(np.uint8)
+        image = PILImage.fromarray(pixels).resize((320, 240), PILImage.BICUBIC)
+        image.save(directory / f"photo_{i:05d}.jpg", quality=90)
+    return directory
+
+
+def open_indexes(workspace: Path, root: Path, workers: int | None):
+    image_index = ImageIndex(workspace / "index.sqlite", root)
+    image_index.refresh()
+    return image_index, DuplicateIndex(image_index, workers=workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=5000)
+    parser.add_argument("--copies", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workspace:
+        workspace = Path(workspace)
+        root = make_photos(workspace / "images", args.images)
+        (root / "exports").mkdir()
+        originals = sorted(root.glob("*.jpg"))[: args.copies]
+        for original in originals:
+            PILImage.open(original).resize((160, 120)).save(
+                root / "exports" / f"{original.stem}.png"
+            )
+        total = args.images + len(originals)
+
+        image_index, duplicates = open_indexes(workspace, root, args.workers)
+        start = time.perf_counter()
+        duplicates.watch()
+        while duplicates.stats.hashed < total // 2:
+            time.sleep(0.01)
+        duplicates.close()
+        first_s = time.perf_counter() - start
+        first_hashed = duplicates.stats.hashed
+        image_index.close()
+
+        image_index, duplicates = open_indexes(workspace, root, args.workers)
+        start = time.perf_counter()
+        duplicates.refresh()
+        second_s = time.perf_counter() - start
+
+        grouped = sum(
+            f"exports/{original.stem}.png" in duplicates.group_of(original.name)
+            for original in originals
+        )
+        hashes = [duplicates.hashes(original.name).phash for original in originals]
+        timings = []
+        for phash in hashes:
+            start = time.perf_counter()
+            duplicates._table.search(phash)
+            timings.append(time.perf_counter() - start)
+
+        result = {
+            "images": total,
+            "workers": duplicates.workers,
+            "first_session_hashed": first_hashed,
+            "first_session_s": first_s,
+            "resumed_hashed": duplicates.stats.hashed,
+            "resumed_s": second_s,
+            "images_per_s": duplicates.stats.hashed / second_s if second_s else 0,
+            "unique_total": duplicates.unique_total,
+            "grouped_copies": grouped,
+            "search_us": statistics.median(timings) * 1e6 if timings else 0,
+            "cpus": os.cpu_count(),
+        }
+        duplicates.close()
+        image_index.close()
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
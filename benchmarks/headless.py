@@ -0,0 +1,89 @@
+"""
+Runs `ImagePairControlView` without a Flet window, for benchmarks.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import threading
+
+import flet as ft
+import numpy as np
+from PIL import Image as PILImage
+
+from labeling.label_manager import LabelManager
+from labeling.label_manager_config import LabelManagerConfig
+
+from adaptive_labeler.labeler_config import LabelerConfig
+from adaptive_labeler.runtime.update_batcher import UpdateBatcher
+from adaptive_labeler.views.image_pair_control_view import ImagePairControlView
+
+
+class HeadlessPage:
+    """Stands in for `ft.Page`: counts the updates instead of sending them."""
+
+    def __init__(self, width: float = 1280, height: float = 900):
+        self.width = width
+        self.height = height
+        self.updates = 0
+        self.controls_sent = 0
+        self._lock = threading.Lock()
+
+    def update(self, *controls: ft.Control) -> None:
+        with self._lock:
+            self.updates += 1
+            self.controls_sent += len(controls)
+
+    def run_thread(self, handler, *args) -> None:
+        threading.Thread(target=handler, args=args, daemon=True).start()
+
+    def attach(self, control: ft.Control) -> None:
+        """Mount `control` and its children, as `page.add()` would."""
+        control.page = self
+        for child in control._get_children():
+            self.attach(child)
+
+
+def make_corpus(directory: Path, count: int, width: int, height: int) -> Path:
+    """Write `count` synthetic JPEGs with enough texture to be costly to noise."""
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    for i in range(count):
+        path = directory / f"synthetic_{i:05d}.jpg"
+        if path.exists():
+            continue
+        base = (x * (i + 1) + y * 3) % 256
+        pixels = np.stack([base, (base + 85) % 256, (base + 170) % 256], axis=-1)
+        pixels = pixels + rng.integers(-20, 20, pixels.shape)
+        PILImage.fromarray(pixels.clip(0, 255).astype(np.uint8)).save(path, quality=90)
+    return directory
+
+
+def build_view(
+    workspace: Path,
+    images: int,
+    width: int,
+    height: int,
+    config: LabelerConfig | None = None,
+) -> tuple[ImagePairControlView, HeadlessPage, UpdateBatcher]:
+    images_dir = make_corpus(workspace / "images", images, width, height)
+    output_dir = workspace / "output"
+    label_manager_config = LabelManagerConfig(
+        images_dir=str(images_dir),
+        output_dir=str(output_dir),
+        temporary_dir=str(output_dir / "temporary"),
+        image_samples=images,
+    )
+    config = config or LabelerConfig()
+    config.label_manager_config = label_manager_config
+
+    update_batcher = UpdateBatcher()
+    view = ImagePairControlView(
+        LabelManager(label_manager_config),
+        config=config,
+        update_batcher=update_batcher,
+    )
+    page = HeadlessPage()
+    page.attach(view)
+    view.did_mount()
+    return view, page, update_batcher
@@ -0,0 +1,85 @@
+"""
+Image index: cost of keeping progress counts current as the folder changes.
+
+    python -m benchmarks.image_index_benchmark --images 5000 --directories 50
+
+Compares a full directory enumeration (what recomputing progress from the
+folder costs) with the index's poll over an unchanged tree, a poll after a
+file is dropped in, a full re-stat and a progress lookup.
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from adaptive_labeler.imaging.decoded_disk_cache import image_files
+from adaptive_labeler.labels.image_index import ImageIndex
+from benchmarks.headless import make_corpus
+
+
+def timed(fn, repeats: int = 5) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=5000)
+    parser.add_argument("--directories", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workspace:
+        workspace = Path(workspace)
+        root = workspace / "images"
+        per_directory = args.images // args.directories
+        for d in range(args.directories):
+            make_corpus(root / f"d{d:03d}", per_directory, 16, 16)
+
+        index = ImageIndex(workspace / "index.sqlite", root)
+        start = time.perf_counter()
+        index.refresh()
+        initial_s = time.perf_counter() - start
+
+        enumerate_ms = timed(lambda: sum(1 for _ in image_files(root)))
+        poll_ms = timed(index.refresh)
+        full_ms = timed(lambda: index.refresh(full=True))
+        progress_us = timed(index.progress_text, repeats=1000) * 1000
+
+        counter = iter(range(10**6))
+
+        def drop_in():
+            (root / "d000" / f"new_{next(counter)}.jpg").write_bytes(
+                (root / "d000" / "synthetic_00000.jpg").read_bytes()
+            )
+            index.refresh()
+
+        drop_in_ms = timed(drop_in)
+        total = index.total
+        index.close()
+
+    print(
+        json.dumps(
+            {
+                "images": total,
+                "directories": args.directories,
+                "initial_index_s": initial_s,
+                "enumerate_folder_ms": enumerate_ms,
+                "poll_unchanged_ms": poll_ms,
+                "poll_after_drop_in_ms": drop_in_ms,
+                "full_restat_ms": full_ms,
+                "progress_lookup_us": progress_us,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
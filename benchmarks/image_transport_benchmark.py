@@ -0,0 +1,107 @@
+"""
+Image transport: inline base64 in the websocket patch versus the HTTP endpoint.
+
+    python -m benchmarks.image_transport_benchmark --images 20 --size 1600x1200
+
+Each image is encoded as a display proxy, then delivered both ways: as a
+JSON patch carrying `src_base64` that the client parses and decodes, and
+as a patch carrying the URL followed by a loopback GET for the raw bytes.
+Latency covers everything up to the client holding the encoded bytes; the
+decode and paint after that are the same for both. "revisit" shows an
+image again (undo, review) after the client has cached its URL.
+"""
+
+import argparse
+import base64
+import json
+import statistics
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from adaptive_labeler.imaging.decoded_disk_cache import image_files
+from adaptive_labeler.imaging.display_proxy import DisplayProxy
+from adaptive_labeler.imaging.image_cache import ImageCache
+from adaptive_labeler.runtime.image_server import ImageServer
+from benchmarks.headless import make_corpus
+
+
+def patch(**properties) -> str:
+    return json.dumps({"action": "updateControlProps", "props": [properties]})
+
+
+def deliver_base64(image_base64: str) -> tuple[int, bytes]:
+    message = patch(i="image", src_base64=image_base64)
+    received = json.loads(message)["props"][0]["src_base64"]
+    return len(message), base64.b64decode(received)
+
+
+def deliver_http(
+    server: ImageServer, image_base64: str, cache: dict[str, bytes]
+) -> tuple[int, bytes]:
+    message = patch(i="image", src=server.publish_base64(image_base64))
+    url = json.loads(message)["props"][0]["src"]
+    if url in cache:
+        return len(message), cache[url]
+    with urllib.request.urlopen(url) as response:
+        data = response.read()
+        # Status line and headers, as sent.
+        header_bytes = len(str(response.headers)) + len("HTTP/1.0 200 OK\r\n")
+    cache[url] = data
+    return len(message) + header_bytes + len(data), data
+
+
+def measure(deliver, payloads: list[str]) -> dict:
+    timings, wire = [], 0
+    for payload in payloads:
+        start = time.perf_counter()
+        nbytes, _ = deliver(payload)
+        timings.append(time.perf_counter() - start)
+        wire += nbytes
+    return {
+        "median_ms": statistics.median(timings) * 1000,
+        "bytes_per_image": wire // len(payloads),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--size", default="1600x1200", help="WIDTHxHEIGHT")
+    parser.add_argument("--box", default="800x600", help="display box WIDTHxHEIGHT")
+    args = parser.parse_args()
+
+    width, height = (int(n) for n in args.size.lower().split("x"))
+    box = tuple(int(n) for n in args.box.lower().split("x"))
+    with tempfile.TemporaryDirectory() as workspace:
+        images = make_corpus(Path(workspace) / "images", args.images, width, height)
+        proxy = DisplayProxy().fit(*box)
+        payloads = [
+            proxy.original_base64(path, ImageCache()) for path in image_files(images)
+        ]
+
+    server = ImageServer()
+    client_cache: dict[str, bytes] = {}
+    results = {
+        "base64": measure(deliver_base64, payloads),
+        "http": measure(lambda p: deliver_http(server, p, client_cache), payloads),
+        "base64_revisit": measure(deliver_base64, payloads),
+        "http_revisit": measure(
+            lambda p: deliver_http(server, p, client_cache), payloads
+        ),
+    }
+    server.close()
+
+    results["wire_ratio"] = (
+        results["http"]["bytes_per_image"] / results["base64"]["bytes_per_image"]
+    )
+    print(
+        json.dumps(
+            {"images": args.images, "size": [width, height], **results}, indent=2
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
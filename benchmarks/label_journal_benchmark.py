@@ -0,0 +1,73 @@
+"""
+Throughput and latency of the write-behind label journal.
+
+    python -m benchmarks.label_journal_benchmark --labels 100000
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from adaptive_labeler.labels.label_journal import LabelJournal
+
+SEVERITIES = {f"noise_op_{i}": 0.01 * i for i in range(10)}
+
+
+def run(labels: int, batch_size: int, flush_interval: float, fsync: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "labels.journal.jsonl"
+        journal = LabelJournal(
+            path, batch_size=batch_size, flush_interval=flush_interval, fsync=fsync
+        )
+
+        max_record_latency = 0.0
+        start = time.perf_counter()
+        for i in range(labels):
+            before = time.perf_counter()
+            journal.record(
+                f"images/{i:06d}.jpg",
+                "acceptable" if i % 2 else "unacceptable",
+                SEVERITIES,
+                seed=i,
+            )
+            if i % 50 == 49:
+                journal.undo()
+            max_record_latency = max(max_record_latency, time.perf_counter() - before)
+        enqueue_seconds = time.perf_counter() - start
+
+        journal.close()
+        durable_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        replayed = LabelJournal.replay(path)
+        replay_seconds = time.perf_counter() - start
+
+        return {
+            "labels": labels,
+            "replayed": len(replayed),
+            "record_per_second": labels / enqueue_seconds,
+            "durable_per_second": labels / durable_seconds,
+            "max_record_latency_ms": max_record_latency * 1000,
+            "max_durable_latency_ms": journal.stats.max_durable_latency * 1000,
+            "batches": journal.stats.batches,
+            "replay_seconds": replay_seconds,
+            "file_mb": path.stat().st_size / 1e6,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--labels", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--flush-interval", type=float, default=0.5)
+    parser.add_argument("--no-fsync", action="store_true")
+    args = parser.parse_args()
+
+    result = run(args.labels, args.batch_size, args.flush_interval, not args.no_fsync)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Latency of the label loop, driven headlessly through handle_key on the UI loop.
+
+    python -m benchmarks.label_loop_benchmark --images 50 --size 3000x2000
+    python -m benchmarks.label_loop_benchmark --save-baseline baseline.json
+    python -m benchmarks.label_loop_benchmark --baseline baseline.json
+
+Each scripted key is timed twice: until the handler returns ("handler") and
+until the render it triggered was published on the UI loop ("settled"). "labels"
+counts entries the journal recorded, not label key presses, so a rejected
+label does not count. With --baseline the run fails when any p50/p95/p99 grew
+by more than --tolerance.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from pynput.keyboard import Key, KeyCode
+
+from adaptive_labeler.runtime.latency import LatencyStats
+from adaptive_labeler.runtime.tracing import Tracer
+from benchmarks.headless import build_view
+
+DEFAULT_SCRIPT = "tab,up,up,up,space,space,a,tab,up,space,d"
+NAMED_KEYS = {"tab": Key.tab, "up": Key.up, "down": Key.down, "space": Key.space}
+PERCENTILES = ("p50", "p95", "p99")
+
+
+def parse_script(script: str) -> list[tuple[str, Key | KeyCode]]:
+    return [
+        (name, NAMED_KEYS.get(name) or KeyCode.from_char(name))
+        for name in script.replace(" ", "").split(",")
+    ]
+
+
+def run(
+    workspace: Path, images: int, size: tuple[int, int], script: str, rounds: int
+) -> dict:
+    view, page, _ = build_view(workspace, images, *size)
+    keys = parse_script(script)
+    handler = LatencyStats(window=rounds * len(keys))
+    settled = LatencyStats(window=rounds * len(keys))
+
+    labels_before = len(view.label_journal)
+    threads = {"start": threading.active_count()}
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for name, key in keys:
+            before = time.perf_counter()
+            view.ui_loop.run_coroutine(view.handle_key(key)).result()
+            handler.record(name, time.perf_counter() - before)
+            view.render_scheduler.wait_idle(timeout=30)
+            # The render's publish was queued on the loop; let it run.
+            view.ui_loop.run(lambda: None)
+            settled.record(name, time.perf_counter() - before)
+    loop_seconds = time.perf_counter() - start
+    labels = len(view.label_journal) - labels_before
+    threads["end"] = threading.active_count()
+    # Labels only count once they are durable.
+    view.close()
+    total_seconds = time.perf_counter() - start
+
+    def table(stats: LatencyStats) -> dict:
+        return {
+            action: {
+                "count": summary.count,
+                **{p: getattr(summary, p) * 1000 for p in PERCENTILES},
+                "max": summary.max * 1000,
+            }
+            for action, summary in stats.summaries().items()
+        }
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "images": images,
+            "size": list(size),
+            "script": script,
+            "rounds": rounds,
+        },
+        "handler_ms": table(handler),
+        "settled_ms": table(settled),
+        "labels": labels,
+        "labels_per_minute": labels / total_seconds * 60,
+        "journal": asdict(view.label_journal.stats),
+        "loop_seconds": loop_seconds,
+        "drain_seconds": total_seconds - loop_seconds,
+        "page_updates": page.updates,
+        "threads": threads,
+    }
+
+
+def regressions(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    found = []
+    for section in ("handler_ms", "settled_ms"):
+        for action, old in baseline.get(section, {}).items():
+            new = result[section].get(action)
+            if new is None:
+                continue
+            for p in PERCENTILES:
+                if new[p] > old[p] * (1 + tolerance):
+                    found.append(
+                        f"{section} {action} {p}: {old[p]:.1f}ms -> {new[p]:.1f}ms"
+                    )
+    old_rate = baseline.get("labels_per_minute")
+    if old_rate and result["labels_per_minute"] < old_rate / (1 + tolerance):
+        found.append(
+            f"labels_per_minute: {old_rate:.0f} -> {result['labels_per_minute']:.0f}"
+        )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=50)
+    parser.add_argument("--size", default="3000x2000", help="WIDTHxHEIGHT")
+    parser.add_argument("--script", default=DEFAULT_SCRIPT)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--workspace", help="reuse a corpus between runs")
+    parser.add_argument("--save-baseline")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--trace", help="write a Chrome trace of the run here")
+    args = parser.parse_args()
+    Tracer.shared().enabled = bool(args.trace)
+
+    size = tuple(int(n) for n in args.size.lower().split("x"))
+    if args.workspace:
+        result = run(Path(args.workspace), args.images, size, args.script, args.rounds)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            result = run(Path(tmp), args.images, size, args.script, args.rounds)
+    print(json.dumps(result, indent=2))
+
+    if args.trace:
+        Tracer.shared().export_chrome_trace(args.trace)
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(result, indent=2))
+    if args.baseline:
+        found = regressions(
+            result, json.loads(Path(args.baseline).read_text()), args.tolerance
+        )
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
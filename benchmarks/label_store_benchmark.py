@@ -0,0 +1,87 @@
+"""
+Load time of the Parquet label store for a large project.
+
+    python -m benchmarks.label_store_benchmark --labels 500000
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+
+from adaptive_labeler.labels.label_journal import LabelEntry
+from adaptive_labeler.labels.parquet_label_store import ParquetLabelStore
+
+NOISE_OPS = [f"noise_op_{i}" for i in range(10)]
+
+
+def synthetic_entries(labels: int) -> list[LabelEntry]:
+    rng = random.Random(0)
+    return [
+        LabelEntry(
+            record_id=i + 1,
+            image_path=f"images/{i % 20_000:06d}.jpg",
+            label=rng.choice(("acceptable", "unacceptable")),
+            severities={op: round(rng.random() * 0.2, 3) for op in NOISE_OPS},
+            seed=i,
+            timestamp=1_700_000_000 + i,
+        )
+        for i in range(labels)
+    ]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--labels", type=int, default=500_000)
+    parser.add_argument("--batch", type=int, default=50_000)
+    args = parser.parse_args()
+
+    entries = synthetic_entries(args.labels)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ParquetLabelStore(tmp, compact_every=1_000_000)
+        _, append_seconds = timed(
+            lambda: [
+                store.append(entries[i : i + args.batch])
+                for i in range(0, len(entries), args.batch)
+            ]
+        )
+        _, compact_seconds = timed(store.compact)
+
+        reopened = ParquetLabelStore(tmp)
+        ids, ids_seconds = timed(lambda: reopened.query(columns=["record_id", "label"]))
+        _, full_seconds = timed(reopened.query)
+        hits, filtered_seconds = timed(
+            lambda: reopened.query(
+                columns=["record_id"],
+                label="unacceptable",
+                noise_op="noise_op_3",
+                severity_range=(0.1, 0.2),
+            )
+        )
+
+    print(
+        json.dumps(
+            {
+                "labels": args.labels,
+                "append_seconds": append_seconds,
+                "compact_seconds": compact_seconds,
+                "load_two_columns_seconds": ids_seconds,
+                "load_all_columns_seconds": full_seconds,
+                "filtered_query_seconds": filtered_seconds,
+                "filtered_rows": hits.num_rows,
+                "rows": ids.num_rows,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
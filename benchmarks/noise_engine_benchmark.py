@@ -0,0 +1,97 @@
+"""
+Per-op PIL chain versus the fused NumPy array engine.
+
+    python -m benchmarks.noise_engine_benchmark --size 3000x2000
+
+The reference chain implements the same five ops the way typical noise
+functions do: each takes and returns a PIL image, so every NumPy-based op
+converts in and out again.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+from PIL import Image as PILImage
+from PIL import ImageEnhance, ImageFilter
+
+from adaptive_labeler.imaging.array_engine import KERNELS, apply_array_ops
+from adaptive_labeler.imaging.noise_chain import seeded
+
+SEVERITIES = {
+    "brightness": 0.2,
+    "contrast": 0.3,
+    "gaussian_noise": 0.05,
+    "salt_and_pepper": 0.02,
+    "box_blur": 0.2,
+}
+
+
+def reference_chain(image: PILImage.Image) -> PILImage.Image:
+    image = ImageEnhance.Brightness(image).enhance(1 - SEVERITIES["brightness"])
+    image = ImageEnhance.Contrast(image).enhance(1 - SEVERITIES["contrast"])
+
+    pixels = np.asarray(image, dtype=np.float32)
+    noise = np.random.normal(0, 255 * SEVERITIES["gaussian_noise"], pixels.shape)
+    image = PILImage.fromarray(np.clip(pixels + noise, 0, 255).astype(np.uint8))
+
+    pixels = np.array(image)
+    draws = np.random.random(pixels.shape[:2])
+    pixels[draws < SEVERITIES["salt_and_pepper"] / 2] = 0
+    pixels[draws > 1 - SEVERITIES["salt_and_pepper"] / 2] = 255
+    image = PILImage.fromarray(pixels)
+
+    radius = round(SEVERITIES["box_blur"] * 10)
+    return image.filter(ImageFilter.BoxBlur(radius))
+
+
+def engine_chain(image: PILImage.Image) -> PILImage.Image:
+    return apply_array_ops(
+        image,
+        [(KERNELS[f"array_{name}"], severity) for name, severity in SEVERITIES.items()],
+    )
+
+
+def time_chain(chain, image: PILImage.Image, repeats: int) -> dict:
+    timings = []
+    for i in range(repeats):
+        with seeded(i):
+            start = time.perf_counter()
+            chain(image)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "best_ms": timings[0] * 1000,
+        "median_ms": timings[len(timings) // 2] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", default="3000x2000", help="WIDTHxHEIGHT")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    width, height = (int(n) for n in args.size.lower().split("x"))
+    rng = np.random.default_rng(0)
+    image = PILImage.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+
+    reference = time_chain(reference_chain, image, args.repeats)
+    engine = time_chain(engine_chain, image, args.repeats)
+    print(
+        json.dumps(
+            {
+                "size": [width, height],
+                "ops": list(SEVERITIES),
+                "pil_chain": reference,
+                "array_engine": engine,
+                "speedup": reference["median_ms"] / engine["median_ms"],
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
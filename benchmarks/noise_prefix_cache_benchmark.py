@@ -0,0 +1,113 @@
+"""
+Noise prefix cache: re-rendering after moving one op's slider.
+
+    python -m benchmarks.noise_prefix_cache_benchmark --size 1024 --tweaks 20
+
+A six-op chain runs on a preview-sized image. After one full render, the
+slider of the op at --position (counted from the end) is nudged --tweaks
+times, rendering each state from scratch and through a NoiseChainCache.
+"""
+
+import argparse
+import io
+import json
+import random
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+from PIL import Image as PILImage
+from PIL import ImageEnhance, ImageFilter
+
+from adaptive_labeler.imaging.noise_chain import (
+    NoiseChainCache,
+    RenderSpec,
+    render_chain,
+)
+
+
+@dataclass
+class Operation:
+    name: str
+    fn: Callable
+
+
+def gaussian_noise(image, severity):
+    pixels = np.asarray(image, dtype=np.float32)
+    noise = np.random.normal(0, 64 * severity, pixels.shape)
+    return PILImage.fromarray(np.clip(pixels + noise, 0, 255).astype(np.uint8))
+
+
+def jpeg(image, severity):
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=max(5, int(95 - 90 * severity)))
+    return PILImage.open(buffer).convert("RGB")
+
+
+OPERATIONS = [
+    Operation("blur", lambda im, s: im.filter(ImageFilter.GaussianBlur(4 * s))),
+    Operation("gaussian_noise", gaussian_noise),
+    Operation("median", lambda im, s: im.filter(ImageFilter.MedianFilter(5))),
+    Operation("contrast", lambda im, s: ImageEnhance.Contrast(im).enhance(1 - s / 2)),
+    Operation("rotate", lambda im, s: im.rotate(random.uniform(-10, 10) * s)),
+    Operation("jpeg", jpeg),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--tweaks", type=int, default=20)
+    parser.add_argument("--position", type=int, default=1, help="1 = last op")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (args.size, args.size, 3), dtype=np.uint8)
+    source = PILImage.fromarray(pixels)
+    base = {op.name: 0.3 for op in OPERATIONS}
+    tuned = OPERATIONS[-args.position].name
+    specs = [
+        RenderSpec(
+            tuple(
+                (name, 0.3 + 0.02 * i if name == tuned else s)
+                for name, s in base.items()
+            ),
+            seed=42,
+        )
+        for i in range(args.tweaks + 1)
+    ]
+
+    def time_renders(cache):
+        timings = []
+        for spec in specs[1:]:
+            start = time.perf_counter()
+            render_chain(source.copy(), OPERATIONS, spec, cache, "source")
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000
+
+    full_ms = time_renders(None)
+    cache = NoiseChainCache()
+    render_chain(source.copy(), OPERATIONS, specs[0], cache, "source")
+    cached_ms = time_renders(cache)
+
+    print(
+        json.dumps(
+            {
+                "size": args.size,
+                "ops": len(OPERATIONS),
+                "tuned_op": tuned,
+                "full_render_ms": full_ms,
+                "prefix_cached_ms": cached_ms,
+                "speedup": full_ms / cached_ms,
+                "hit_rate": cache.stats.hit_rate,
+                "cache_bytes": cache.bytes_used,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Relabeling past records in a large label store.
+
+    python -m benchmarks.relabel_benchmark --labels 500000 --bulk 5000
+
+The journal and store are filled with --labels records and compacted. Then
+one record is relabeled --singles times, and --bulk records at once, each
+made durable (journal fsync, override part) before the clock stops. The
+compacted data file must be untouched afterwards. "labeled_query_ms" is a
+label-filtered query with every override in place.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from adaptive_labeler.labels.label_journal import LabelJournal
+from adaptive_labeler.labels.parquet_label_store import ParquetLabelStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--labels", type=int, default=500_000)
+    parser.add_argument("--singles", type=int, default=50)
+    parser.add_argument("--bulk", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workspace:
+        workspace = Path(workspace)
+        store = ParquetLabelStore(workspace / "labels", compact_every=1_000_000)
+        journal = LabelJournal(
+            workspace / "labels.journal.jsonl",
+            sinks=[store.journal_sink],
+            batch_size=65536,
+        )
+        for i in range(args.labels):
+            journal.record(f"{i}.jpg", "acceptable", {"blur": 0.1}, seed=i)
+        journal.flush()
+        store.compact()
+        data_file = store.directory / store.COMPACTED_NAME
+        data_mtime = data_file.stat().st_mtime_ns
+
+        rng = random.Random(0)
+        singles = []
+        for _ in range(args.singles):
+            record_id = rng.randrange(1, args.labels + 1)
+            start = time.perf_counter()
+            journal.relabel([record_id], "unacceptable")
+            journal.flush()
+            singles.append(time.perf_counter() - start)
+
+        bulk_ids = rng.sample(range(1, args.labels + 1), args.bulk)
+        batches = journal.stats.batches
+        start = time.perf_counter()
+        changed = journal.relabel(bulk_ids, "unacceptable")
+        journal.flush()
+        bulk_s = time.perf_counter() - start
+        bulk_batches = journal.stats.batches - batches
+
+        start = time.perf_counter()
+        unacceptable = store.query(columns=["record_id"], label="unacceptable").num_rows
+        query_ms = (time.perf_counter() - start) * 1000
+        journal.close()
+
+        print(
+            json.dumps(
+                {
+                    "labels": args.labels,
+                    "single_relabel_ms": statistics.median(singles) * 1000,
+                    "bulk_records": len(changed),
+                    "bulk_relabel_s": bulk_s,
+                    "bulk_journal_batches": bulk_batches,
+                    "labeled_query_ms": query_ms,
+                    "unacceptable": unacceptable,
+                    "data_file_rewritten": data_file.stat().st_mtime_ns != data_mtime,
+                },
+                indent=2,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Review grid: scrolling through a large label store.
+
+    python -m benchmarks.review_grid_benchmark --labels 100000 --jumps 200
+
+A Parquet label store is filled with --labels records over a small corpus,
+then a 6x4 grid of tiles is bound at --jumps random scroll positions, with
+and without a label filter. Binding covers reading the records and
+queueing their thumbnails. "first_screen" waits for every thumbnail of the
+first screen, rendered cold and then read back from the persistent cache
+by a new session.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from adaptive_labeler.controls.review_grid import ReviewGrid
+from adaptive_labeler.imaging.image_cache import ImageCache
+from adaptive_labeler.imaging.preview_renderer import PreviewRenderer
+from adaptive_labeler.imaging.thumbnail_cache import ThumbnailCache
+from adaptive_labeler.labels.label_journal import LabelEntry
+from adaptive_labeler.labels.parquet_label_store import ParquetLabelStore
+from adaptive_labeler.labels.review_cursor import ReviewCursor
+from adaptive_labeler.runtime.ui_loop import UiLoop
+from benchmarks.headless import make_corpus
+
+COLUMNS, ROWS, TILE = 6, 4, 160
+
+
+def fill_store(directory: Path, images: list[Path], labels: int) -> ParquetLabelStore:
+    store = ParquetLabelStore(directory, compact_every=1_000_000)
+    rng = random.Random(0)
+    batch = []
+    for record_id in range(1, labels + 1):
+        batch.append(
+            LabelEntry(
+                record_id,
+                str(images[record_id % len(images)]),
+                rng.choice(("acceptable", "unacceptable")),
+                {"blur": rng.random() / 2},
+                seed=record_id,
+            )
+        )
+        if len(batch) == 10_000:
+            store.append(batch)
+            batch = []
+    store.append(batch)
+    store.compact()
+    return store
+
+
+def make_grid(store: ParquetLabelStore, thumbnails: ThumbnailCache) -> ReviewGrid:
+    async def on_open(index):
+        pass
+
+    cursor = ReviewCursor(store, lambda record: None)
+    grid = ReviewGrid(cursor, thumbnails, on_open, ui_loop=UiLoop())
+    grid.fit(COLUMNS * (TILE + grid.SPACING), ROWS * grid.row_extent)
+    return grid
+
+
+def time_jumps(grid: ReviewGrid, jumps: int) -> float:
+    rng = random.Random(1)
+    timings = []
+    for _ in range(jumps):
+        grid.first_row = rng.randrange(max(len(grid.cursor) // COLUMNS - ROWS, 1))
+        start = time.perf_counter()
+        grid.ui_loop.run_coroutine(grid._refresh()).result()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def first_screen(grid: ReviewGrid) -> float:
+    start = time.perf_counter()
+    grid.ui_loop.run_coroutine(grid._refresh()).result()
+    concurrent.futures.wait([tile.pending for tile in grid.tiles if tile.pending])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--labels", type=int, default=100_000)
+    parser.add_argument("--jumps", type=int, default=200)
+    parser.add_argument("--images", type=int, default=48)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workspace:
+        workspace = Path(workspace)
+        images = sorted(
+            make_corpus(workspace / "images", args.images, 1024, 768).glob("*.jpg")
+        )
+        start = time.perf_counter()
+        store = fill_store(workspace / "labels", images, args.labels)
+        fill_s = time.perf_counter() - start
+
+        renderer = PreviewRenderer((TILE, TILE), ImageCache())
+
+        def thumbnail_cache():
+            return ThumbnailCache(
+                workspace / "thumbnails",
+                lambda path, spec: renderer.render_file(path, [], spec),
+                size=TILE,
+            )
+
+        cold = make_grid(store, thumbnail_cache())
+        cold_s = first_screen(cold)
+        cold.thumbnails.close()
+        warm = make_grid(store, thumbnail_cache())
+        warm_s = first_screen(warm)
+
+        all_ms = time_jumps(warm, args.jumps)
+        warm.cursor.set_label("unacceptable")
+        filtered_ms = time_jumps(warm, args.jumps)
+        warm.thumbnails.close()
+
+    print(
+        json.dumps(
+            {
+                "labels": args.labels,
+                "tiles": COLUMNS * ROWS,
+                "fill_store_s": fill_s,
+                "jump_bind_ms": all_ms,
+                "jump_bind_filtered_ms": filtered_ms,
+                "first_screen_cold_s": cold_s,
+                "first_screen_warm_s": warm_s,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
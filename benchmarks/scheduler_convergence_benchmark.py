@@ -0,0 +1,160 @@
+"""
+Labels needed to find the acceptable/unacceptable boundary, per scheduler.
+
+    python -m benchmarks.scheduler_convergence_benchmark --trials 50
+
+A simulated labeler calls a render unacceptable with probability
+sigmoid((sum(severity / threshold) - 1) / noise), so the true boundary is a
+plane in severity space. Every pair gets a fresh seed and is labeled once,
+at the master value its scheduler proposes. Random sampling labels at a
+uniform master value and fits the same logistic model as the "logistic"
+scheduler, so the comparison is only about where labels are taken.
+
+Each run is scored on held-out split directions: the mean distance between
+the scheduler's boundary estimate along a direction and the true one, in
+master-severity units. A scheduler has converged once that error, averaged
+over trials, stays within `--tolerance` for the rest of the budget.
+"""
+
+import argparse
+import json
+import math
+import random
+import statistics
+
+from adaptive_labeler.imaging.noise_chain import split_master_severity
+from adaptive_labeler.sampling.severity_scheduler import (
+    LogisticScheduler,
+    SeverityScheduler,
+    StaircaseScheduler,
+)
+
+THRESHOLDS = {"blur": 0.5, "gaussian_noise": 0.25, "jpeg": 0.8}
+CHECKPOINTS = (50, 100, 200, 400, 600, 800, 1000)
+
+
+class RandomSampling(LogisticScheduler):
+    """Uniform master values, boundary fitted the same way as `logistic`."""
+
+    def propose(self, split, rng: random.Random) -> float:
+        return round(rng.uniform(0.0, self.max_master), 3)
+
+
+def held_out_directions(count: int) -> list[dict]:
+    return [
+        split_master_severity(1.0, list(THRESHOLDS), 1_000_000 + i)
+        for i in range(count)
+    ]
+
+
+def true_boundary(direction: dict) -> float:
+    """Master severity at p = 0.5 when split in proportion to `direction`."""
+    total = sum(direction.values())
+    return total / sum(direction[name] / t for name, t in THRESHOLDS.items())
+
+
+def boundary_error(scheduler: SeverityScheduler, directions: list) -> float:
+    errors = []
+    for direction in directions:
+        estimate = scheduler.estimate(direction)
+        if estimate is None:
+            return math.inf
+        errors.append(abs(estimate - true_boundary(direction)))
+    return statistics.mean(errors)
+
+
+def label(severities: dict, noise: float, rng: random.Random) -> str:
+    load = sum(severities[name] / t for name, t in THRESHOLDS.items())
+    p = 1 / (1 + math.exp(-(load - 1) / noise))
+    return "unacceptable" if rng.random() < p else "acceptable"
+
+
+def run(
+    scheduler: SeverityScheduler,
+    budget: int,
+    noise: float,
+    seed: int,
+    directions: list,
+    every: int,
+) -> list:
+    """Boundary error after every `every` labels."""
+    rng = random.Random(seed)
+    names = list(THRESHOLDS)
+    errors = []
+    for i in range(budget):
+        pair_seed = rng.getrandbits(32)
+
+        def split(master):
+            return split_master_severity(master, names, pair_seed)
+
+        master = scheduler.propose(split, random.Random(pair_seed))
+        severities = split(master)
+        scheduler.observe(severities, label(severities, noise, rng))
+        if (i + 1) % every == 0:
+            errors.append(boundary_error(scheduler, directions))
+    return errors
+
+
+def labels_to_converge(curve: list, tolerance: float, every: int) -> int | None:
+    """Labels after which `curve` stays within `tolerance`, if it gets there."""
+    for i in range(len(curve) - 1, -1, -1):
+        if curve[i] > tolerance:
+            return (i + 2) * every if i + 1 < len(curve) else None
+    return every
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trials", type=int, default=50)
+    parser.add_argument("--budget", type=int, default=1000)
+    parser.add_argument("--noise", type=float, default=0.1)
+    parser.add_argument("--tolerance", type=float, default=0.03)
+    parser.add_argument("--every", type=int, default=10, help="labels per check")
+    parser.add_argument("--directions", type=int, default=20)
+    args = parser.parse_args()
+
+    directions = held_out_directions(args.directions)
+
+    schedulers = {
+        "random": RandomSampling,
+        "staircase": StaircaseScheduler,
+        "logistic": LogisticScheduler,
+    }
+    report = {
+        "thresholds": THRESHOLDS,
+        "tolerance": args.tolerance,
+        "budget": args.budget,
+    }
+    for name, scheduler_class in schedulers.items():
+        runs = [
+            run(
+                scheduler_class(),
+                args.budget,
+                args.noise,
+                trial,
+                directions,
+                args.every,
+            )
+            for trial in range(args.trials)
+        ]
+        curve = [statistics.mean(errors) for errors in zip(*runs)]
+        report[name] = {
+            "labels_to_converge": labels_to_converge(curve, args.tolerance, args.every),
+            "error_at": {
+                (i + 1) * args.every: round(error, 4)
+                for i, error in enumerate(curve)
+                if (i + 1) * args.every in CHECKPOINTS
+            },
+        }
+
+    # Random sampling that never converges counts as the whole budget, which
+    # understates how much it would have needed.
+    random_labels = report["random"]["labels_to_converge"] or args.budget
+    for name in ("staircase", "logistic"):
+        labels = report[name]["labels_to_converge"]
+        report[name]["labels_vs_random"] = labels / random_labels if labels else None
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Startup cost: package import and time to the first image, without a window.
+
+    python -m benchmarks.startup_benchmark --images 200
+
+Import times are measured in fresh interpreters. "first_image" builds the
+label manager and the labeling view the way the app's background loader
+does, against a HeadlessPage, and reports the StartupMetrics milestones
+measured from the moment the (already imported) app would first paint.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+IMPORTS = {
+    "package": "import adaptive_labeler",
+    "config": "from adaptive_labeler import LabelerConfig",
+    "app": "from adaptive_labeler import LabelAppFactory",
+}
+
+
+def import_seconds(statement: str, repeats: int) -> float:
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"{statement}; print(time.perf_counter() - start)"
+    )
+    timings = [
+        float(
+            subprocess.run(
+                [sys.executable, "-c", code], capture_output=True, text=True, check=True
+            ).stdout
+        )
+        for _ in range(repeats)
+    ]
+    return statistics.median(timings)
+
+
+def first_image(images: int) -> dict:
+    from adaptive_labeler.labeler_config import LabelerConfig
+    from adaptive_labeler.runtime.startup import StartupMetrics
+    from adaptive_labeler.runtime.update_batcher import UpdateBatcher
+    from adaptive_labeler.views.image_pair_control_view import ImagePairControlView
+    from benchmarks.headless import HeadlessPage, make_corpus
+    from labeling.label_manager import LabelManager
+    from labeling.label_manager_config import LabelManagerConfig
+
+    with tempfile.TemporaryDirectory() as workspace:
+        workspace = Path(workspace)
+        images_dir = make_corpus(workspace / "images", images, 1600, 1200)
+        config = LabelerConfig(
+            label_manager_config=LabelManagerConfig(
+                images_dir=str(images_dir),
+                output_dir=str(workspace / "output"),
+                temporary_dir=str(workspace / "output" / "temporary"),
+                image_samples=images,
+            )
+        )
+
+        page = HeadlessPage()
+        startup = StartupMetrics(origin=time.perf_counter())
+        startup.mark("first_paint")
+        label_manager = LabelManager(config.label_manager_config)
+        startup.mark("label_manager")
+        view = ImagePairControlView(
+            label_manager, config=config, update_batcher=UpdateBatcher()
+        )
+        startup.mark("view")
+        page.attach(view)
+        page.update(view)
+        startup.mark("first_image")
+        view.close()
+    return startup.marks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        json.dumps(
+            {
+                "import_s": {
+                    name: import_seconds(statement, args.repeats)
+                    for name, statement in IMPORTS.items()
+                },
+                "startup_s": first_image(args.images),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import sys
+from dataclasses import dataclass
+from types import ModuleType, SimpleNamespace
+from typing import Callable
+
+import numpy as np
+import pytest
+from PIL import Image as PILImage
+
+from adaptive_labeler.imaging.array_engine import (
+    BLOCK_ROWS,
+    KERNELS,
+    ArrayNoiseFn,
+    apply_array_ops,
+    bind_array_ops,
+)
+from adaptive_labeler.imaging.noise_chain import RenderSpec, render_chain, seeded
+
+
+@dataclass
+class FakeNoiseOperation:
+    name: str
+    fn: Callable
+    severity: float = 0.0
+
+
+def gradient_image(width=96, height=64):
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    pixels = np.stack([np.tile(x, (height, 1))] * 3, axis=-1)
+    return PILImage.fromarray(pixels.astype(np.uint8))
+
+
+OPS = [
+    (KERNELS["array_brightness"], 0.2),
+    (KERNELS["array_gaussian_noise"], 0.1),
+    (KERNELS["array_box_blur"], 0.2),
+    (KERNELS["array_contrast"], 0.3),
+    (KERNELS["array_salt_and_pepper"], 0.05),
+]
+
+
+def test_tiling_does_not_change_the_result():
+    image = gradient_image()
+    with seeded(5):
+        whole = apply_array_ops(image, OPS, tile_bytes=1 << 30)
+    with seeded(5):
+        tiled = apply_array_ops(image, OPS, tile_bytes=1)
+
+    assert whole.tobytes() == tiled.tobytes()
+
+
+def test_fused_chain_matches_ops_applied_one_at_a_time():
+    operations = [
+        FakeNoiseOperation(array_op.name, ArrayNoiseFn(array_op)) for array_op, _ in OPS
+    ]
+    spec = RenderSpec(tuple((op.name, sev) for op, sev in OPS), seed=9)
+
+    fused = np.asarray(render_chain(gradient_image(), operations, spec), np.int16)
+    with seeded(spec.seed):
+        image = gradient_image()
+        for noise_op in operations:
+            image = noise_op.fn(image, spec.severity_of(noise_op.name))
+    stepwise = np.asarray(image, np.int16)
+
+    # Only the uint8 rounding between steps differs, and blur spreads it a bit.
+    assert np.abs(fused - stepwise).mean() < 1.0
+
+
+def test_zero_severity_is_a_no_op():
+    image = gradient_image()
+
+    assert apply_array_ops(image, [(KERNELS["array_gaussian_noise"], 0.0)]) is image
+
+
+def test_box_blur_keeps_flat_images_flat():
+    image = PILImage.new("RGB", (40, 30), color=(10, 200, 90))
+
+    blurred = apply_array_ops(image, [(KERNELS["array_box_blur"], 0.5)])
+
+    assert blurred.tobytes() == image.tobytes()
+
+
+def test_noise_blocks_draw_their_own_streams():
+    image = PILImage.new("RGB", (40, 2 * BLOCK_ROWS), color=(128, 128, 128))
+    top = image.crop((0, 0, 40, BLOCK_ROWS))
+    ops = [(KERNELS["array_gaussian_noise"], 0.1)]
+
+    with seeded(3):
+        whole = np.asarray(apply_array_ops(image, ops))
+    with seeded(3):
+        alone = np.asarray(apply_array_ops(top, ops))
+
+    # A block's noise does not depend on the rows around it...
+    assert (whole[:BLOCK_ROWS] == alone).all()
+    # ...and no two blocks repeat the same draws.
+    assert (whole[:BLOCK_ROWS] != whole[BLOCK_ROWS:]).any()
+
+
+@pytest.fixture
+def fake_image_utils(monkeypatch):
+    # bind_array_ops builds image_utils' NosingOperation, which is not installed.
+    package = ModuleType("image_utils")
+    module = ModuleType("image_utils.noising_operation")
+    module.NosingOperation = FakeNoiseOperation
+    package.noising_operation = module
+    monkeypatch.setitem(sys.modules, "image_utils", package)
+    monkeypatch.setitem(sys.modules, "image_utils.noising_operation", module)
+
+
+def test_bound_ops_are_added_under_their_own_names(fake_image_utils):
+    blur = FakeNoiseOperation("blur", lambda image, severity: image)
+    maker = SimpleNamespace(noise_operations=[blur])
+
+    bind_array_ops(maker, ["array_gaussian_noise", "array_gaussian_noise"])
+
+    names = [noise_op.name for noise_op in maker.noise_operations]
+    assert names == ["blur", "array_gaussian_noise"]
+    assert maker.noise_operations[0] is blur
+    assert isinstance(maker.noise_operations[1].fn, ArrayNoiseFn)
+
+
+def test_binding_no_ops_leaves_the_chain_alone():
+    maker = SimpleNamespace(noise_operations=[])
+
+    bind_array_ops(maker, ())
+
+    assert maker.noise_operations == []
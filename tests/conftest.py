@@ -1,9 +1,9 @@
+import numpy as np
 import pytest
 from PIL import Image as PILImage
 import shutil
 from pathlib import Path
 
-
 TEMP_ROOT = Path("tests") / "temp_data"
 TEMP_ROOT.mkdir(parents=True, exist_ok=True)
 
@@ -51,6 +51,19 @@ def tmp_image_dir():
     yield tmpdir
 
 
+@pytest.fixture
+def textured_image():
+    """Writes a smooth random image; the same seed gives the same picture."""
+
+    def write(path, seed, size=(160, 120)):
+        pixels = np.random.default_rng(seed).random((12, 16)) * 255
+        image = PILImage.fromarray(pixels.astype("uint8"))
+        image.resize(size, PILImage.BICUBIC).convert("RGB").save(path)
+        return path
+
+    return write
+
+
 @pytest.fixture
 def tmp_output_dir():
     """Create a temp directory for noisy output."""
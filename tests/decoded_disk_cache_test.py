@@ -0,0 +1,109 @@
+import os
+import time
+
+import numpy as np
+from PIL import Image as PILImage
+
+from adaptive_labeler.imaging.decoded_disk_cache import DecodedDiskCache, image_files
+from adaptive_labeler.imaging.image_cache import ImageCache
+
+
+def test_decoded_pixels_survive_a_reopen(tmp_image_dir, tmp_output_dir):
+    source = tmp_image_dir / "test_image_1.jpg"
+    cache = DecodedDiskCache(tmp_output_dir / "decoded")
+    decoded = cache.get_or_decode(source)
+    cache.close()
+
+    reopened = DecodedDiskCache(tmp_output_dir / "decoded")
+    pixels = reopened.array(source)
+
+    assert pixels is not None
+    assert not pixels.flags.writeable
+    np.testing.assert_array_equal(pixels, np.asarray(decoded))
+    assert reopened.stats.hits == 1
+    reopened.close()
+
+
+def test_changed_source_is_decoded_again(tmp_image_dir, tmp_output_dir):
+    source = tmp_image_dir / "test_image_0.jpg"
+    cache = DecodedDiskCache(tmp_output_dir / "decoded")
+    cache.get_or_decode(source)
+
+    PILImage.new("RGB", (60, 40), color="red").save(source)
+    later = time.time() + 5
+    os.utime(source, (later, later))
+
+    assert cache.get(source) is None
+    assert cache.get_or_decode(source).size == (60, 40)
+    cache.close()
+
+
+def test_downscales_to_max_size(tmp_image_dir, tmp_output_dir):
+    cache = DecodedDiskCache(tmp_output_dir / "decoded", max_size=32)
+
+    image = cache.get_or_decode(tmp_image_dir / "test_image_2.jpg")
+
+    assert max(image.size) == 32
+    cache.close()
+
+
+def test_size_cap_keeps_most_recently_used(tmp_image_dir, tmp_output_dir):
+    for i in range(3, 5):
+        PILImage.new("RGB", (100, 100)).save(tmp_image_dir / f"test_image_{i}.jpg")
+    # Each source is 30,000 bytes decoded, so the fifth one overflows.
+    cache = DecodedDiskCache(tmp_output_dir / "decoded", max_bytes=130_000)
+    sources = sorted(image_files(tmp_image_dir))
+
+    for source in sources[:4]:
+        cache.get_or_decode(source)
+    cache.get(sources[0])
+    cache.get_or_decode(sources[4])
+
+    assert cache.get(sources[0]) is not None
+    assert cache.get(sources[4]) is not None
+    assert all(cache.get(source) is None for source in sources[1:4])
+    assert cache.stats.evictions == 3
+    assert cache.data_path.stat().st_size <= 130_000
+    cache.close()
+
+
+def test_torn_writes_are_ignored(tmp_image_dir, tmp_output_dir):
+    first, second, _ = sorted(image_files(tmp_image_dir))
+    cache = DecodedDiskCache(tmp_output_dir / "decoded")
+    cache.get_or_decode(first)
+    cache.get_or_decode(second)
+    cache.close()
+
+    with open(cache.data_path, "r+b") as data:
+        data.truncate(cache.data_path.stat().st_size - 10)
+    with open(cache.index_path, "a") as index:
+        index.write('{"path": "torn')
+
+    reopened = DecodedDiskCache(tmp_output_dir / "decoded")
+    assert reopened.get(first) is not None
+    assert reopened.get(second) is None
+    reopened.close()
+
+
+def test_warm_decodes_every_source(tmp_image_dir, tmp_output_dir):
+    cache = DecodedDiskCache(tmp_output_dir / "decoded")
+
+    cache.warm(image_files(tmp_image_dir))
+    deadline = time.time() + 5
+    while cache.stats.entries < 3 and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert cache.stats.entries == 3
+    cache.close()
+
+
+def test_image_cache_reads_display_sizes_from_disk(tmp_image_dir, tmp_output_dir):
+    source = tmp_image_dir / "test_image_1.jpg"
+    disk = DecodedDiskCache(tmp_output_dir / "decoded", max_size=64)
+    ImageCache(disk=disk).decoded(source, (48, 48))
+
+    image = ImageCache(disk=disk).decoded(source, (48, 48))
+
+    assert image.size == (48, 48)
+    assert disk.stats.hits == 1
+    disk.close()
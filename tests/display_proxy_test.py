@@ -0,0 +1,54 @@
+from PIL import Image as PILImage
+
+from adaptive_labeler.imaging.display_proxy import DisplayProxy
+from adaptive_labeler.imaging.image_cache import (
+    ImageCache,
+    decode_base64,
+    encode_base64,
+)
+
+
+def test_target_size_scales_the_box_by_pixel_ratio():
+    proxy = DisplayProxy(box_width=300, box_height=200, pixel_ratio=1.5)
+
+    assert proxy.target_size == (450, 300)
+    assert DisplayProxy(10, 10, pixel_ratio=1.0).target_size == (64, 64)
+
+
+def test_fit_keeps_settings_and_a_minimum_box():
+    proxy = DisplayProxy(pixel_ratio=1.0, format="PNG", quality=70)
+
+    fitted = proxy.fit(500.7, 12)
+
+    assert (fitted.box_width, fitted.box_height) == (500, DisplayProxy.MIN_BOX)
+    assert (fitted.format, fitted.quality) == ("PNG", 70)
+    assert fitted == proxy.fit(500.2, 30)
+
+
+def test_encode_only_downscales_larger_images():
+    proxy = DisplayProxy(box_width=100, box_height=80, pixel_ratio=1.0)
+    large = PILImage.new("RGB", (400, 200), color="red")
+    small = PILImage.new("RGB", (30, 20), color="red")
+
+    assert decode_base64(proxy.encode(large)).size == (100, 50)
+    assert decode_base64(proxy.encode(small)).size == (30, 20)
+    # The caller's image is left as it was.
+    assert large.size == (400, 200)
+
+
+def test_from_base64_reencodes_at_display_size():
+    proxy = DisplayProxy(box_width=64, box_height=64, pixel_ratio=1.0)
+    full = encode_base64(PILImage.new("RGB", (256, 128), color="blue"))
+
+    assert decode_base64(proxy.from_base64(full)).size == (64, 32)
+
+
+def test_original_base64_is_cached_at_display_size(tmp_image_dir):
+    proxy = DisplayProxy(box_width=64, box_height=64, pixel_ratio=1.0)
+    cache = ImageCache()
+    image = tmp_image_dir / "test_image_1.jpg"
+
+    encoded = proxy.original_base64(image, cache)
+
+    assert decode_base64(encoded).size == (64, 64)
+    assert proxy.original_base64(image, cache) is encoded
@@ -0,0 +1,96 @@
+import os
+import time
+
+from PIL import Image as PILImage
+
+from adaptive_labeler.labels.duplicate_index import DuplicateIndex
+from adaptive_labeler.labels.image_index import ImageIndex
+
+
+def make_tree(directory, textured_image):
+    for name in os.listdir(directory):
+        os.remove(directory / name)
+    for i in range(3):
+        textured_image(directory / f"photo_{i}.jpg", seed=i)
+    (directory / "exports").mkdir()
+    PILImage.open(directory / "photo_0.jpg").resize((80, 60)).save(
+        directory / "exports" / "photo_0_small.png"
+    )
+    PILImage.open(directory / "photo_0.jpg").save(
+        directory / "exports" / "photo_0_copy.jpg", quality=40
+    )
+
+
+def open_indexes(tmp_image_dir, tmp_output_dir):
+    image_index = ImageIndex(tmp_output_dir / "index.sqlite", tmp_image_dir)
+    image_index.refresh()
+    return image_index, DuplicateIndex(image_index, workers=2, batch_size=2)
+
+
+def test_copies_are_grouped_and_counted_once(
+    tmp_image_dir, tmp_output_dir, textured_image
+):
+    make_tree(tmp_image_dir, textured_image)
+    image_index, duplicates = open_indexes(tmp_image_dir, tmp_output_dir)
+
+    assert duplicates.refresh() == 5
+    assert duplicates.group_of("photo_0.jpg") == {
+        "photo_0.jpg",
+        "exports/photo_0_small.png",
+        "exports/photo_0_copy.jpg",
+    }
+    assert duplicates.duplicates_of("photo_1.jpg") == set()
+    assert (duplicates.unique_total, duplicates.unique_labeled_count) == (3, 0)
+
+    image_index.add_label(tmp_image_dir / "exports" / "photo_0_copy.jpg")
+    image_index.add_label("photo_0.jpg")
+    assert duplicates.unique_labeled_count == 1
+    assert duplicates.percentage_complete() == 1 / 3
+    assert duplicates.is_redundant("exports/photo_0_small.png")
+    assert not duplicates.is_redundant("photo_1.jpg")
+
+    image_index.remove_label("photo_0.jpg")
+    image_index.remove_label(tmp_image_dir / "exports" / "photo_0_copy.jpg")
+    assert not duplicates.is_redundant("exports/photo_0_small.png")
+    assert duplicates.unique_labeled_count == 0
+    duplicates.close()
+    image_index.close()
+
+
+def test_reopening_resumes_without_rehashing(
+    tmp_image_dir, tmp_output_dir, textured_image
+):
+    make_tree(tmp_image_dir, textured_image)
+    image_index, duplicates = open_indexes(tmp_image_dir, tmp_output_dir)
+    image_index.sync_labels(["photo_0.jpg"])
+    duplicates.refresh()
+    duplicates.close()
+    image_index.close()
+
+    image_index, duplicates = open_indexes(tmp_image_dir, tmp_output_dir)
+    image_index.sync_labels(["photo_0.jpg"])
+
+    assert duplicates.refresh() == 0
+    assert duplicates.stats.hashed == 0
+    assert duplicates.unique_total == 3
+    assert duplicates.is_redundant("exports/photo_0_copy.jpg")
+    duplicates.close()
+    image_index.close()
+
+
+def test_rewritten_images_are_regrouped(tmp_image_dir, tmp_output_dir, textured_image):
+    make_tree(tmp_image_dir, textured_image)
+    image_index, duplicates = open_indexes(tmp_image_dir, tmp_output_dir)
+    duplicates.refresh()
+
+    copy = tmp_image_dir / "exports" / "photo_0_copy.jpg"
+    textured_image(copy, seed=7)
+    later = time.time() + 5
+    os.utime(copy, (later, later))
+    image_index.refresh(full=True)
+
+    assert duplicates.refresh() == 1
+    assert duplicates.duplicates_of("photo_0.jpg") == {"exports/photo_0_small.png"}
+    assert duplicates.unique_total == 4
+    duplicates.close()
+    image_index.close()
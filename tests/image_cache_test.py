@@ -0,0 +1,77 @@
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from adaptive_labeler.imaging.image_cache import ByteBudgetLRU, ImageCache
+
+
+@dataclass
+class FakeImagePath:
+    path: Path
+    loads: int = 0
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    def load_as_base64(self) -> str:
+        self.loads += 1
+        return f"encoded:{self.path.name}"
+
+
+def test_lru_evicts_least_recently_used_over_budget():
+    lru = ByteBudgetLRU(max_bytes=10)
+    lru.put("a", 1, 4)
+    lru.put("b", 2, 4)
+    assert lru.get("a") == 1
+
+    lru.put("c", 3, 4)
+
+    assert "b" not in lru
+    assert "a" in lru and "c" in lru
+    assert lru.stats.evictions == 1
+    assert lru.stats.bytes_used == 8
+
+
+def test_lru_skips_items_larger_than_budget():
+    lru = ByteBudgetLRU(max_bytes=10)
+    lru.put("a", 1, 4)
+    lru.put("huge", 2, 11)
+
+    assert "huge" not in lru
+    assert "a" in lru
+
+
+def test_original_base64_is_loaded_once(tmp_image_dir):
+    cache = ImageCache()
+    image_path = FakeImagePath(tmp_image_dir / "test_image_0.jpg")
+
+    for _ in range(5):
+        assert cache.original_base64(image_path) == "encoded:test_image_0.jpg"
+
+    assert image_path.loads == 1
+    assert cache.stats.hits == 4
+    assert cache.stats.misses == 1
+
+
+def test_entries_invalidate_when_file_changes(tmp_image_dir):
+    cache = ImageCache()
+    image_path = FakeImagePath(tmp_image_dir / "test_image_1.jpg")
+
+    cache.original_base64(image_path)
+    stat = os.stat(image_path.path)
+    os.utime(image_path.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    cache.original_base64(image_path)
+
+    assert image_path.loads == 2
+
+
+def test_decoded_respects_target_size(tmp_image_dir):
+    cache = ImageCache()
+    image_path = FakeImagePath(tmp_image_dir / "test_image_2.jpg")
+
+    image = cache.decoded(image_path, target_size=(40, 40))
+
+    assert max(image.size) == 40
+    assert image.mode == "RGB"
+    assert cache.decoded(image_path, target_size=(40, 40)) is image
@@ -0,0 +1,150 @@
+import os
+import time
+
+from PIL import Image as PILImage
+
+from adaptive_labeler.labels.image_index import ImageIndex
+
+
+def test_first_refresh_indexes_every_image(tmp_image_dir, tmp_output_dir):
+    index = ImageIndex(tmp_output_dir / "index.sqlite", tmp_image_dir)
+
+    changes = index.refresh()
+
+    assert sorted(changes.added) == [f"test_image_{i}.jpg" for i in range(3)]
+    assert (index.total, index.labeled_count, index.unlabeled_count) == (3, 0, 3)
+    image = index.get(tmp_image_dir / "test_image_0.jpg")
+    assert (image.width, image.height) == (100, 100)
+    assert image.content_hash is not None
+    index.close()
+
+
+def test_reopen_keeps_the_index_without_rehashing(tmp_image_dir, tmp_output_dir):
+    index = ImageIndex(tmp_output_dir / "index.sqlite", tmp_image_dir)
+    index.refresh()
+    index.close()
+
+    reopened = ImageIndex(tmp_output_dir / "index.sqlite", tmp_image_dir)
+
+    assert reopened.total == 3
+    assert reopened.pending_hashes == 0
+    assert not reopened.refresh()
+    reopened.close()
+
+
+def test_added_changed_and_removed_files_are_picked_up(tmp_image_dir, tmp_output_dir):
+    index = ImageIndex(tmp_output_dir / "index.sqlite", tmp_image_dir)
+    index.refresh()
+    before = index.get("test_image_1.jpg").content_hash
+
+    (tmp_image_dir / "nested").mkdir()
+    PILImage.new("RGB", (20, 10)).save(tmp_image_dir / "nested" / "new.png")
+    (tmp_image_dir / "test_image_2.jpg").unlink()
+    PILImage.new("RGB", (30, 30), color="red").save(tmp_image_dir / "test_image_1.jpg")
+    later = time.time() + 5
+    os.utime(tmp_image_dir / "test_image_1.jpg", (later, later))
+
+    changes = index.refresh(full=True)
+
+    assert changes.added == ["nested/new.png"]
+    assert changes.changed == ["test_image_1.jpg"]
+    assert changes.removed == ["test_image_2.jpg"]
+    assert index.total == 3
+    assert index.get("test_image_1.jpg").content_hash != before
+    assert index.get("nested/new.png").width == 20
+    index.close()
+
+
+def test_unreadable_directories_keep_what_was_indexed(
+    tmp_image_dir, tmp_output_dir, monkeypatch
+):
+    (tmp_image_dir / "nested" / "deeper").mkdir(parents=True)
+    PILImage.new("RGB", (20, 10)).save(tmp_image_dir / "nested" / "a.png")
+    PILImage.new("RGB", (20, 10)).save(tmp_image_dir / "nested" / "deeper" / "b.png")
+    index = ImageIndex(tmp_output_dir / "index.sqlite", tmp_image_dir)
+    index.refresh()
+    assert index.total == 5
+
+    scandir = os.scandir
+
+    def failing_scandir(path):
+        if os.path.basename(path) == "nested":
+            raise PermissionError("permission denied")
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", failing_scandir)
+    changes = index.refresh(full=True)
+
+    assert not changes.removed
+    assert index.get("nested/a.png") is not None
+    assert index.get("nested/deeper/b.png") is not None
+    index.close()
+
+
+def test_unchanged_directories_are_not_listed_again(tmp_image_dir, tmp_output_dir):
+    index = ImageIndex(tmp_output_dir / "index.sqlite", tmp_image_dir)
+    index.refresh()
+    listed = []
+    original = index._list
+    index._list = lambda directory: listed.append(directory) or original(directory)
+
+    index.refresh()
+    PILImage.new("RGB", (10, 10)).save(tmp_image_dir / "dropped_in.jpg")
+    changes = index.refresh()
+
+    assert listed == [""]
+    assert changes.added == ["dropped_in.jpg"]
+    index.close()
+
+
+def test_label_counts_follow_labels_and_files(tmp_image_dir, tmp_output_dir):
+    index = ImageIndex(tmp_output_dir / "index.sqlite", tmp_image_dir)
+    index.refresh()
+    first = tmp_image_dir / "test_image_0.jpg"
+
+    index.sync_labels([first, first, tmp_image_dir / "missing.jpg"])
+    assert index.labeled_count == 1
+    index.add_label(tmp_image_dir / "test_image_1.jpg")
+    index.remove_label(first)
+    assert index.labeled_count == 2
+    assert index.percentage_complete() == 2 / 3
+
+    index.remove_label(first)
+    first.unlink()
+    index.refresh()
+    assert (index.total, index.labeled_count) == (2, 1)
+    assert index.unlabeled() == [tmp_image_dir.resolve() / "test_image_2.jpg"]
+    index.close()
+
+
+def test_label_counts_sync_from_stored_counts(tmp_image_dir, tmp_output_dir):
+    index = ImageIndex(tmp_output_dir / "index.sqlite", tmp_image_dir)
+    index.refresh()
+
+    # The label store keeps paths relative to the images root.
+    index.sync_labels({"test_image_0.jpg": 2})
+    index.remove_label(tmp_image_dir / "test_image_0.jpg")
+
+    assert index.is_labeled(tmp_image_dir / "test_image_0.jpg")
+    assert index.labeled_count == 1
+    index.close()
+
+
+def test_watch_notifies_listeners(tmp_image_dir, tmp_output_dir):
+    index = ImageIndex(
+        tmp_output_dir / "index.sqlite", tmp_image_dir, poll_interval=0.01
+    )
+    seen = []
+    index.listeners.append(seen.append)
+    index.watch()
+
+    deadline = time.time() + 5
+    while not seen and time.time() < deadline:
+        time.sleep(0.01)
+    PILImage.new("RGB", (10, 10)).save(tmp_image_dir / "dropped_in.jpg")
+    while len(seen) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    index.close()
+
+    assert len(seen[0].added) == 3
+    assert seen[1].added == ["dropped_in.jpg"]
@@ -0,0 +1,88 @@
+import base64
+import urllib.error
+import urllib.request
+
+import pytest
+
+from adaptive_labeler.runtime.image_server import ImageServer
+
+
+@pytest.fixture
+def image_server():
+    server = ImageServer()
+    yield server
+    server.close()
+
+
+def test_published_bytes_are_served_raw(image_server, tmp_image_dir):
+    data = (tmp_image_dir / "test_image_0.jpg").read_bytes()
+
+    url = image_server.publish_base64(base64.b64encode(data).decode())
+    with urllib.request.urlopen(url) as response:
+        body = response.read()
+        headers = response.headers
+
+    assert url.endswith(".jpg")
+    assert body == data
+    assert headers["Content-Type"] == "image/jpeg"
+    assert "immutable" in headers["Cache-Control"]
+    assert image_server.stats.bytes_served == len(data)
+
+
+def test_urls_are_content_addressed(image_server, tmp_image_dir):
+    first = (tmp_image_dir / "test_image_0.jpg").read_bytes()
+    second = (tmp_image_dir / "test_image_1.jpg").read_bytes()
+
+    assert image_server.publish(first) == image_server.publish(first)
+    assert image_server.publish(first) != image_server.publish(second)
+
+
+def test_revalidation_is_not_modified(image_server, tmp_image_dir):
+    url = image_server.publish((tmp_image_dir / "test_image_2.jpg").read_bytes())
+    with urllib.request.urlopen(url) as response:
+        etag = response.headers["ETag"]
+
+    request = urllib.request.Request(url, headers={"If-None-Match": etag})
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request)
+
+    assert error.value.code == 304
+    assert image_server.stats.not_modified == 1
+
+
+def test_evicted_images_are_not_found(tmp_image_dir):
+    server = ImageServer(max_bytes=1)
+    url = server.publish((tmp_image_dir / "test_image_0.jpg").read_bytes())
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(url)
+
+    assert error.value.code == 404
+    server.close()
+
+
+def test_shown_images_are_pinned_past_eviction(tmp_image_dir):
+    server = ImageServer(max_bytes=1)
+    first = (tmp_image_dir / "test_image_0.jpg").read_bytes()
+    second = (tmp_image_dir / "test_image_1.jpg").read_bytes()
+
+    shown = server.publish(first, slot="noisy")
+    with urllib.request.urlopen(shown) as response:
+        assert response.read() == first
+
+    server.publish(second, slot="noisy")
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(shown)
+
+    assert error.value.code == 404
+    server.close()
+
+
+def test_republishing_a_string_skips_the_decode(image_server, tmp_image_dir):
+    data = (tmp_image_dir / "test_image_0.jpg").read_bytes()
+    image_base64 = base64.b64encode(data).decode()
+
+    url = image_server.publish_base64(image_base64)
+
+    assert image_server.publish_base64(image_base64, slot="original") == url
+    assert image_server.stats.published == 1
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from adaptive_labeler.labeler_config import LabelerConfig
+from adaptive_labeler.runtime.key_dispatcher import KeyDispatcher, RepeatPolicy
+
+
+class RecordingHandler:
+    def __init__(self, delay: float = 0.0):
+        self.calls: list[tuple[str, int]] = []
+        self.delay = delay
+        self.called = threading.Event()
+
+    def __call__(self, key, repeat):
+        time.sleep(self.delay)
+        self.calls.append((key, repeat))
+        self.called.set()
+        return True
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_single_press_dispatches_once_without_repeat_policy():
+    handler = RecordingHandler()
+    dispatcher = KeyDispatcher(handler)
+    dispatcher.start()
+
+    dispatcher.press("tab")
+    dispatcher.press("tab")  # OS auto-repeat while held
+    handler.called.wait(1.0)
+    time.sleep(0.1)
+    dispatcher.release("tab")
+    dispatcher.stop()
+
+    assert handler.calls == [("tab", 1)]
+
+
+def test_held_key_repeats_after_initial_delay():
+    handler = RecordingHandler()
+    dispatcher = KeyDispatcher(
+        handler, repeat_policies={"up": RepeatPolicy(initial_delay=0.05, interval=0.02)}
+    )
+    dispatcher.start()
+
+    dispatcher.press("up")
+    wait_for(lambda: sum(repeat for _, repeat in handler.calls) >= 4)
+    dispatcher.release("up")
+    dispatcher.stop()
+
+    assert handler.calls[0] == ("up", 1)
+    assert sum(repeat for _, repeat in handler.calls) >= 4
+
+
+def test_taps_queued_while_busy_are_coalesced():
+    handler = RecordingHandler(delay=0.2)
+    policy = RepeatPolicy(initial_delay=10.0, interval=1.0)
+    dispatcher = KeyDispatcher(handler, repeat_policies={"up": policy})
+    dispatcher.start()
+
+    dispatcher.press("down")
+    time.sleep(0.05)  # handler is now busy with "down"
+    for _ in range(3):
+        dispatcher.press("up")
+        dispatcher.release("up")
+    wait_for(lambda: len(handler.calls) >= 2)
+    dispatcher.stop()
+
+    assert handler.calls == [("down", 1), ("up", 3)]
+    assert dispatcher.latency.summary("up").count == 1
+
+
+def test_key_press_debounce_delay_is_deprecated():
+    with pytest.warns(DeprecationWarning, match="key_repeat_delay"):
+        config = LabelerConfig(key_press_debounce_delay=0.01)
+
+    assert config.key_repeat_delay == LabelerConfig().key_repeat_delay
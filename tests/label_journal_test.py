@@ -0,0 +1,196 @@
+import time
+
+from adaptive_labeler.labels import label_journal
+from adaptive_labeler.labels.label_journal import LabelJournal
+
+
+def test_records_and_undos_replay_after_reopen(tmp_output_dir):
+    path = tmp_output_dir / "labels.journal.jsonl"
+    journal = LabelJournal(path, batch_size=2, flush_interval=0.01)
+    journal.record("a.jpg", "acceptable", {"blur": 0.1}, seed=1)
+    journal.record("b.jpg", "unacceptable", {"blur": 0.5}, seed=2)
+    journal.record("c.jpg", "acceptable", {"blur": 0.2}, seed=3)
+    assert journal.undo().image_path == "c.jpg"
+    journal.close()
+
+    replayed = LabelJournal.replay(path)
+    assert [entry.image_path for entry in replayed] == ["a.jpg", "b.jpg"]
+    assert replayed[1].severities == {"blur": 0.5}
+    assert replayed[1].seed == 2
+
+    reopened = LabelJournal(path)
+    entry = reopened.record("d.jpg", "acceptable")
+    reopened.close()
+    assert entry.record_id == 4
+
+
+def test_undo_is_appended_not_rewritten(tmp_output_dir):
+    path = tmp_output_dir / "labels.journal.jsonl"
+    journal = LabelJournal(path, flush_interval=0.01)
+    journal.record("a.jpg", "acceptable")
+    journal.flush()
+    size_before = path.stat().st_size
+
+    journal.undo()
+    journal.close()
+
+    assert path.stat().st_size > size_before
+    assert LabelJournal.replay(path) == []
+
+
+def test_torn_last_line_is_ignored(tmp_output_dir):
+    path = tmp_output_dir / "labels.journal.jsonl"
+    journal = LabelJournal(path, flush_interval=0.01)
+    journal.record("a.jpg", "acceptable")
+    journal.close()
+    with open(path, "a") as file:
+        file.write('{"op": "record", "record_id": 2, "image_pa')
+
+    journal = LabelJournal(path, flush_interval=0.01)
+    journal.record("b.jpg", "unacceptable")
+    journal.close()
+
+    assert [e.image_path for e in LabelJournal.replay(path)] == ["a.jpg", "b.jpg"]
+
+
+def test_bulk_relabel_is_one_line_and_replays(tmp_output_dir):
+    path = tmp_output_dir / "labels.journal.jsonl"
+    journal = LabelJournal(path, flush_interval=0.01)
+    for i in range(1000):
+        journal.record(f"{i}.jpg", "acceptable")
+    journal.undo(5)
+    journal.flush()
+    lines_before = len(path.read_text().splitlines())
+
+    changed = journal.relabel(range(1, 501), "unacceptable")
+    assert len(changed) == 499  # 5 was undone
+    assert journal.relabel([1, 2], "unacceptable") == []
+    journal.close()
+
+    assert len(path.read_text().splitlines()) == lines_before + 1
+    labels = {entry.record_id: entry.label for entry in LabelJournal.replay(path)}
+    assert labels[1] == labels[500] == "unacceptable"
+    assert labels[501] == "acceptable"
+    assert 5 not in labels
+
+
+def test_failed_writes_are_retried_without_losing_entries(tmp_output_dir, monkeypatch):
+    path = tmp_output_dir / "labels.journal.jsonl"
+    journal = LabelJournal(path, flush_interval=0.01)
+    journal.RETRY_DELAY = 0.01
+    real_fsync = label_journal.os.fsync
+    failing = {"left": 2}
+
+    def fsync(fd):
+        if failing["left"]:
+            failing["left"] -= 1
+            raise OSError("disk full")
+        real_fsync(fd)
+
+    monkeypatch.setattr(label_journal.os, "fsync", fsync)
+    for i in range(5):
+        journal.record(f"{i}.jpg", "acceptable")
+
+    assert journal.flush() is False
+    assert isinstance(journal.error, OSError)
+    # A flush waits out the backoff, and reports the retry failing too.
+    assert journal.flush() is False
+    assert journal.flush(timeout=5) is True
+    assert journal.error is None
+    assert journal.stats.write_failures == 2
+    assert journal.close() is True
+    assert [e.image_path for e in LabelJournal.replay(path)] == [
+        f"{i}.jpg" for i in range(5)
+    ]
+
+
+def test_a_failed_sink_gets_every_batch_it_missed(tmp_output_dir):
+    received = []
+    failing = {"left": 1}
+
+    def sink(ops):
+        if failing["left"]:
+            failing["left"] -= 1
+            raise RuntimeError("store unavailable")
+        received.extend(op.record_id for op in ops)
+
+    journal = LabelJournal(
+        tmp_output_dir / "labels.journal.jsonl", sinks=[sink], flush_interval=0.01
+    )
+    journal.RETRY_DELAY = 0.01
+    journal.record("a.jpg", "acceptable")
+    assert journal.flush() is False
+    journal.record("b.jpg", "acceptable")
+
+    assert journal.flush(timeout=5) is True
+    assert received == [1, 2]
+    assert journal.stats.sink_failures == 1
+    journal.close()
+
+
+def test_checkpoint_truncates_and_ids_keep_growing(tmp_output_dir):
+    path = tmp_output_dir / "labels.journal.jsonl"
+    delivered = []
+    journal = LabelJournal(
+        path, sinks=[delivered.extend], flush_interval=0.01, durable_sinks=True
+    )
+    for name in ("a.jpg", "b.jpg", "c.jpg"):
+        journal.record(name, "acceptable")
+
+    assert journal.checkpoint()
+    assert len(delivered) == 3
+    assert len(path.read_text().splitlines()) == 1
+
+    # Entries from before the checkpoint can still be undone and relabeled.
+    assert journal.undo().image_path == "c.jpg"
+    assert journal.relabel([1], "unacceptable") == [1]
+    journal.close()
+
+    reopened = LabelJournal(path)
+    assert reopened.checkpoint_id == 3
+    assert reopened.entries() == []
+    # Not in memory any more, so relabeled as asked, for the store to resolve.
+    assert reopened.relabel([2], "unacceptable") == [2]
+    assert reopened.relabel([9], "unacceptable") == []
+    assert reopened.record("d.jpg", "acceptable").record_id == 4
+    reopened.close()
+
+    tail = [op.op for op in LabelJournal.read_ops(path)]
+    assert tail == ["checkpoint", "undo", "relabel", "relabel", "record"]
+
+
+def test_checkpoint_keeps_the_file_unless_sinks_are_durable(tmp_output_dir):
+    path = tmp_output_dir / "labels.journal.jsonl"
+    journal = LabelJournal(path, sinks=[lambda ops: None], flush_interval=0.01)
+    journal.record("a.jpg", "acceptable")
+
+    assert not journal.checkpoint()
+    journal.close()
+
+    assert [op.op for op in LabelJournal.read_ops(path)] == ["record"]
+
+
+def test_failing_writes_back_off_after_a_flush_gives_up(tmp_output_dir, monkeypatch):
+    journal = LabelJournal(
+        tmp_output_dir / "labels.journal.jsonl", batch_size=2, flush_interval=0.01
+    )
+    journal.RETRY_DELAY = 0.05
+    real_fsync = label_journal.os.fsync
+
+    def fsync(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(label_journal.os, "fsync", fsync)
+    for i in range(10):
+        journal.record(f"{i}.jpg", "acceptable")
+
+    assert journal.flush() is False
+    time.sleep(0.3)
+
+    # 0.05 + 0.1 + 0.2 seconds of backoff after the first failure, not a
+    # retry per loop once the flush has given up.
+    assert journal.stats.write_failures <= 4
+
+    monkeypatch.setattr(label_journal.os, "fsync", real_fsync)
+    assert journal.flush(timeout=5) is True
+    journal.close()
@@ -0,0 +1,205 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Callable
+
+import numpy as np
+import pytest
+from PIL import Image as PILImage
+
+from adaptive_labeler.imaging.array_engine import KERNELS, ArrayNoiseFn
+from adaptive_labeler.imaging.noise_chain import (
+    NoiseChainCache,
+    RenderFidelityError,
+    RenderSpec,
+    maker_at,
+    mark_background,
+    render_chain,
+    seeded,
+)
+
+
+@dataclass
+class FakeNoiseOperation:
+    name: str
+    fn: Callable
+    severity: float = 0.0
+
+
+def speckle(image, severity):
+    pixels = np.asarray(image, dtype=np.float32)
+    noise = np.random.normal(0, 255 * severity, pixels.shape)
+    return PILImage.fromarray(np.clip(pixels + noise, 0, 255).astype(np.uint8))
+
+
+def jitter(image, severity):
+    return image.rotate(random.uniform(-45, 45) * severity)
+
+
+OPERATIONS = [
+    FakeNoiseOperation("speckle", speckle),
+    FakeNoiseOperation("jitter", jitter),
+]
+
+
+def render(spec: RenderSpec) -> bytes:
+    image = PILImage.new("RGB", (32, 32), color=(120, 80, 40))
+    return render_chain(image, OPERATIONS, spec).tobytes()
+
+
+def test_same_spec_renders_identically():
+    spec = RenderSpec(severities=(("speckle", 0.3), ("jitter", 0.5)), seed=7)
+
+    assert render(spec) == render(spec)
+
+
+def test_seed_changes_render():
+    severities = (("speckle", 0.3), ("jitter", 0.5))
+
+    assert render(RenderSpec(severities, seed=1)) != render(
+        RenderSpec(severities, seed=2)
+    )
+
+
+def test_render_restores_global_random_state():
+    random.seed(3)
+    expected = random.random()
+
+    random.seed(3)
+    render(RenderSpec(severities=(("speckle", 0.3),), seed=11))
+
+    assert random.random() == expected
+
+
+def test_verify_matches_rejects_different_severities():
+    spec = RenderSpec(severities=(("speckle", 0.3),), seed=7)
+
+    spec.verify_matches(RenderSpec(severities=(("speckle", 0.3),), seed=7))
+    with pytest.raises(RenderFidelityError):
+        spec.verify_matches(RenderSpec(severities=(("speckle", 0.4),), seed=7))
+
+
+def render_cached(spec: RenderSpec, cache: NoiseChainCache) -> bytes:
+    image = PILImage.new("RGB", (32, 32), color=(120, 80, 40))
+    return render_chain(image, OPERATIONS, spec, cache, "source").tobytes()
+
+
+def test_prefix_cache_matches_a_full_render():
+    cache = NoiseChainCache()
+    render_cached(RenderSpec((("speckle", 0.3), ("jitter", 0.5)), seed=7), cache)
+
+    changed = RenderSpec((("speckle", 0.3), ("jitter", 0.8)), seed=7)
+
+    assert render_cached(changed, cache) == render(changed)
+    assert cache.stats.steps_reused == 1
+    assert cache.stats.hit_rate == 1 / 4
+
+
+def test_prefix_cache_is_keyed_on_seed_and_earlier_steps():
+    cache = NoiseChainCache()
+    render_cached(RenderSpec((("speckle", 0.3), ("jitter", 0.5)), seed=7), cache)
+
+    render_cached(RenderSpec((("speckle", 0.3), ("jitter", 0.5)), seed=8), cache)
+    render_cached(RenderSpec((("speckle", 0.4), ("jitter", 0.5)), seed=7), cache)
+
+    assert cache.stats.steps_reused == 0
+
+
+def test_prefix_cache_stays_within_its_budget():
+    # Each 32x32 step is 3 KiB of pixels plus the generator state.
+    cache = NoiseChainCache(max_bytes=2 * (3 * 1024 + NoiseChainCache.RNG_STATE_BYTES))
+
+    for seed in range(5):
+        render_cached(RenderSpec((("speckle", 0.3), ("jitter", 0.5)), seed), cache)
+
+    assert cache.bytes_used <= cache._lru.max_bytes
+    assert cache.evictions == 8
+
+
+def test_zero_severity_ops_draw_like_the_full_render():
+    calls = []
+
+    def counting(image, severity):
+        calls.append(severity)
+        random.random()
+        return image
+
+    operations = [
+        FakeNoiseOperation("counting", counting),
+        FakeNoiseOperation("jitter", jitter),
+    ]
+    spec = RenderSpec((("counting", 0.0), ("jitter", 0.5)), 1)
+    image = PILImage.new("RGB", (8, 8), color=(200, 10, 10))
+
+    chained = render_chain(image, operations, spec)
+    with seeded(spec.seed):
+        full = image
+        for noise_op in operations:
+            full = noise_op.fn(full, spec.severity_of(noise_op.name))
+
+    assert calls == [0.0, 0.0]
+    assert chained.tobytes() == full.tobytes()
+
+
+def test_array_only_chains_render_without_the_global_generators():
+    operations = [
+        FakeNoiseOperation(
+            "array_gaussian_noise", ArrayNoiseFn(KERNELS["array_gaussian_noise"])
+        )
+    ]
+    spec = RenderSpec((("array_gaussian_noise", 0.2),), seed=4)
+    image = PILImage.new("RGB", (32, 32))
+    expected = render_chain(image, operations, spec)
+    rendered = []
+
+    with seeded(1):
+        # Holds the global generators' lock; the render must not wait for it.
+        thread = threading.Thread(
+            target=lambda: rendered.append(render_chain(image, operations, spec))
+        )
+        thread.start()
+        thread.join(5)
+
+    assert rendered and rendered[0].tobytes() == expected.tobytes()
+
+
+def test_foreground_renders_go_before_waiting_background_ones():
+    order = []
+    started = threading.Barrier(3)
+
+    def render_on(name, background):
+        if background:
+            mark_background()
+        started.wait()
+        with seeded(1):
+            order.append(name)
+
+    with seeded(0):
+        threads = [
+            threading.Thread(target=render_on, args=("background", True)),
+            threading.Thread(target=render_on, args=("foreground", False)),
+        ]
+        for thread in threads:
+            thread.start()
+        started.wait()
+        time.sleep(0.1)
+    for thread in threads:
+        thread.join(5)
+
+    assert order == ["foreground", "background"]
+
+
+def test_maker_at_pins_a_copy_to_the_spec():
+    maker = SimpleNamespace(
+        image_path="image.jpg",
+        noise_operations=[FakeNoiseOperation("speckle", speckle, 0.3)],
+    )
+
+    snapshot = maker_at(maker, RenderSpec((("speckle", 0.1),), 4))
+    maker.noise_operations[0].severity = 0.9
+
+    assert snapshot.image_path == "image.jpg"
+    assert snapshot.noise_operations[0].severity == 0.1
+    assert RenderSpec.from_maker(snapshot, 4) == RenderSpec((("speckle", 0.1),), 4)
@@ -0,0 +1,169 @@
+from pathlib import Path
+
+from adaptive_labeler.labels import parquet_label_store
+from adaptive_labeler.labels.label_journal import JournalOp, LabelEntry
+from adaptive_labeler.labels.parquet_label_store import ParquetLabelStore
+
+
+def entry(record_id, label, severities, image="a.jpg", root=None):
+    image_path = str(root / image) if root else image
+    return LabelEntry(record_id, image_path, label, severities, seed=record_id)
+
+
+def test_query_filters_by_label_op_and_severity(tmp_output_dir):
+    store = ParquetLabelStore(tmp_output_dir / "labels")
+    store.append(
+        [
+            entry(1, "acceptable", {"blur": 0.1, "jpeg": 0.0}),
+            entry(2, "unacceptable", {"blur": 0.6, "jpeg": 0.2}),
+        ]
+    )
+    store.append([entry(3, "unacceptable", {"jpeg": 0.9})])
+
+    assert store.count() == 3
+    assert store.query(label="unacceptable").num_rows == 2
+    blurred = store.query(columns=["record_id"], noise_op="blur")
+    assert blurred.column("record_id").to_pylist() == [1, 2]
+    strong_blur = store.query(noise_op="blur", severity_range=(0.5, 1.0))
+    assert strong_blur.column("record_id").to_pylist() == [2]
+    assert store.query(noise_op="unknown").num_rows == 0
+
+
+def test_undo_and_compaction(tmp_output_dir):
+    store = ParquetLabelStore(tmp_output_dir / "labels", compact_every=3)
+    store.append([entry(1, "acceptable", {"blur": 0.1})])
+    store.append([entry(2, "acceptable", {"blur": 0.2})], undone_ids=[1])
+    assert store.query(columns=["record_id"]).column("record_id").to_pylist() == [2]
+
+    store.append([entry(3, "unacceptable", {"blur": 0.3})])  # triggers compaction
+
+    assert not list(store.parts_dir.iterdir())
+    assert not list(store.tombstones_dir.iterdir())
+    assert store.count() == 2
+
+
+def test_paths_are_stored_relative_to_root(tmp_image_dir, tmp_output_dir):
+    store = ParquetLabelStore(tmp_output_dir / "labels", root_dir=tmp_image_dir)
+    store.append([entry(1, "acceptable", {}, "test_image_0.jpg", tmp_image_dir)])
+
+    stored = store.query(columns=["image_path"]).column("image_path")[0].as_py()
+
+    assert stored == "test_image_0.jpg"
+    assert store.absolute_path(stored) == tmp_image_dir.resolve() / stored
+
+
+def test_relabels_resolve_without_rewriting_data(tmp_output_dir):
+    store = ParquetLabelStore(tmp_output_dir / "labels", compact_every=100)
+    store.append([entry(i, "acceptable", {"blur": 0.1}) for i in range(1, 6)])
+    data_files = {path: path.stat().st_mtime_ns for path in store._data_files()}
+
+    store.append([], relabels={2: "unacceptable", 4: "unacceptable"})
+    store.append([], relabels={4: "acceptable"})
+
+    assert {p: p.stat().st_mtime_ns for p in store._data_files()} == data_files
+    unacceptable = store.query(columns=["record_id"], label="unacceptable")
+    assert unacceptable.column("record_id").to_pylist() == [2]
+    labels = store.query(columns=["label"]).column("label").to_pylist()
+    assert labels == ["acceptable", "unacceptable"] + ["acceptable"] * 3
+
+    store.compact()
+    assert not list(store.overrides_dir.iterdir())
+    assert store.query(label="unacceptable").column("record_id").to_pylist() == [2]
+
+
+def test_sync_from_catches_up_on_missed_relabels(tmp_output_dir):
+    store = ParquetLabelStore(tmp_output_dir / "labels")
+    store.append([entry(1, "acceptable", {}), entry(2, "acceptable", {})])
+
+    synced = store.sync_from([JournalOp("relabel", 2, record_ids=[2], label="no")])
+
+    assert synced == 1
+    assert store.query(label="no").column("record_id").to_pylist() == [2]
+
+
+def test_sync_from_tombstones_undos_the_store_missed(tmp_output_dir):
+    store = ParquetLabelStore(tmp_output_dir / "labels")
+    store.append([entry(i, "acceptable", {}) for i in (1, 2, 3)])
+
+    # The journal made the undo of 2 durable, then the app died.
+    synced = store.sync_from([JournalOp("undo", 2)])
+
+    assert synced == 1
+    assert store.query(columns=["record_id"]).column("record_id").to_pylist() == [1, 3]
+    store.compact()
+    assert store.count() == 2
+
+
+def test_sync_from_replays_a_journal_tail_idempotently(tmp_output_dir):
+    store = ParquetLabelStore(tmp_output_dir / "labels")
+    store.append([entry(1, "acceptable", {}), entry(2, "acceptable", {})])
+    tail = [
+        JournalOp("checkpoint", 2),
+        JournalOp("record", 3, entry(3, "acceptable", {"blur": 0.2})),
+        JournalOp("record", 4, entry(4, "acceptable", {})),
+        JournalOp("relabel", 3, record_ids=[1, 3], label="unacceptable"),
+        JournalOp("undo", 4),
+    ]
+
+    assert store.sync_from(tail) == 2
+    assert store.sync_from(tail) == 0
+
+    labels = store.query(columns=["record_id", "label"]).to_pydict()
+    assert labels == {
+        "record_id": [1, 2, 3],
+        "label": ["unacceptable", "acceptable", "unacceptable"],
+    }
+
+
+def test_label_counts_per_image(tmp_output_dir):
+    store = ParquetLabelStore(tmp_output_dir / "labels")
+    store.append([entry(1, "acceptable", {}, "a.jpg"), entry(2, "no", {}, "b.jpg")])
+    store.append([entry(3, "acceptable", {}, "a.jpg")], undone_ids=[2])
+
+    assert store.label_counts() == {"a.jpg": 2}
+
+
+def test_override_parts_are_read_once_and_compacted(tmp_output_dir, monkeypatch):
+    store = ParquetLabelStore(tmp_output_dir / "labels", compact_every=4)
+    store.append([entry(i, "acceptable", {}) for i in (1, 2, 3)])
+    store.append([], relabels={1: "unacceptable"})
+    assert store.query(label="unacceptable").column("record_id").to_pylist() == [1]
+
+    reads = []
+    read_table = parquet_label_store.pq.read_table
+    monkeypatch.setattr(
+        parquet_label_store.pq,
+        "read_table",
+        lambda file, **kwargs: reads.append(file) or read_table(file, **kwargs),
+    )
+    store.append([], relabels={2: "unacceptable"})
+    relabeled = store.query(label="unacceptable").column("record_id").to_pylist()
+
+    assert relabeled == [1, 2]
+    assert not any(store.overrides_dir in Path(file).parents for file in reads)
+
+    # One label part and three override parts reach `compact_every`.
+    store.append([], relabels={3: "unacceptable"})
+    assert not list(store.overrides_dir.iterdir())
+    assert store.query(label="acceptable").num_rows == 0
+
+
+def test_interrupted_part_writes_are_never_read(tmp_output_dir, monkeypatch):
+    store = ParquetLabelStore(tmp_output_dir / "labels")
+    store.append([entry(1, "acceptable", {"blur": 0.1})])
+
+    def crash(table, where, **kwargs):
+        Path(where).write_bytes(b"PAR1 truncated")
+        raise OSError("power lost")
+
+    monkeypatch.setattr(parquet_label_store.pq, "write_table", crash)
+    try:
+        store.append([entry(2, "acceptable", {"blur": 0.2})])
+    except OSError:
+        pass
+    monkeypatch.undo()
+
+    reopened = ParquetLabelStore(tmp_output_dir / "labels")
+
+    assert reopened.query(columns=["record_id"]).column("record_id").to_pylist() == [1]
+    assert not list(reopened.parts_dir.glob("*.tmp"))
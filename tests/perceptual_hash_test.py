@@ -0,0 +1,48 @@
+import random
+
+from PIL import Image as PILImage
+
+from adaptive_labeler.imaging.perceptual_hash import (
+    HammingIndex,
+    hamming,
+    hash_files,
+)
+
+
+def test_copies_hash_alike_and_other_images_do_not(tmp_output_dir, textured_image):
+    original = textured_image(tmp_output_dir / "original.jpg", seed=0)
+    PILImage.open(original).resize((80, 60)).save(tmp_output_dir / "small.png")
+    PILImage.open(original).save(tmp_output_dir / "low.jpg", quality=30)
+    textured_image(tmp_output_dir / "other.jpg", seed=1)
+    (tmp_output_dir / "broken.jpg").write_bytes(b"not an image")
+
+    base, small, low, other, broken = hash_files(
+        tmp_output_dir / name
+        for name in ("original.jpg", "small.png", "low.jpg", "other.jpg", "broken.jpg")
+    )
+
+    for copy in (small, low):
+        assert hamming(base.phash, copy.phash) <= 4
+        assert hamming(base.dhash, copy.dhash) <= 6
+    assert hamming(base.phash, other.phash) > 12
+    assert broken is None
+
+
+def test_hamming_index_finds_every_hash_within_the_distance():
+    rng = random.Random(0)
+    hashes = {i: rng.getrandbits(64) for i in range(2000)}
+    index = HammingIndex(max_distance=6)
+    for item, value in hashes.items():
+        index.add(item, value)
+    index.remove(3)
+
+    query = hashes[7] ^ (1 << 5) ^ (1 << 40) ^ (1 << 63)
+    found = dict(index.search(query))
+    expected = {
+        item: hamming(query, value)
+        for item, value in hashes.items()
+        if item != 3 and hamming(query, value) <= 6
+    }
+
+    assert found == expected and found[7] == 3
+    assert 3 not in index and len(index) == 1999
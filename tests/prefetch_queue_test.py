@@ -0,0 +1,242 @@
+from concurrent.futures import wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+import itertools
+
+from adaptive_labeler.imaging.display_proxy import DisplayProxy
+from adaptive_labeler.imaging.image_cache import decode_base64
+from adaptive_labeler.imaging.noise_chain import RenderSpec
+from adaptive_labeler.pipeline.prefetch_queue import PrefetchQueue
+
+
+@dataclass
+class FakeNoiseOperation:
+    name: str
+    fn: Callable
+    severity: float = 0.0
+
+
+@dataclass(frozen=True)
+class FakeImagePath:
+    path: Path
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    def load_as_base64(self) -> str:
+        return f"original:{self.name}"
+
+
+class FakeMaker:
+    def __init__(self, image_path: FakeImagePath):
+        self.image_path = image_path
+        self.noise_operations = [
+            FakeNoiseOperation("blur", lambda image, severity: image),
+            FakeNoiseOperation("jpeg", lambda image, severity: image),
+        ]
+
+    def update_severity(self, name, severity):
+        for noise_op in self.noise_operations:
+            if noise_op.name == name:
+                noise_op.severity = severity
+
+    def noisy_base64(self):
+        return f"noisy:{self.image_path.name}"
+
+
+class FakeLabelManager:
+    def __init__(self, image_dir: Path):
+        self._paths = itertools.cycle(sorted(image_dir.glob("*.jpg")))
+        self.made: list[FakeMaker] = []
+
+    def new_noisy_image_maker(self) -> FakeMaker:
+        maker = FakeMaker(FakeImagePath(next(self._paths)))
+        self.made.append(maker)
+        return maker
+
+
+def settle(queue: PrefetchQueue) -> None:
+    wait(list(queue._pending))
+
+
+def test_ready_pairs_are_hits_and_the_queue_refills(tmp_image_dir):
+    queue = PrefetchQueue(FakeLabelManager(tmp_image_dir), depth=2, workers=1)
+    settle(queue)
+
+    pair = queue.take()
+
+    assert pair.noisy_image_base64 == "noisy:test_image_0.jpg"
+    assert pair.original_image_base64 == "original:test_image_0.jpg"
+    assert (queue.stats.hits, queue.stats.misses) == (1, 0)
+    assert len(queue._pending) == 2
+    queue.close()
+
+
+def test_without_depth_every_pair_is_prepared_inline(tmp_image_dir):
+    label_manager = FakeLabelManager(tmp_image_dir)
+    queue = PrefetchQueue(label_manager, depth=0)
+
+    names = [queue.take().image_name for _ in range(2)]
+
+    assert names == ["test_image_0.jpg", "test_image_1.jpg"]
+    assert (queue.stats.hits, queue.stats.misses) == (0, 2)
+    assert len(label_manager.made) == 2
+
+
+def test_pairs_start_at_the_severity_state(tmp_image_dir):
+    queue = PrefetchQueue(
+        FakeLabelManager(tmp_image_dir), depth=0, severity_state={"blur": 0.4}
+    )
+
+    pair = queue.take()
+
+    assert pair.render_spec.severity_of("blur") == 0.4
+    assert pair.render_spec.severity_of("jpeg") == 0.0
+
+
+def test_start_master_overrides_the_severity_state(tmp_image_dir):
+    rendered: list[RenderSpec] = []
+
+    def render_noisy(maker, spec):
+        rendered.append(spec)
+        return "cached"
+
+    queue = PrefetchQueue(
+        FakeLabelManager(tmp_image_dir),
+        depth=0,
+        severity_state={"blur": 0.4},
+        render_noisy=render_noisy,
+        start_master=lambda maker, seed: 0.5,
+    )
+
+    pair = queue.take()
+
+    assert pair.master == 0.5
+    assert pair.noisy_image_base64 == "cached"
+    assert rendered == [pair.render_spec]
+    assert sum(severity for _, severity in pair.render_spec.severities) > 0
+
+
+def test_skipped_makers_are_passed_over(tmp_image_dir):
+    queue = PrefetchQueue(
+        FakeLabelManager(tmp_image_dir),
+        depth=0,
+        skip=lambda maker: maker.image_path.name != "test_image_2.jpg",
+    )
+
+    assert queue.take().image_name == "test_image_2.jpg"
+    assert queue.stats.skipped == 2
+
+
+def test_skipping_gives_up_after_max_skips(tmp_image_dir):
+    label_manager = FakeLabelManager(tmp_image_dir)
+    queue = PrefetchQueue(label_manager, depth=0, skip=lambda maker: True)
+
+    pair = queue.take()
+
+    assert queue.stats.skipped == PrefetchQueue.MAX_SKIPS
+    assert pair.noisy_image_maker is label_manager.made[-1]
+
+
+def test_failed_pairs_are_dropped(tmp_image_dir):
+    failures = [RuntimeError("render failed")]
+
+    def render_noisy(maker, spec):
+        if failures:
+            raise failures.pop()
+        return "rendered"
+
+    queue = PrefetchQueue(
+        FakeLabelManager(tmp_image_dir), depth=1, workers=1, render_noisy=render_noisy
+    )
+
+    pair = queue.take()
+
+    assert pair.image_name == "test_image_1.jpg"
+    assert pair.noisy_image_base64 == "rendered"
+    queue.close()
+
+
+def test_full_resolution_renders_are_proxied_before_encoding(tmp_image_dir):
+    proxy = DisplayProxy(box_width=64, box_height=64, pixel_ratio=1.0)
+    queue = PrefetchQueue(FakeLabelManager(tmp_image_dir), depth=0, display_proxy=proxy)
+
+    pair = queue.take()
+
+    assert decode_base64(pair.noisy_image_base64).size == (64, 64)
+    assert decode_base64(pair.original_image_base64).size == (64, 64)
+
+
+def test_makers_from_a_source_are_skipped_and_released(tmp_image_dir):
+    label_manager = FakeLabelManager(tmp_image_dir)
+    released = []
+    queue = PrefetchQueue(
+        label_manager,
+        depth=0,
+        source=lambda: (label_manager.new_noisy_image_maker(), 7),
+        skip=lambda maker: maker.image_path.name == "test_image_0.jpg",
+        release=released.append,
+    )
+
+    pair = queue.take()
+
+    assert pair.image_name == "test_image_1.jpg"
+    assert pair.render_spec.seed == 7
+    assert released == label_manager.made[:1]
+    assert queue.stats.skipped == 1
+
+
+def test_prepared_images_are_published_on_the_worker(tmp_image_dir):
+    published = []
+
+    def publish(image_base64):
+        published.append(image_base64)
+        return image_base64
+
+    queue = PrefetchQueue(FakeLabelManager(tmp_image_dir), depth=0, publish=publish)
+
+    pair = queue.take()
+
+    assert published == [pair.original_image_base64, pair.noisy_image_base64]
+
+
+def test_invalidated_pairs_are_discarded_and_released(tmp_image_dir):
+    label_manager = FakeLabelManager(tmp_image_dir)
+    released = []
+    masters = iter(itertools.count())
+    queue = PrefetchQueue(
+        label_manager,
+        depth=2,
+        workers=1,
+        start_master=lambda maker, seed: next(masters) / 10,
+        release=released.append,
+    )
+    settle(queue)
+    stale = [future.result() for future in queue._pending]
+
+    queue.invalidate()
+    settle(queue)
+    pair = queue.take()
+
+    assert pair.generation == queue.generation == 1
+    assert pair not in stale
+    assert queue.stats.discarded == 2
+    assert released == [p.noisy_image_maker for p in stale]
+    queue.close()
+
+
+def test_changing_the_severity_state_invalidates(tmp_image_dir):
+    queue = PrefetchQueue(FakeLabelManager(tmp_image_dir), depth=1, workers=1)
+    settle(queue)
+
+    queue.set_severity_state({"blur": 0.2})
+    queue.set_severity_state({"blur": 0.2})
+    settle(queue)
+    pair = queue.take()
+
+    assert queue.generation == 1
+    assert pair.render_spec.severity_of("blur") == 0.2
+    assert (queue.stats.hits, queue.stats.discarded) == (1, 1)
+    queue.close()
@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from typing import Callable
+
+import base64
+import io
+
+from adaptive_labeler.imaging.image_cache import ImageCache
+from adaptive_labeler.imaging.noise_chain import (
+    RenderSpec,
+    render_chain,
+    split_master_severity,
+)
+from adaptive_labeler.pipeline import pregeneration
+from adaptive_labeler.pipeline.pregeneration import PregeneratedPool, RenderJob
+
+
+@dataclass
+class FakeNoiseOperation:
+    name: str
+    fn: Callable
+    severity: float = 0.0
+
+
+def darken(image, severity):
+    return image.point(lambda value: int(value * (1 - severity)))
+
+
+def render_image(tmp_image_dir, directory, seed=7, size=(64, 64)):
+    pregeneration._worker_operations = [
+        FakeNoiseOperation("darken", darken),
+        FakeNoiseOperation("other", lambda image, severity: image),
+    ]
+    job = RenderJob(
+        image_file=str(tmp_image_dir / "test_image_2.jpg"),
+        seed=seed,
+        master_values=(0.0, 0.3),
+        size=size,
+        quality=90,
+        directory=str(directory),
+    )
+    return pregeneration._render_job(job)
+
+
+def test_renders_are_served_for_the_slider_split(tmp_image_dir, tmp_output_dir):
+    pool = PregeneratedPool(tmp_output_dir / "pregenerated")
+    renders = render_image(tmp_image_dir, pool.directory)
+    pool.add(renders)
+    digest = renders[0].digest
+
+    severities = split_master_severity(0.3, ["darken", "other"], seed=7)
+    spec = RenderSpec(tuple(severities.items()), seed=7)
+    assert pool.load_base64(digest, spec, (64, 64)) is not None
+    assert pool.load_base64(digest, RenderSpec(spec.severities, 8), (64, 64)) is None
+    assert pool.seed_for(digest) == 7
+
+    pool.release(digest)
+    assert pool.load_base64(digest, spec, (64, 64)) is None
+    assert pool.bytes_used == 0
+    assert list(pool.directory.iterdir()) == [pool.manifest_path]
+
+
+def test_reopened_pool_resumes_and_drops_orphans(tmp_image_dir, tmp_output_dir):
+    directory = tmp_output_dir / "pregenerated"
+    pool = PregeneratedPool(directory, max_bytes=1)
+    pool.add(render_image(tmp_image_dir, directory))
+    assert not pool.has_room()
+    (directory / "orphan.jpg").write_bytes(b"unrecorded")
+
+    reopened = PregeneratedPool(directory)
+
+    assert reopened.bytes_used == pool.bytes_used
+    assert reopened.seed_for(pool._renders.popitem()[0][0]) == 7
+    assert not (directory / "orphan.jpg").exists()
+
+
+def test_renders_match_the_preview_they_stand_in_for(tmp_image_dir, tmp_output_dir):
+    pool = PregeneratedPool(tmp_output_dir / "pregenerated")
+    renders = render_image(tmp_image_dir, pool.directory, size=(48, 32))
+    pool.add(renders)
+    digest = renders[0].digest
+    severities = split_master_severity(0.3, ["darken", "other"], seed=7)
+    spec = RenderSpec(tuple(severities.items()), seed=7)
+
+    # Noise drawn at another size is not served, even though it could be resized.
+    assert pool.load_base64(digest, spec, (64, 64)) is None
+
+    source = ImageCache().decoded(tmp_image_dir / "test_image_2.jpg", (48, 32))
+    preview = render_chain(source.copy(), pregeneration._worker_operations, spec)
+    expected = io.BytesIO()
+    preview.save(expected, format="JPEG", quality=90)
+    encoded = pool.load_base64(digest, spec, source.size)
+    assert base64.b64decode(encoded) == expected.getvalue()
+
+
+def test_renders_without_a_size_are_never_served(tmp_image_dir, tmp_output_dir):
+    directory = tmp_output_dir / "pregenerated"
+    pool = PregeneratedPool(directory)
+    renders = render_image(tmp_image_dir, directory)
+    pool.add(renders)
+    manifest = pool.manifest_path.read_text().replace(', "size": [64, 64]', "")
+    pool.manifest_path.write_text(manifest)
+
+    reopened = PregeneratedPool(directory)
+
+    render = renders[-1]
+    spec = RenderSpec(render.severities, render.seed)
+    assert reopened.bytes_used == pool.bytes_used
+    assert reopened.load_base64(render.digest, spec, (64, 64)) is None
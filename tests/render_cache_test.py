@@ -0,0 +1,34 @@
+import shutil
+
+from adaptive_labeler.imaging.noise_chain import RenderSpec
+from adaptive_labeler.imaging.render_cache import RenderCache, content_hash
+
+
+def test_same_image_spec_and_seed_render_once(tmp_image_dir):
+    cache = RenderCache()
+    image = tmp_image_dir / "test_image_1.jpg"
+    renders = []
+
+    def render():
+        renders.append(1)
+        return "encoded"
+
+    spec = RenderSpec((("blur", 0.2), ("jpeg", 0.0)), seed=3)
+    reordered = RenderSpec((("jpeg", 0.0), ("blur", 0.2)), seed=3)
+    assert cache.get_or_render(image, spec, "preview", render) == "encoded"
+    assert cache.get_or_render(image, reordered, "preview", render) == "encoded"
+    assert len(renders) == 1
+
+    cache.get_or_render(image, RenderSpec(spec.severities, seed=4), "preview", render)
+    cache.get_or_render(image, spec, "full", render)
+    assert len(renders) == 3
+    assert cache.stats.hits == 1
+
+
+def test_content_hash_follows_bytes_not_path(tmp_image_dir):
+    original = tmp_image_dir / "test_image_1.jpg"
+    copy = tmp_image_dir / "copy.jpg"
+    shutil.copy(original, copy)
+
+    assert content_hash(original) == content_hash(copy)
+    assert content_hash(original) != content_hash(tmp_image_dir / "test_image_2.jpg")
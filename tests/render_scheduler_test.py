@@ -0,0 +1,72 @@
+import threading
+import time
+
+from adaptive_labeler.pipeline.render_scheduler import RenderScheduler
+
+
+def test_only_newest_request_is_published():
+    started = threading.Event()
+    release = threading.Event()
+    published = []
+
+    def render(state):
+        started.set()
+        release.wait(1.0)
+        return state
+
+    scheduler = RenderScheduler(render, published.append)
+    scheduler.request(1)
+    started.wait(1.0)
+
+    # Arrive while 1 is rendering: 2 and 3 are superseded by 4.
+    for state in (2, 3, 4):
+        scheduler.request(state)
+    release.set()
+
+    deadline = time.monotonic() + 2.0
+    while published[-1:] != [4] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    scheduler.close()
+
+    assert published == [4]
+    assert scheduler.stats.rendered == 2
+
+
+def test_cancel_keeps_in_flight_render_from_publishing():
+    started = threading.Event()
+    release = threading.Event()
+    published = []
+
+    def render(state):
+        started.set()
+        release.wait(1.0)
+        return state
+
+    scheduler = RenderScheduler(render, published.append)
+    scheduler.request("stale")
+    started.wait(1.0)
+    scheduler.cancel()
+    release.set()
+
+    deadline = time.monotonic() + 0.5
+    while scheduler.stats.rendered < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    scheduler.close()
+
+    assert published == []
+
+
+def test_wait_idle_returns_after_the_latest_render_is_published():
+    published = []
+
+    def render(state):
+        time.sleep(0.02)
+        return state
+
+    scheduler = RenderScheduler(render, published.append)
+    for state in range(5):
+        scheduler.request(state)
+
+    assert scheduler.wait_idle(timeout=2.0)
+    assert published[-1] == 4
+    scheduler.close()
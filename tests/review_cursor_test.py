@@ -0,0 +1,73 @@
+from adaptive_labeler.labels.label_journal import LabelEntry
+from adaptive_labeler.labels.parquet_label_store import ParquetLabelStore
+from adaptive_labeler.labels.review_cursor import ReviewCursor
+
+
+def make_store(directory, labels):
+    store = ParquetLabelStore(directory, compact_every=1000)
+    store.append(
+        [
+            LabelEntry(i, f"{i}.jpg", "acceptable", {"blur": i / 100}, seed=i)
+            for i in range(1, labels + 1)
+        ]
+    )
+    return store
+
+
+def test_steps_wrap_and_keep_bounded_pages(tmp_output_dir):
+    store = make_store(tmp_output_dir / "labels", labels=50)
+    prepared = []
+
+    def prepare(record):
+        prepared.append(record.record_id)
+        return record.record_id
+
+    cursor = ReviewCursor(store, prepare, page_size=8, max_pages=2, neighbours=1)
+
+    record, images = cursor.step(-1)
+    assert record.record_id == 50 and images == 50
+    assert record.render_spec.severity_of("blur") == 0.5
+    assert record.render_spec.seed == 50
+    for _ in range(30):
+        record, images = cursor.step(1)
+    assert record.record_id == 30 and images == 30
+
+    assert len(cursor._pages) <= 2
+    assert len(cursor._prepared) <= 3
+    cursor.close()
+
+
+def test_sees_labels_added_and_undone(tmp_output_dir):
+    store = make_store(tmp_output_dir / "labels", labels=3)
+    cursor = ReviewCursor(store, lambda record: None)
+    assert len(cursor) == 3
+
+    store.append([LabelEntry(4, "4.jpg", "unacceptable", {}, seed=4)], undone_ids=[2])
+
+    assert len(cursor) == 3
+    assert [cursor.record(i).record_id for i in range(3)] == [1, 3, 4]
+    cursor.close()
+
+
+def test_empty_store(tmp_output_dir):
+    cursor = ReviewCursor(ParquetLabelStore(tmp_output_dir / "labels"), str)
+    assert cursor.step(1) is None
+    cursor.close()
+
+
+def test_label_filter_and_seek(tmp_output_dir):
+    store = make_store(tmp_output_dir / "labels", labels=10)
+    store.append(
+        [LabelEntry(i, f"{i}.jpg", "unacceptable", {}, seed=i) for i in range(11, 14)]
+    )
+    cursor = ReviewCursor(store, lambda record: record.label, page_size=2)
+
+    cursor.set_label("unacceptable")
+    assert len(cursor) == 3
+    assert [cursor.record(i).record_id for i in range(3)] == [11, 12, 13]
+    record, label = cursor.seek(4)
+    assert record.record_id == 12 and label == "unacceptable"
+
+    cursor.set_label(None)
+    assert len(cursor) == 13
+    cursor.close()
@@ -0,0 +1,123 @@
+import time
+from types import SimpleNamespace
+
+from adaptive_labeler.controls.review_grid import ReviewGrid
+from adaptive_labeler.imaging.thumbnail_cache import ThumbnailCache
+from adaptive_labeler.labels.label_journal import LabelEntry
+from adaptive_labeler.labels.parquet_label_store import ParquetLabelStore
+from adaptive_labeler.labels.review_cursor import ReviewCursor
+from adaptive_labeler.runtime.ui_loop import UiLoop
+from PIL import Image as PILImage
+
+
+def wait_for(grid, condition, timeout=5.0):
+    """Poll `condition` on the grid's loop, between its binding passes."""
+    deadline = time.time() + timeout
+    while not grid.ui_loop.run(condition) and time.time() < deadline:
+        time.sleep(0.01)
+    return grid.ui_loop.run(condition)
+
+
+def make_grid(tmp_image_dir, tmp_output_dir, labels):
+    store = ParquetLabelStore(tmp_output_dir / "labels", compact_every=1000)
+    images = sorted(tmp_image_dir.glob("*.jpg"))
+    store.append(
+        [
+            LabelEntry(
+                i,
+                str(images[i % len(images)]),
+                "acceptable" if i % 2 else "unacceptable",
+                {},
+                seed=i,
+            )
+            for i in range(1, labels + 1)
+        ]
+    )
+    cursor = ReviewCursor(store, lambda record: None, page_size=16)
+    thumbnails = ThumbnailCache(
+        tmp_output_dir / "thumbnails",
+        lambda path, spec: PILImage.open(path),
+        size=20,
+        workers=2,
+    )
+    opened, relabeled = [], []
+
+    async def on_open(index):
+        opened.append(index)
+
+    async def on_relabel(record_ids, label):
+        relabeled.append((record_ids, label))
+        store.append([], relabels={record_id: label for record_id in record_ids})
+
+    grid = ReviewGrid(
+        cursor,
+        thumbnails,
+        on_open,
+        label_colors={"acceptable": "green", "unacceptable": "red"},
+        ui_loop=UiLoop(),
+        on_relabel=on_relabel,
+    )
+    return grid, opened, relabeled
+
+
+def close(grid):
+    grid.thumbnails.close()
+    grid.cursor.close()
+    grid.ui_loop.executor.shutdown(wait=True)
+
+
+def test_only_visible_tiles_are_bound(tmp_image_dir, tmp_output_dir):
+    grid, _, _ = make_grid(tmp_image_dir, tmp_output_dir, labels=500)
+    # 4 columns by 2 rows of 20px tiles with 8px spacing.
+    grid.fit(104, 96 + grid.BAR_HEIGHT)
+    assert len(grid.tiles) == 8
+    assert wait_for(grid, lambda: grid.bound_indexes() == list(range(8)))
+    assert wait_for(grid, lambda: all(tile.image.visible for tile in grid.tiles))
+
+    grid.scroll_to(10_000)
+    assert wait_for(grid, lambda: grid.bound_indexes() == list(range(492, 500)))
+    assert grid.count_text.value == "493–500 of 500"
+    close(grid)
+
+
+def test_filter_and_open(tmp_image_dir, tmp_output_dir):
+    grid, opened, _ = make_grid(tmp_image_dir, tmp_output_dir, labels=9)
+    grid.fit(104, 96 + grid.BAR_HEIGHT)
+    grid.label_filter.value = "acceptable"
+    filtered = grid._on_filter(SimpleNamespace(control=grid.label_filter))
+    grid.ui_loop.run_coroutine(filtered).result(timeout=2)
+
+    assert wait_for(grid, lambda: grid.total == 5)
+    assert all(tile.caption.value.endswith(" acceptable") for tile in grid.tiles[:5])
+    assert [tile.visible for tile in grid.tiles] == [True] * 5 + [False] * 3
+
+    grid.ui_loop.run_coroutine(grid.tiles[3]._clicked(None)).result(timeout=2)
+    assert opened == [3]
+    assert grid.cursor.seek(3)[0].label == "acceptable"
+    close(grid)
+
+
+def test_bulk_relabel_selection(tmp_image_dir, tmp_output_dir):
+    grid, opened, relabeled = make_grid(tmp_image_dir, tmp_output_dir, labels=9)
+    grid.set_selecting(True)
+    grid.fit(104, 96 + 2 * grid.BAR_HEIGHT)
+    assert len(grid.tiles) == 8
+    assert wait_for(grid, lambda: grid.total == 9)
+
+    run = grid.ui_loop.run_coroutine
+    run(grid.tiles[0]._clicked(None)).result(timeout=2)
+    run(grid.tiles[2]._clicked(None)).result(timeout=2)
+    run(grid.tiles[2]._clicked(None)).result(timeout=2)
+    assert opened == [] and grid.selected == {grid.tiles[0].record_id}
+
+    run(grid._on_select_all(None)).result(timeout=2)
+    assert grid.selected == set(range(1, 10))
+    mark = SimpleNamespace(control=SimpleNamespace(data="unacceptable"))
+    run(grid._on_mark(mark)).result(timeout=2)
+
+    assert relabeled == [(list(range(1, 10)), "unacceptable")]
+    assert wait_for(
+        grid, lambda: all(t.caption.value.endswith("unacceptable") for t in grid.tiles)
+    )
+    assert not grid.selected
+    close(grid)
@@ -0,0 +1,121 @@
+import math
+import random
+
+import pytest
+
+from adaptive_labeler.imaging.noise_chain import split_master_severity
+from adaptive_labeler.sampling.severity_scheduler import (
+    SCHEDULERS,
+    LogisticScheduler,
+    SeverityScheduler,
+    StaircaseScheduler,
+    make_scheduler,
+)
+
+NAMES = ["blur", "gaussian_noise"]
+THRESHOLDS = {"blur": 0.6, "gaussian_noise": 0.3}
+
+
+def splitter(seed: int):
+    return lambda master: split_master_severity(master, NAMES, seed)
+
+
+def oracle(severities: dict, rng: random.Random, noise: float = 0.05) -> str:
+    load = sum(severities[name] / t for name, t in THRESHOLDS.items())
+    p = 1 / (1 + math.exp(-(load - 1) / noise))
+    return "unacceptable" if rng.random() < p else "acceptable"
+
+
+def label_proposals(scheduler: SeverityScheduler, labels: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(labels):
+        split = splitter(rng.getrandbits(32))
+        severities = split(scheduler.propose(split, rng))
+        scheduler.observe(severities, oracle(severities, rng))
+
+
+def true_boundary(direction: dict) -> float:
+    total = sum(direction.values())
+    return total / sum(direction[name] / t for name, t in THRESHOLDS.items())
+
+
+def test_random_scheduler_keeps_hand_tuned_stepping():
+    scheduler = SeverityScheduler()
+    rng, expected_rng = random.Random(3), random.Random(3)
+
+    assert scheduler.propose(splitter(1), rng) == 0.0
+    master = scheduler.step(0.1, splitter(1), rng)
+    assert master == round(0.1 + round(expected_rng.uniform(0.0, 0.2), 3), 3)
+
+
+def test_staircase_brackets_a_sharp_threshold():
+    scheduler = StaircaseScheduler(start=0.1, step=0.2, min_step=0.005)
+    for _ in range(40):
+        master = scheduler.propose(splitter(0), random.Random(0))
+        label = "unacceptable" if master >= 0.42 else "acceptable"
+        scheduler.observe({"blur": master}, label)
+
+    assert scheduler.estimate() == pytest.approx(0.42, abs=0.02)
+    assert scheduler.step_size == pytest.approx(0.005)
+
+
+def test_logistic_finds_the_boundary_per_direction():
+    scheduler = LogisticScheduler()
+    label_proposals(scheduler, 400)
+
+    for direction in ({"blur": 1.0, "gaussian_noise": 1.0}, {"blur": 1.0}):
+        assert scheduler.estimate(direction) == pytest.approx(
+            true_boundary({name: direction.get(name, 0.0) for name in NAMES}),
+            abs=0.05,
+        )
+    boundaries = scheduler.boundaries()
+    assert boundaries["gaussian_noise"] < boundaries["blur"]
+
+
+def test_logistic_proposals_gather_at_the_boundary():
+    scheduler = LogisticScheduler()
+    label_proposals(scheduler, 300)
+
+    rng = random.Random(1)
+    proposals = [scheduler.propose(splitter(i), rng) for i in range(200)]
+    probabilities = [
+        scheduler.probability(splitter(i)(master)) for i, master in enumerate(proposals)
+    ]
+    informative = [p for p in probabilities if 0.1 < p < 0.9]
+    assert len(informative) > 0.6 * len(probabilities)
+
+
+def test_undo_restores_the_previous_fit():
+    scheduler = LogisticScheduler()
+    label_proposals(scheduler, 20)
+    before = (dict(scheduler.weights), scheduler.bias, scheduler.labels)
+
+    scheduler.observe({"blur": 0.9, "gaussian_noise": 0.1}, "acceptable")
+    scheduler.undo()
+
+    assert (dict(scheduler.weights), scheduler.bias, scheduler.labels) == before
+
+
+def test_warm_start_observations_cannot_be_undone():
+    scheduler = StaircaseScheduler()
+    scheduler.observe({"blur": 0.3}, "unacceptable", undoable=False)
+    level = scheduler.level
+
+    scheduler.undo()
+
+    assert scheduler.level == level
+
+
+def test_unknown_scheduler_name():
+    with pytest.raises(ValueError):
+        make_scheduler("bisect")
+
+
+def test_constructor_errors_are_not_reported_as_unknown_names(monkeypatch):
+    def broken(**kwargs):
+        raise KeyError("weights")
+
+    monkeypatch.setitem(SCHEDULERS, "broken", broken)
+
+    with pytest.raises(KeyError):
+        make_scheduler("broken")
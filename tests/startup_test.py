@@ -0,0 +1,44 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+import adaptive_labeler
+from adaptive_labeler.runtime.startup import StartupMetrics
+
+
+def test_package_import_does_not_load_the_app():
+    code = (
+        "import sys, adaptive_labeler; "
+        "print(any(m.split('.')[0] in ('flet', 'pynput', 'labeling') "
+        "for m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == "False"
+
+
+def test_public_names_resolve_on_first_access():
+    from adaptive_labeler.labeler_config import LabelerConfig
+
+    assert adaptive_labeler.LabelerConfig is LabelerConfig
+    assert "LabelAppFactory" in dir(adaptive_labeler)
+    with pytest.raises(AttributeError):
+        adaptive_labeler.LabelerManager
+
+
+def test_startup_marks_are_appended_to_history(tmp_output_dir):
+    history = tmp_output_dir / "startup_metrics.jsonl"
+    for _ in range(2):
+        startup = StartupMetrics()
+        startup.mark("first_paint")
+        startup.mark("first_image")
+        startup.write(history)
+
+    lines = [json.loads(line) for line in history.read_text().splitlines()]
+    assert len(lines) == 2
+    assert 0 <= lines[0]["first_paint"] <= lines[0]["first_image"]
+    assert startup.time_to_first_image == startup.marks["first_image"]
@@ -0,0 +1,64 @@
+import io
+import threading
+
+from PIL import Image as PILImage
+
+from adaptive_labeler.imaging.noise_chain import RenderSpec
+from adaptive_labeler.imaging.thumbnail_cache import ThumbnailCache
+
+
+def render(image_path, spec):
+    return PILImage.open(image_path).convert("RGB")
+
+
+def test_renders_once_and_persists(tmp_image_dir, tmp_output_dir):
+    image = tmp_image_dir / "test_image_0.jpg"
+    spec = RenderSpec((("blur", 0.2),), seed=1)
+    cache = ThumbnailCache(tmp_output_dir / "thumbnails", render, size=32, workers=2)
+
+    data = cache.request(image, spec).result(timeout=5)
+    assert PILImage.open(io.BytesIO(data)).size == (32, 32)
+    assert cache.request(image, spec).result(timeout=5) == data
+    assert cache.stats.rendered == 1 and cache.stats.disk_hits == 1
+    cache.close()
+
+    reopened = ThumbnailCache(tmp_output_dir / "thumbnails", render, size=32)
+    assert reopened.get(image, spec) == data
+    assert reopened.get(image, RenderSpec((("blur", 0.3),), seed=1)) is None
+    reopened.close()
+
+
+def test_queued_requests_can_be_cancelled(tmp_image_dir, tmp_output_dir):
+    release = threading.Event()
+
+    def blocking_render(image_path, spec):
+        release.wait(5)
+        return render(image_path, spec)
+
+    cache = ThumbnailCache(
+        tmp_output_dir / "thumbnails", blocking_render, size=32, workers=1
+    )
+    image = tmp_image_dir / "test_image_0.jpg"
+    running = cache.request(image, RenderSpec((), seed=1))
+    queued = cache.request(image, RenderSpec((), seed=2))
+
+    assert queued.cancel()
+    release.set()
+    running.result(timeout=5)
+    cache.close()
+    assert cache.stats.rendered == 1 and cache.stats.cancelled == 1
+
+
+def test_trim_keeps_the_most_recently_used(tmp_image_dir, tmp_output_dir):
+    cache = ThumbnailCache(tmp_output_dir / "thumbnails", render, size=32)
+    specs = [RenderSpec((), seed=seed) for seed in range(4)]
+    images = sorted(tmp_image_dir.glob("*.jpg"))
+    for image in images:
+        cache.request(image, specs[0]).result(timeout=5)
+    size = max(len(cache.get(image, specs[0])) for image in images)
+    cache.get(images[0], specs[0])
+
+    cache.max_bytes = size
+    assert cache.trim() == 2
+    assert cache.get(images[0], specs[0]) is not None
+    cache.close()
@@ -0,0 +1,30 @@
+import json
+
+from adaptive_labeler.runtime.tracing import Tracer
+
+
+def test_disabled_tracer_records_nothing(tmp_output_dir):
+    tracer = Tracer(enabled=False)
+    with tracer.span("noise"):
+        pass
+
+    assert tracer.export_chrome_trace(tmp_output_dir / "trace.json") == 0
+    assert tracer.latency.actions() == []
+
+
+def test_spans_export_as_chrome_trace(tmp_output_dir):
+    tracer = Tracer(enabled=True)
+    with tracer.span("_resample_noisy_image"):
+        with tracer.span("noise"):
+            pass
+
+    path = tmp_output_dir / "trace.json"
+    assert tracer.export_chrome_trace(path) == 2
+
+    events = json.loads(path.read_text())["traceEvents"]
+    spans = {event["name"]: event for event in events if event["ph"] == "X"}
+    outer, inner = spans["_resample_noisy_image"], spans["noise"]
+    assert outer["ts"] <= inner["ts"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert any(event["ph"] == "M" for event in events)
+    assert tracer.latency.summary("noise").count == 1
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from adaptive_labeler.runtime.ui_loop import UiLoop
+
+
+@pytest.fixture
+def ui_loop():
+    return UiLoop()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_callbacks_run_on_the_loop_thread(ui_loop):
+    threads = []
+
+    ui_loop.call_soon(lambda: threads.append(threading.current_thread().name))
+    ui_loop.call_later(0.01, lambda: threads.append(threading.current_thread().name))
+
+    assert wait_for(lambda: len(threads) == 2)
+    assert threads == ["ui-loop", "ui-loop"]
+
+
+def test_cancelled_callbacks_do_not_run(ui_loop):
+    calls = []
+
+    scheduled = ui_loop.call_later(0.05, calls.append, "debounced")
+    scheduled.cancel()
+    ui_loop.call_later(0.1, calls.append, "latest")
+
+    assert wait_for(lambda: calls == ["latest"])
+    time.sleep(0.05)
+    assert calls == ["latest"]
+
+
+def test_every_repeats_until_cancelled(ui_loop):
+    ticks = []
+
+    refreshing = ui_loop.every(0.01, lambda: ticks.append(1))
+    assert wait_for(lambda: len(ticks) >= 3)
+    refreshing.cancel()
+    ui_loop.run(lambda: None)
+    count = len(ticks)
+    time.sleep(0.05)
+
+    assert len(ticks) == count
+
+
+def test_run_waits_for_the_result_and_is_inline_on_the_loop(ui_loop):
+    assert ui_loop.run(lambda: ui_loop.run(lambda: 2) + 1) == 3
+
+
+def test_run_blocking_keeps_the_loop_free(ui_loop):
+    release = threading.Event()
+
+    async def wait_on_worker():
+        return await ui_loop.run_blocking(release.wait, 2)
+
+    result = ui_loop.run_coroutine(wait_on_worker())
+    assert ui_loop.run(lambda: "loop still running") == "loop still running"
+    release.set()
+
+    assert result.result(timeout=2) is True
+
+
+def test_scheduling_does_not_start_threads(ui_loop):
+    ui_loop.run(lambda: None)
+    threads = threading.active_count()
+
+    handles = [ui_loop.call_later(0.2, lambda: None) for _ in range(200)]
+    for handle in handles:
+        handle.cancel()
+
+    assert threading.active_count() == threads
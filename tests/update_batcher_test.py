@@ -0,0 +1,49 @@
+from adaptive_labeler.runtime.update_batcher import UpdateBatcher
+
+
+class FakePage:
+    def __init__(self):
+        self.updates: list[tuple] = []
+
+    def update(self, *controls):
+        self.updates.append(controls)
+
+
+class FakeControl:
+    def __init__(self, page):
+        self.page = page
+
+
+def test_batch_sends_one_update_for_all_touched_controls():
+    page = FakePage()
+    slider, label = FakeControl(page), FakeControl(page)
+    batcher = UpdateBatcher()
+
+    with batcher.batch("up"):
+        batcher.touch(slider, label)
+        with batcher.batch("nested"):
+            batcher.touch(slider)
+
+    assert page.updates == [(slider, label)]
+    assert batcher.counts["up"].updates_per_interaction == 1.0
+    assert "nested" not in batcher.counts
+
+
+def test_touch_outside_batch_updates_immediately():
+    page = FakePage()
+    control = FakeControl(page)
+    batcher = UpdateBatcher()
+
+    batcher.touch(control)
+
+    assert page.updates == [(control,)]
+    assert batcher.counts[UpdateBatcher.UNBATCHED].updates_sent == 1
+
+
+def test_unmounted_controls_are_skipped():
+    batcher = UpdateBatcher()
+
+    with batcher.batch("tab"):
+        batcher.touch(FakeControl(page=None))
+
+    assert batcher.counts["tab"].updates_sent == 0